@@ -1,12 +1,10 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from config import Config
 
 # Initialize extensions
 db = SQLAlchemy()
-migrate = Migrate()
 
 def create_app(config_class=Config):
     """Application factory pattern"""
@@ -14,10 +12,24 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
     
     # Initialize extensions with app
+    from app import database
+    database.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    database.configure_engines(app)
     CORS(app)
     
+    # Per-request SQL/timing instrumentation (first, so it times everything)
+    from app.metrics import metrics
+    metrics.init_app(app)
+    
+    # Response compression (its after_request hook runs after every later one)
+    from app.compression import compression
+    compression.init_app(app)
+    
+    # Rate limits and concurrency cap, checked before any other request work
+    from app.ratelimit import limiter
+    limiter.init_app(app)
+    
     # Register blueprints
     from app.api import bp as api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
@@ -25,7 +37,43 @@ def create_app(config_class=Config):
     # Register error handlers
     from app.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
+
+    # Token revocation cache and per-request auth context
+    from app import auth
+    auth.init_app(app)
+    
+    # Password hashing worker pool
+    from app.passwords import hasher
+    hasher.init_app(app)
+    
+    # Per-user response cache for task reads
+    from app.cache import response_cache
+    response_cache.init_app(app)
     
+    # Incrementally maintained task statistics
+    from app import stats
+    stats.init_app(app)
+    
+    # Change sequence and tombstones for delta sync
+    from app import sync
+    sync.init_app(app)
+    
+    # Full-text search index over task titles and descriptions
+    from app import search
+    search.init_app(app)
+    
+    # Pub/sub of task change events for streaming clients
+    from app.events import event_bus
+    event_bus.init_app(app)
+    
+    # Deadline heap for overdue detection and task.overdue events
+    from app.scheduler import scheduler
+    scheduler.init_app(app)
+    
+    # Lazy `flask db` and warm-up of the hot paths (last, once everything is registered)
+    from app import startup
+    startup.init_app(app)
+
     return app
 
 from app import models 
\ No newline at end of file
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint('api', __name__)
 
-from app.api import users, tasks, health, errors, auth 
\ No newline at end of file
+from app.api import users, tasks, health, errors, auth, stats, export, sync, events, search 
\ No newline at end of file
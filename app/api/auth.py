@@ -3,6 +3,7 @@ from app import db
 from app.models import User
 from app.api import bp
 from app.auth import generate_tokens
+from app.startup import warmup
 from marshmallow import Schema, fields, ValidationError
 
 class LoginSchema(Schema):
@@ -19,6 +20,27 @@ class RegisterSchema(Schema):
 login_schema = LoginSchema()
 register_schema = RegisterSchema()
 
+def token_response(user, message, status):
+    """Issue a token pair for ``user`` along with the account details"""
+    access_token, refresh_token = generate_tokens(user.id)
+    
+    return jsonify({
+        'message': message,
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email
+        }
+    }), status
+
+@warmup
+def warm_login():
+    """Login validation and user lookup"""
+    login_schema.load({'username': '', 'password': ''})
+    User.query.filter_by(username='').first()
+
 @bp.route('/auth/login', methods=['POST'])
 def login():
     """User login endpoint"""
@@ -32,18 +54,12 @@ def login():
     if not user or not user.check_password(data['password']):
         return jsonify({'error': 'Invalid username or password'}), 401
     
-    access_token, refresh_token = generate_tokens(user.id)
+    # Upgrade hashes made with an older algorithm or cost
+    if user.password_needs_rehash():
+        user.set_password(data['password'])
+        db.session.commit()
     
-    return jsonify({
-        'message': 'Login successful',
-        'access_token': access_token,
-        'refresh_token': refresh_token,
-        'user': {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        }
-    }), 200
+    return token_response(user, 'Login successful', 200)
 
 @bp.route('/auth/register', methods=['POST'])
 def register():
@@ -71,18 +87,7 @@ def register():
     db.session.commit()
     
     # Generate tokens for the new user
-    access_token, refresh_token = generate_tokens(user.id)
-    
-    return jsonify({
-        'message': 'Registration successful',
-        'access_token': access_token,
-        'refresh_token': refresh_token,
-        'user': {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        }
-    }), 201
+    return token_response(user, 'Registration successful', 201)
 
 @bp.route('/auth/me', methods=['GET'])
 def get_current_user_info():
@@ -98,4 +103,24 @@ def get_current_user_info():
         'username': user.username,
         'email': user.email,
         'created_at': user.created_at.isoformat()
-    }), 200 
\ No newline at end of file
+    }), 200
+
+@bp.route('/auth/logout', methods=['POST'])
+def logout():
+    """Revoke the current access token (and an optional refresh token)"""
+    from app.auth import get_current_payload, get_revocations, verify_token
+    
+    payload = get_current_payload()
+    if not payload:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    revocations = get_revocations()
+    revocations.revoke_token(payload)
+    
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        refresh_payload = verify_token(refresh_token)
+        if refresh_payload and refresh_payload['user_id'] == payload['user_id']:
+            revocations.revoke_token(refresh_payload)
+    
+    return jsonify({'message': 'Logout successful'}), 200
@@ -1,5 +1,6 @@
 from flask import jsonify
 from app.api import bp
+from app.passwords import PasswordHashingBusy
 
 @bp.errorhandler(404)
 def not_found_error(error):
@@ -9,4 +10,12 @@ def not_found_error(error):
 @bp.errorhandler(500)
 def internal_error(error):
     """500 Internal Server Error for API"""
-    return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
+    return jsonify({'error': 'Internal server error'}), 500
+
+@bp.errorhandler(PasswordHashingBusy)
+def password_hashing_busy(error):
+    """503 when the password hashing pool is saturated"""
+    response = jsonify({'error': 'Server busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
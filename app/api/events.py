@@ -0,0 +1,52 @@
+from flask import Response, jsonify, current_app
+from app.api import bp
+from app.auth import login_required, get_user_id_from_token
+from app.events import event_bus
+from app.serializers import dumps
+
+# Reconnection delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 3000
+
+def format_event(event, data):
+    """Frame one server-sent event"""
+    return f'event: {event}\ndata: {dumps(data).decode()}\n\n'
+
+@bp.route('/tasks/stream', methods=['GET'])
+@login_required
+@get_user_id_from_token
+def stream_tasks(user_id):
+    """Server-sent events for changes to the authenticated user's tasks
+
+    Emits ``task.created``, ``task.updated``, ``task.status_changed`` and
+    ``task.deleted`` events as they are committed, and a comment line every
+    ``EVENTS_HEARTBEAT_SECONDS`` so proxies keep the connection open. A
+    client that falls more than ``EVENTS_QUEUE_SIZE`` events behind gets a
+    ``resync`` event and the stream ends; it should catch up with
+    ``GET /tasks/changes`` and reconnect.
+    """
+    if not event_bus.enabled:
+        return jsonify({'error': 'Event streaming is disabled'}), 404
+    
+    # Subscribe before responding so no event after this request is missed
+    subscription = event_bus.subscribe(user_id)
+    heartbeat = current_app.config['EVENTS_HEARTBEAT_SECONDS']
+    
+    def generate():
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while True:
+                message = subscription.get(heartbeat)
+                if subscription.overflowed:
+                    yield format_event('resync', {})
+                    return
+                if message is None:
+                    yield ': keep-alive\n\n'
+                else:
+                    yield format_event(message['event'], message['data'])
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -1,6 +1,9 @@
-from flask import jsonify
+from flask import jsonify, current_app
 from app.api import bp
 from app import db
+from app.auth import login_required
+from app.cache import response_cache
+from app.metrics import metrics
 
 @bp.route('/health', methods=['GET'])
 def health_check():
@@ -16,4 +19,17 @@ def health_check():
         'status': 'ok',
         'database': db_status,
         'timestamp': '2024-01-01T00:00:00Z'  # You can use datetime.utcnow().isoformat()
-    }) 
\ No newline at end of file
+    })
+
+@bp.route('/cache/stats', methods=['GET'])
+@login_required
+def cache_stats():
+    """Response cache hit/miss counters"""
+    return jsonify(response_cache.stats())
+
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request, SQL and cache metrics in Prometheus text format"""
+    if 'metrics' not in current_app.extensions:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
@@ -0,0 +1,32 @@
+from flask import jsonify, request, current_app
+from app import db
+from app.models import Task
+from app.api import bp
+from app.api.tasks import TaskSchema, filter_tasks
+from app.auth import login_required, get_user_id_from_token
+from app.pagination import get_limit
+from app.search import search_query
+from app.serializers import row_serializer, json_response
+
+@bp.route('/tasks/search', methods=['GET'])
+@login_required
+@get_user_id_from_token
+def search_tasks(user_id):
+    """Full-text search over the authenticated user's task titles and descriptions
+    
+    Every word of ``q`` must match; ``word*`` matches by prefix. Results are
+    ranked best first and accept the ``status`` and ``priority`` filters.
+    """
+    try:
+        limit = get_limit(current_app.config['TASKS_PER_PAGE'],
+                          current_app.config['TASKS_MAX_PER_PAGE'])
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    serializer = row_serializer(TaskSchema)
+    query = search_query(serializer.columns(Task), user_id, request.args.get('q', ''))
+    if query is None:
+        return jsonify({'error': 'q must contain at least one word'}), 400
+    
+    tasks = db.session.execute(filter_tasks(query).limit(limit)).all()
+    return json_response(serializer.dump(tasks))
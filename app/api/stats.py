@@ -0,0 +1,19 @@
+from flask import jsonify
+from app.api import bp
+from app.auth import login_required, get_user_id_from_token, admin_required
+from app.stats import get_stats, count_overdue, ALL_USERS
+
+@bp.route('/tasks/stats', methods=['GET'])
+@login_required
+@get_user_id_from_token
+def get_task_stats(user_id):
+    """Task counts of the authenticated user by status and priority"""
+    stats = get_stats(user_id)
+    stats['overdue'] = count_overdue(user_id)
+    return jsonify(stats)
+
+@bp.route('/stats', methods=['GET'])
+@admin_required
+def get_global_stats():
+    """Task counts over all users (admin only)"""
+    return jsonify(get_stats(ALL_USERS))
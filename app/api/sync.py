@@ -0,0 +1,79 @@
+import heapq
+from flask import jsonify, request, current_app
+from sqlalchemy import tuple_
+from app.models import Task, TaskTombstone
+from app.api import bp
+from app.api.tasks import TaskSchema
+from app.auth import login_required, get_user_id_from_token
+from app.pagination import encode_cursor, decode_cursor, get_limit
+from app.serializers import row_serializer, json_response
+from app.sync import purged_seq
+
+@bp.route('/tasks/changes', methods=['GET'])
+@login_required
+@get_user_id_from_token
+def get_task_changes(user_id):
+    """Tasks created, updated or deleted since a sync token
+    
+    Every task write takes the next number in the user's change sequence
+    (``Task.sync_seq``) and every delete leaves a tombstone with its own
+    number. Unlike ``updated_at``, the sequence orders writes within the same
+    clock tick and covers deletions. Without ``since`` all tasks are
+    returned. Changes come in sequence order, ``limit`` at a time. Pass
+    ``next_since`` back as ``since`` until ``has_more`` is false. A token
+    older than the pruned tombstones gets 410, and the client must resync
+    in full.
+    """
+    try:
+        limit = get_limit(current_app.config['TASKS_PER_PAGE'],
+                          current_app.config['TASKS_MAX_PER_PAGE'])
+        since = request.args.get('since')
+        after = decode_cursor(since, int, int) if since else None
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    if after and after[0] < purged_seq(user_id):
+        return jsonify({'error': 'Sync token expired, fetch all tasks again'}), 410
+    
+    serializer = row_serializer(TaskSchema)
+    query = Task.query.with_entities(
+        *serializer.columns(Task, 'sync_seq', 'id')
+    ).filter(Task.user_id == user_id)
+    if after:
+        query = query.filter(tuple_(Task.sync_seq, Task.id) > after)
+    tasks = query.order_by(Task.sync_seq, Task.id).limit(limit + 1).all()
+    
+    tombstones = []
+    if after:
+        tombstones = TaskTombstone.query.with_entities(
+            TaskTombstone.seq, TaskTombstone.task_id
+        ).filter(
+            TaskTombstone.user_id == user_id,
+            tuple_(TaskTombstone.seq, TaskTombstone.task_id) > after
+        ).order_by(TaskTombstone.seq).limit(limit + 1).all()
+    
+    # Both lists are in sequence order; interleave them and keep one page
+    entries = list(heapq.merge(
+        (((task.sync_seq, task.id), task) for task in tasks),
+        (((tombstone.seq, tombstone.task_id), None) for tombstone in tombstones),
+        key=lambda entry: entry[0],
+    ))
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    
+    changed = [task for _, task in entries if task is not None]
+    # A task id reused after a delete supersedes the older tombstone
+    live_ids = {task.id for task in changed}
+    deleted = [key[1] for key, task in entries if task is None and key[1] not in live_ids]
+    
+    if entries:
+        next_since = encode_cursor(*entries[-1][0])
+    else:
+        next_since = since or encode_cursor(0, 0)
+    
+    return json_response({
+        'changes': serializer.dump(changed),
+        'deleted': deleted,
+        'next_since': next_since,
+        'has_more': has_more,
+    })
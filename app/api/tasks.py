@@ -1,8 +1,17 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app
+from sqlalchemy import select, tuple_, update
 from app import db
 from app.models import Task, User
 from app.api import bp
-from app.auth import login_required, get_user_from_token
+from app.auth import login_required, get_user_id_from_token
+from app.cache import response_cache
+from app.events import event_bus
+from app.scheduler import overdue_filter
+from app.startup import warmup
+from app.metrics import timed
+from app.etags import resource_etag, collection_etag, not_modified, precondition_failed, with_etag
+from app.pagination import encode_cursor, decode_cursor, get_limit, get_fields, add_next_link
+from app.serializers import row_serializer, json_response
 from marshmallow import Schema, fields, ValidationError
 from datetime import datetime
 
@@ -21,39 +30,115 @@ class TaskSchema(Schema):
 task_schema = TaskSchema()
 tasks_schema = TaskSchema(many=True)
 
-@bp.route('/tasks', methods=['GET'])
-@login_required
-@get_user_from_token
-def get_tasks(user):
-    """Get all tasks for the authenticated user with optional filtering"""
-    # Query parameters for filtering
+def task_etag(task):
+    """Strong ETag of a task"""
+    return resource_etag('task', task.id, task.updated_at)
+
+def filter_tasks(query):
+    """Apply the ``status`` and ``priority`` query parameters to a task query"""
     status = request.args.get('status')
     priority = request.args.get('priority')
-    
-    query = Task.query.filter(Task.user_id == user.id)
-    
     if status:
         query = query.filter(Task.status == status)
     if priority:
         query = query.filter(Task.priority == priority)
+    return query
+
+def task_list(user_id):
+    """Build the page query behind ``GET /tasks`` from the request parameters
+    
+    Returns ``(query, render)``: execute the query with a sync or async
+    session and pass its rows to ``render`` for the response. Raises
+    ValueError for invalid parameters.
+    """
+    limit = get_limit(current_app.config['TASKS_PER_PAGE'],
+                      current_app.config['TASKS_MAX_PER_PAGE'])
+    only = get_fields(task_schema.fields)
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    
+    # Select the dumped columns plus the keyset and version columns
+    serializer = row_serializer(TaskSchema, only)
+    query = filter_tasks(select(
+        *serializer.columns(Task, 'created_at', 'id', 'updated_at')
+    ).where(Task.user_id == user_id))
+    
+    if request.args.get('overdue') in ('true', '1'):
+        query = query.filter(overdue_filter(user_id))
+    if after:
+        query = query.filter(tuple_(Task.created_at, Task.id) > after)
+    query = query.order_by(Task.created_at, Task.id).limit(limit + 1)
+    
+    def render(tasks):
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].id)
+        
+        etag = collection_etag('tasks', tasks, only, next_cursor)
+        response = not_modified(etag)
+        if response is not None:
+            return response
+        
+        with timed('serialize'):
+            response = json_response(serializer.dump(tasks))
+        return with_etag(add_next_link(response, next_cursor), etag)
+    
+    return query, render
+
+def task_response(task):
+    """Response for a single task lookup: 404, 304 or the task with its ETag"""
+    if not task:
+        return jsonify({'error': 'Task not found'}), 404
     
-    tasks = query.all()
-    return jsonify(tasks_schema.dump(tasks))
+    etag = task_etag(task)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    with timed('serialize'):
+        response = jsonify(task_schema.dump(task))
+    return with_etag(response, etag)
+
+@warmup
+def warm_tasks():
+    """Task page and single-task queries, serializers and schema validation"""
+    with current_app.test_request_context('/api/tasks'):
+        query, render = task_list(0)
+        render(db.session.execute(query).all())
+        task_response(Task.query.filter_by(id=0, user_id=0).first())
+        task_schema.validate({'title': ''})
+
+@bp.route('/tasks', methods=['GET'])
+@login_required
+@get_user_id_from_token
+@response_cache.cached
+def get_tasks(user_id):
+    """Get a page of the authenticated user's tasks with optional filtering
+    
+    Tasks are ordered by ``(created_at, id)`` and paged with an opaque keyset
+    cursor, so every page costs the same regardless of depth. The next page
+    is advertised in the ``Link`` header. The ETag is derived from the page's
+    ids and ``updated_at`` stamps and checked before serialization. Rows are
+    selected as column tuples and dumped by a precompiled serializer.
+    """
+    try:
+        query, render = task_list(user_id)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    return render(db.session.execute(query).all())
 
 @bp.route('/tasks/<int:id>', methods=['GET'])
 @login_required
-@get_user_from_token
-def get_task(user, id):
+@get_user_id_from_token
+@response_cache.cached
+def get_task(user_id, id):
     """Get a specific task (only if owned by authenticated user)"""
-    task = Task.query.filter_by(id=id, user_id=user.id).first()
-    if not task:
-        return jsonify({'error': 'Task not found'}), 404
-    return jsonify(task_schema.dump(task))
+    return task_response(Task.query.filter_by(id=id, user_id=user_id).first())
 
 @bp.route('/tasks', methods=['POST'])
 @login_required
-@get_user_from_token
-def create_task(user):
+@get_user_id_from_token
+def create_task(user_id):
     """Create a new task for the authenticated user"""
     try:
         data = task_schema.load(request.get_json())
@@ -61,23 +146,178 @@ def create_task(user):
         return jsonify({'errors': err.messages}), 400
     
     # Set user_id from authenticated user
-    data['user_id'] = user.id
+    data['user_id'] = user_id
     
     task = Task(**data)
     db.session.add(task)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
+    
+    data = task_schema.dump(task)
+    event_bus.publish(user_id, 'task.created', data)
+    return with_etag(jsonify(data), task_etag(task)), 201
+
+def get_bulk_items(key):
+    """Read the list under ``key`` from a bulk request body
+    
+    Returns ``(items, error_response)``; exactly one of them is None.
+    """
+    data = request.get_json(silent=True)
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({'error': f'"{key}" must be a non-empty list'}), 400)
+    if len(items) > current_app.config['TASKS_BULK_MAX']:
+        return None, (jsonify({
+            'error': f"At most {current_app.config['TASKS_BULK_MAX']} items per request"
+        }), 400)
+    return items, None
+
+def split_ids(items):
+    """Separate the ``id`` of each bulk update item from its fields
+    
+    Returns ``(ids, fields, errors)`` with errors keyed by item index.
+    """
+    ids, fields_list, errors = [], [], {}
+    seen = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'_schema': ['Invalid input type.']}
+            item = {}
+        item = dict(item)
+        task_id = item.pop('id', None)
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            errors.setdefault(index, {})['id'] = ['A task id is required.']
+        elif task_id in seen:
+            errors.setdefault(index, {})['id'] = ['Duplicate task id.']
+        else:
+            seen.add(task_id)
+        ids.append(task_id)
+        fields_list.append(item)
+    return ids, fields_list, errors
+
+@bp.route('/tasks/bulk', methods=['POST'])
+@login_required
+@get_user_id_from_token
+def create_tasks_bulk(user_id):
+    """Create many tasks in one transaction
+    
+    The whole payload is validated first; if any item is invalid nothing is
+    written and the errors are returned keyed by item index.
+    """
+    items, error = get_bulk_items('tasks')
+    if error:
+        return error
+    
+    try:
+        rows = tasks_schema.load(items)
+    except ValidationError as err:
+        return jsonify({'errors': err.messages}), 400
+    
+    # One flush and one commit for the whole batch; the ORM sends same-shaped
+    # rows as executemany batches wherever the dialect can return their ids.
+    # Dump between the two, before the commit expires every task.
+    tasks = [Task(**row, user_id=user_id) for row in rows]
+    db.session.add_all(tasks)
+    db.session.flush()
+    created = tasks_schema.dump(tasks)
+    db.session.commit()
+    response_cache.invalidate_user(user_id)
     
-    return jsonify(task_schema.dump(task)), 201
+    for data in created:
+        event_bus.publish(user_id, 'task.created', data)
+    return jsonify({'results': [
+        {'status': 201, 'task': task} for task in created
+    ]}), 201
+
+@bp.route('/tasks/bulk', methods=['PATCH'])
+@login_required
+@get_user_id_from_token
+def update_tasks_bulk(user_id):
+    """Update many tasks in one transaction
+    
+    Each item carries the task ``id`` plus the fields to change. Items for
+    tasks the user does not own are reported as 404 and skipped.
+    """
+    items, error = get_bulk_items('tasks')
+    if error:
+        return error
+    
+    ids, changes, errors = split_ids(items)
+    try:
+        changes = tasks_schema.load(changes, partial=True)
+    except ValidationError as err:
+        for index, messages in err.messages.items():
+            errors.setdefault(index, {}).update(messages)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    tasks = {
+        task.id: task
+        for task in Task.query.filter(Task.user_id == user_id, Task.id.in_(ids))
+    }
+    for task_id, data in zip(ids, changes):
+        if task_id in tasks:
+            for field, value in data.items():
+                setattr(tasks[task_id], field, value)
+    # Dump before the commit expires the tasks, which would reload each one
+    db.session.flush()
+    updated = {task_id: task_schema.dump(task) for task_id, task in tasks.items()}
+    db.session.commit()
+    response_cache.invalidate_user(user_id)
+    
+    for data in updated.values():
+        event_bus.publish(user_id, 'task.updated', data)
+    return jsonify({'results': [
+        {'id': task_id, 'status': 200, 'task': updated[task_id]}
+        if task_id in tasks else
+        {'id': task_id, 'status': 404, 'error': 'Task not found'}
+        for task_id in ids
+    ]})
+
+@bp.route('/tasks/bulk', methods=['DELETE'])
+@login_required
+@get_user_id_from_token
+def delete_tasks_bulk(user_id):
+    """Delete many tasks in one transaction"""
+    ids, error = get_bulk_items('ids')
+    if error:
+        return error
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': '"ids" must be a list of task ids'}), 400
+    
+    tasks = Task.query.filter(Task.user_id == user_id, Task.id.in_(ids)).all()
+    for task in tasks:
+        db.session.delete(task)
+    db.session.commit()
+    response_cache.invalidate_user(user_id)
+    
+    deleted = {task.id for task in tasks}
+    for task_id in dict.fromkeys(ids):
+        if task_id in deleted:
+            event_bus.publish(user_id, 'task.deleted', {'id': task_id})
+    return jsonify({'results': [
+        {'id': task_id, 'status': 204} if task_id in deleted else
+        {'id': task_id, 'status': 404, 'error': 'Task not found'}
+        for task_id in ids
+    ]})
 
 @bp.route('/tasks/<int:id>', methods=['PUT'])
 @login_required
-@get_user_from_token
-def update_task(user, id):
-    """Update a task (only if owned by authenticated user)"""
-    task = Task.query.filter_by(id=id, user_id=user.id).first()
+@get_user_id_from_token
+def update_task(user_id, id):
+    """Update a task (only if owned by authenticated user)
+    
+    An ``If-Match`` header makes the update conditional on the task's
+    current ETag (optimistic concurrency); a mismatch returns 412, also when
+    another write lands between reading the task and updating it.
+    """
+    task = Task.query.filter_by(id=id, user_id=user_id).first()
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    if precondition_failed(task_etag(task)):
+        return jsonify({'error': 'Task has been modified'}), 412
+    
     try:
         data = task_schema.load(request.get_json(), partial=True)
     except ValidationError as err:
@@ -87,31 +327,52 @@ def update_task(user, id):
     if 'user_id' in data:
         del data['user_id']
     
+    if request.if_match:
+        # Claim the row only if it still has the updated_at checked above; a
+        # concurrent write has changed it, so no row matches. The claim holds
+        # the row's write lock until this transaction commits.
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(Task.__table__)
+            .where(Task.id == id, Task.updated_at == task.updated_at)
+            .values(updated_at=now)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return jsonify({'error': 'Task has been modified'}), 412
+        task.updated_at = now
+    
     for field, value in data.items():
         setattr(task, field, value)
     
     db.session.commit()
-    return jsonify(task_schema.dump(task))
+    response_cache.invalidate_user(user_id)
+    
+    data = task_schema.dump(task)
+    event_bus.publish(user_id, 'task.updated', data)
+    return with_etag(jsonify(data), task_etag(task))
 
 @bp.route('/tasks/<int:id>', methods=['DELETE'])
 @login_required
-@get_user_from_token
-def delete_task(user, id):
+@get_user_id_from_token
+def delete_task(user_id, id):
     """Delete a task (only if owned by authenticated user)"""
-    task = Task.query.filter_by(id=id, user_id=user.id).first()
+    task = Task.query.filter_by(id=id, user_id=user_id).first()
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
     db.session.delete(task)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
+    event_bus.publish(user_id, 'task.deleted', {'id': id})
     return '', 204
 
 @bp.route('/tasks/<int:id>/status', methods=['PATCH'])
 @login_required
-@get_user_from_token
-def update_task_status(user, id):
+@get_user_id_from_token
+def update_task_status(user_id, id):
     """Update task status (only if owned by authenticated user)"""
-    task = Task.query.filter_by(id=id, user_id=user.id).first()
+    task = Task.query.filter_by(id=id, user_id=user_id).first()
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
@@ -125,5 +386,8 @@ def update_task_status(user, id):
     
     task.status = data['status']
     db.session.commit()
+    response_cache.invalidate_user(user_id)
     
-    return jsonify(task_schema.dump(task)) 
\ No newline at end of file
+    data = task_schema.dump(task)
+    event_bus.publish(user_id, 'task.status_changed', data)
+    return with_etag(jsonify(data), task_etag(task))
\ No newline at end of file
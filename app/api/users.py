@@ -1,9 +1,15 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app
+from sqlalchemy import select
 from app import db
 from app.models import User
 from app.api import bp
 from marshmallow import Schema, fields, ValidationError
-from app.auth import login_required
+from app.auth import login_required, get_revocations
+from app.cache import response_cache
+from app.metrics import timed
+from app.etags import resource_etag, collection_etag, not_modified, with_etag
+from app.pagination import encode_cursor, decode_cursor, get_limit, get_fields, add_next_link
+from app.serializers import row_serializer, json_response
 
 class UserSchema(Schema):
     """User serialization schema"""
@@ -16,19 +22,70 @@ class UserSchema(Schema):
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 
+# Columns the directory can be searched and paged by; each has a unique index
+SEARCH_COLUMNS = {'username': User.username, 'email': User.email}
+
 @bp.route('/users', methods=['GET'])
 @login_required
 def get_users():
-    """Get all users (requires authentication)"""
-    users = User.query.all()
-    return jsonify(users_schema.dump(users))
+    """Get a page of users (requires authentication)
+    
+    Pages are ordered by id, or with ``q`` by the searched column
+    (``by=username``, the default, or ``by=email``), which is matched by
+    prefix. Every page is an index range read of ``limit + 1`` rows; the
+    extra row only tells whether a next page exists.
+    """
+    try:
+        limit = get_limit(current_app.config['USERS_PER_PAGE'],
+                          current_app.config['USERS_MAX_PER_PAGE'])
+        only = get_fields(user_schema.fields)
+        q = request.args.get('q')
+        if q:
+            by = request.args.get('by', 'username')
+            if by not in SEARCH_COLUMNS:
+                raise ValueError(f"by must be one of: {', '.join(SEARCH_COLUMNS)}")
+            key = SEARCH_COLUMNS[by]
+        else:
+            by, key = 'id', User.id
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, int if by == 'id' else str)[0] if cursor else None
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    serializer = row_serializer(UserSchema, only)
+    query = select(*serializer.columns(User, by, 'id', 'updated_at'))
+    if q:
+        # A range rather than LIKE, so the unique index serves the search
+        query = query.where(key >= q, key < q + '\U0010ffff')
+    if after is not None:
+        query = query.where(key > after)
+    users = db.session.execute(query.order_by(key).limit(limit + 1)).all()
+    
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(getattr(users[-1], by))
+    
+    etag = collection_etag('users', users, only, next_cursor)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    with timed('serialize'):
+        response = json_response(serializer.dump(users))
+    return with_etag(add_next_link(response, next_cursor), etag)
 
 @bp.route('/users/<int:id>', methods=['GET'])
 @login_required
 def get_user(id):
     """Get a specific user (requires authentication)"""
     user = User.query.get_or_404(id)
-    return jsonify(user_schema.dump(user))
+    etag = resource_etag('user', user.id, user.updated_at)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    with timed('serialize'):
+        response = jsonify(user_schema.dump(user))
+    return with_etag(response, etag)
 
 @bp.route('/users', methods=['POST'])
 @login_required
@@ -76,4 +133,8 @@ def delete_user(id):
     user = User.query.get_or_404(id)
     db.session.delete(user)
     db.session.commit()
+    
+    # Tokens of a deleted user must stop working, even in claims-only mode
+    get_revocations().revoke_user(id)
+    response_cache.invalidate_user(id)
     return '', 204 
\ No newline at end of file
@@ -0,0 +1,257 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask import current_app, jsonify, request
+from marshmallow import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+from werkzeug.test import EnvironBuilder
+from app import create_app
+from app.api.auth import login_schema, token_response
+from app.api.tasks import task_list, task_response
+from app.auth import get_current_payload
+from app.cache import response_cache
+from app.database import async_url, engine_options, configure_sqlite, is_sqlite_memory
+from app.models import Task, User
+from app.passwords import hasher
+from config import Config
+
+# The async routes still call into sync code that may block: the admission
+# queue, rate limits, revocation checks and the response cache can wait on
+# a lock, redis or the database. Those calls run on a thread
+# (asyncio.to_thread, which carries the request context along) so that a
+# slow one never stalls the event loop.
+
+async def current_user_id(session):
+    """Async counterpart of ``app.auth.get_current_user_id``"""
+    payload = await asyncio.to_thread(get_current_payload)
+    if not payload:
+        return None
+    if current_app.config.get('JWT_CLAIMS_ONLY'):
+        return payload['user_id']
+    user = await session.get(User, payload['user_id'])
+    return user.id if user else None
+
+def cache_lookup(user_id):
+    """Cache key of the current request and the cached response (or None)"""
+    key = response_cache.key(user_id)
+    return key, response_cache.lookup(key)
+
+def cache_store(key, render, *args):
+    """Render a response and store it under ``key``"""
+    return response_cache.store(key, render(*args))
+
+async def get_tasks(session):
+    """``GET /api/tasks`` on the async engine"""
+    user_id = await current_user_id(session)
+    if user_id is None:
+        return jsonify({'error': 'Authentication required'}), 401
+    key, response = await asyncio.to_thread(cache_lookup, user_id)
+    if response is not None:
+        return response
+    
+    try:
+        query, render = task_list(user_id)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    rows = (await session.execute(query)).all()
+    return await asyncio.to_thread(cache_store, key, render, rows)
+
+async def get_task(session, id):
+    """``GET /api/tasks/<id>`` on the async engine"""
+    user_id = await current_user_id(session)
+    if user_id is None:
+        return jsonify({'error': 'Authentication required'}), 401
+    key, response = await asyncio.to_thread(cache_lookup, user_id)
+    if response is not None:
+        return response
+    
+    task = await session.scalar(select(Task).filter_by(id=id, user_id=user_id))
+    return await asyncio.to_thread(cache_store, key, task_response, task)
+
+async def login(session):
+    """``POST /api/auth/login`` on the async engine
+    
+    Password hashing runs off the event loop, on the hasher's worker pool.
+    """
+    try:
+        data = login_schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify({'errors': err.messages}), 400
+    
+    user = await session.scalar(select(User).filter_by(username=data['username']))
+    if not user or not await asyncio.to_thread(hasher.verify, user.password_hash, data['password']):
+        return jsonify({'error': 'Invalid username or password'}), 401
+    
+    # Upgrade hashes made with an older algorithm or cost
+    if hasher.needs_rehash(user.password_hash):
+        password_hash = await asyncio.to_thread(hasher.hash, data['password'])
+        await session.execute(
+            update(User).where(User.id == user.id).values(password_hash=password_hash)
+        )
+        await session.commit()
+    
+    return token_response(user, 'Login successful', 200)
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """One request of ``ThreadedWsgiToAsgi``"""
+    
+    # The plain function asgiref wraps with sync_to_async(thread_sensitive=True)
+    _run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+    
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+    
+    async def run_wsgi_app(self, body):
+        run = sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=self.executor)
+        await run(body)
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """asgiref's WSGI adapter, running each request on a thread of ``executor``
+    
+    asgiref runs every WSGI call on one shared thread by default, so a single
+    open event stream would hold up every other request passed to Flask.
+    """
+    
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+    
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+class AsyncApp:
+    """ASGI application running the hot read and login routes as coroutines
+    
+    ``GET /api/tasks``, ``GET /api/tasks/<id>`` and ``POST /api/auth/login``
+    query the database through SQLAlchemy's async engine, so a worker keeps
+    serving other connections while one waits on the database or on a
+    password hash. They run inside a regular Flask request context and share
+    their parameter parsing, ETags, caching and serialization with the sync
+    views. Every other request, including all writes, is passed to the
+    Flask app through asgiref's WSGI adapter, on a pool of
+    ``ASYNC_WSGI_THREADS`` threads. Writes therefore keep going through the
+    ORM session and its stats, sync and search listeners. Each open event
+    stream holds one of the threads.
+    
+    In-memory SQLite databases cannot be shared with a second engine, so
+    with one every request takes the WSGI path.
+    """
+    
+    routes = Map([
+        Rule('/api/tasks', endpoint=get_tasks, methods=['GET']),
+        Rule('/api/tasks/<int:id>', endpoint=get_task, methods=['GET']),
+        Rule('/api/auth/login', endpoint=login, methods=['POST']),
+    ])
+    
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.executor = ThreadPoolExecutor(config['ASYNC_WSGI_THREADS'], thread_name_prefix='wsgi')
+        self.wsgi = ThreadedWsgiToAsgi(flask_app, self.executor)
+        uri = config['ASYNC_DATABASE_URI'] or config['SQLALCHEMY_DATABASE_URI']
+        self.engine = None
+        if not is_sqlite_memory(uri):
+            url = async_url(uri)
+            self.engine = create_async_engine(url, **engine_options(
+                {**config, 'SQLALCHEMY_DATABASE_URI': str(url)}
+            ))
+            if url.get_backend_name() == 'sqlite':
+                configure_sqlite(self.engine.sync_engine, config, memory=False)
+            self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+    
+        view = args = None
+        if scope['type'] == 'http' and self.engine is not None:
+            try:
+                view, args = self.routes.bind('localhost').match(scope['path'], method=scope['method'])
+            except HTTPException:
+                pass
+        if view is None:
+            return await self.wsgi(scope, receive, send)
+    
+        environ = self.build_environ(scope, await self.read_body(receive))
+        response = await self.dispatch(environ, view, args)
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': b''.join(app_iter)})
+    
+    async def dispatch(self, environ, view, args):
+        """Run an async view the way Flask runs a sync one
+    
+        The request context supplies ``request``, ``g`` and the before/after
+        request hooks; errors go through the app's error handlers. The hooks
+        (admission, rate limits, compression) run on a thread.
+        """
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = await asyncio.to_thread(app.preprocess_request)
+                    if rv is None:
+                        async with self.sessions() as session:
+                            rv = await view(session, **args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                return await asyncio.to_thread(app.finalize_request, rv)
+            except Exception as e:
+                return app.handle_exception(e)
+    
+    async def lifespan(self, receive, send):
+        """Dispose of the async engine's connections and the WSGI threads at shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    @staticmethod
+    async def read_body(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+    
+    @staticmethod
+    def build_environ(scope, body):
+        """WSGI environ of an ASGI HTTP request"""
+        headers = [(name.decode('latin-1'), value.decode('latin-1'))
+                   for name, value in scope['headers']]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('127.0.0.1', 0)
+        builder = EnvironBuilder(
+            path=scope['path'],
+            base_url=f"{scope.get('scheme', 'http')}://{server[0]}:{server[1]}{scope.get('root_path', '')}",
+            method=scope['method'],
+            query_string=scope['query_string'].decode('latin-1'),
+            headers=headers,
+            data=body,
+            environ_overrides={'REMOTE_ADDR': client[0], 'REMOTE_PORT': str(client[1])},
+        )
+        try:
+            return builder.get_environ()
+        finally:
+            builder.close()
+
+def create_asgi_app(config_class=Config):
+    """ASGI application factory"""
+    return AsyncApp(create_app(config_class))
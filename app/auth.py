@@ -1,15 +1,136 @@
 import jwt
+import time
+import uuid
 import datetime
+import threading
 from functools import wraps
-from flask import request, jsonify, current_app
-from app.models import User
+from flask import request, jsonify, current_app, g
+from sqlalchemy import delete, select
+from app import db
+from app.models import RevokedToken, User
+from app.metrics import timed
+from app.startup import warmup
+
+class TokenRevocationCache:
+    """In-memory denylist of revoked tokens (per process)
+    
+    Individual tokens are revoked by ``jti`` until they would have expired
+    anyway; all tokens of a user can be revoked by recording a cutoff, after
+    which tokens issued at or before that instant are rejected. Cutoffs are
+    kept for ``user_cutoff_ttl`` seconds, the longest token lifetime.
+    """
+    
+    def __init__(self, user_cutoff_ttl):
+        self.user_cutoff_ttl = user_cutoff_ttl
+        self._lock = threading.Lock()
+        self._tokens = {}  # jti -> exp
+        self._users = {}   # user_id -> (revoked-before timestamp, expiry)
+    
+    def revoke_token(self, payload):
+        """Revoke a single token until its expiry"""
+        with self._lock:
+            self._purge(time.time())
+            self._tokens[payload['jti']] = payload['exp']
+    
+    def revoke_user(self, user_id):
+        """Revoke every token issued to a user so far"""
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            self._users[user_id] = (now, now + self.user_cutoff_ttl)
+    
+    def is_revoked(self, payload):
+        """Check a decoded payload against the denylist"""
+        if payload.get('jti') in self._tokens:
+            return True
+        cutoff, _ = self._users.get(payload.get('user_id'), (None, None))
+        return cutoff is not None and payload.get('iat', 0) <= cutoff
+    
+    def clear(self):
+        """Forget all revocations"""
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+    
+    def _purge(self, now):
+        """Drop denylist entries for tokens that have expired on their own"""
+        expired = [jti for jti, exp in self._tokens.items() if exp < now]
+        for jti in expired:
+            del self._tokens[jti]
+        expired = [user_id for user_id, (_, expires) in self._users.items() if expires < now]
+        for user_id in expired:
+            del self._users[user_id]
+
+class DatabaseRevocations:
+    """Denylist of revoked tokens in the ``revoked_token`` table
+    
+    Same interface as ``TokenRevocationCache``, but shared by every process
+    using the database. Checking a token costs one primary-key query.
+    """
+    
+    def __init__(self, user_cutoff_ttl):
+        self.user_cutoff_ttl = user_cutoff_ttl
+    
+    def revoke_token(self, payload):
+        """Revoke a single token until its expiry"""
+        now = int(time.time())
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.session.merge(RevokedToken(key=f"jti:{payload['jti']}", revoked_at=now,
+                                      expires_at=payload['exp']))
+        db.session.commit()
+    
+    def revoke_user(self, user_id):
+        """Revoke every token issued to a user so far"""
+        now = time.time()
+        # No token issued before the cutoff outlives the longest token lifetime
+        db.session.merge(RevokedToken(key=f'user:{user_id}', revoked_at=now,
+                                      expires_at=int(now) + self.user_cutoff_ttl))
+        db.session.commit()
+    
+    def is_revoked(self, payload):
+        """Check a decoded payload against the denylist"""
+        token_key = f"jti:{payload.get('jti')}"
+        user_key = f"user:{payload.get('user_id')}"
+        rows = dict(db.session.execute(
+            select(RevokedToken.key, RevokedToken.revoked_at)
+            .where(RevokedToken.key.in_((token_key, user_key)))
+        ).all())
+        if token_key in rows:
+            return True
+        cutoff = rows.get(user_key)
+        return cutoff is not None and payload.get('iat', 0) <= cutoff
+    
+    def clear(self):
+        """Forget all revocations"""
+        db.session.execute(delete(RevokedToken))
+        db.session.commit()
+
+def init_app(app):
+    """Attach the token revocation store configured by TOKEN_REVOCATION_BACKEND"""
+    ttl = int(app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+    if app.config['TOKEN_REVOCATION_BACKEND'] == 'database':
+        app.extensions['token_revocations'] = DatabaseRevocations(ttl)
+    else:
+        app.extensions['token_revocations'] = TokenRevocationCache(ttl)
+    app.teardown_request(clear_auth_context)
+
+def get_revocations():
+    """Get the token revocation cache of the current app"""
+    return current_app.extensions['token_revocations']
 
 def generate_tokens(user_id):
-    """Generate access and refresh tokens for a user"""
+    """Generate access and refresh tokens for a user
+    
+    ``iat`` keeps sub-second precision, so a user revocation never catches
+    tokens issued later in the same second (e.g. to a new user who got a
+    deleted user's id).
+    """
+    issued_at = time.time()
     payload = {
         'user_id': user_id,
         'exp': datetime.datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
-        'iat': datetime.datetime.utcnow(),
+        'iat': issued_at,
+        'jti': uuid.uuid4().hex,
         'type': 'access'
     }
     
@@ -22,7 +143,8 @@ def generate_tokens(user_id):
     refresh_payload = {
         'user_id': user_id,
         'exp': datetime.datetime.utcnow() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES'],
-        'iat': datetime.datetime.utcnow(),
+        'iat': issued_at,
+        'jti': uuid.uuid4().hex,
         'type': 'refresh'
     }
     
@@ -35,21 +157,41 @@ def generate_tokens(user_id):
     return access_token, refresh_token
 
 def verify_token(token):
-    """Verify and decode a JWT token"""
+    """Verify and decode a JWT token, rejecting revoked tokens"""
     try:
         payload = jwt.decode(
             token, 
             current_app.config['JWT_SECRET_KEY'], 
             algorithms=['HS256']
         )
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    if get_revocations().is_revoked(payload):
+        return None
+    return payload
 
-def get_current_user():
-    """Get current user from token"""
+@warmup
+def warm_auth():
+    """Token verification and the per-request user lookup"""
+    verify_token(generate_tokens(0)[0])
+    db.session.get(User, 0)
+
+def get_current_payload():
+    """Get the verified access token payload for the current request
+    
+    The token is decoded at most once per request; the result (including a
+    missing or invalid token) is cached on ``flask.g``.
+    """
+    if '_auth_payload' not in g:
+        with timed('auth'):
+            g._auth_payload = _load_payload()
+    return g._auth_payload
+
+def _load_payload():
+    """Read and verify the bearer token from the Authorization header"""
     auth_header = request.headers.get('Authorization')
     if not auth_header:
         return None
@@ -62,16 +204,40 @@ def get_current_user():
     payload = verify_token(token)
     if not payload or payload.get('type') != 'access':
         return None
+    return payload
+
+def get_current_user():
+    """Get current user from token (loaded once per request)"""
+    if '_auth_user' not in g:
+        payload = get_current_payload()
+        with timed('auth'):
+            g._auth_user = User.query.get(payload['user_id']) if payload else None
+    return g._auth_user
+
+def get_current_user_id():
+    """Get the authenticated user's id
     
-    user = User.query.get(payload['user_id'])
-    return user
+    With ``JWT_CLAIMS_ONLY`` enabled the id comes straight from the verified
+    token claims and no User row is loaded.
+    """
+    payload = get_current_payload()
+    if not payload:
+        return None
+    if current_app.config.get('JWT_CLAIMS_ONLY'):
+        return payload['user_id']
+    user = get_current_user()
+    return user.id if user else None
+
+def clear_auth_context(exc=None):
+    """Drop the cached auth context at the end of a request"""
+    g.pop('_auth_payload', None)
+    g.pop('_auth_user', None)
 
 def login_required(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
+        if get_current_user_id() is None:
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -84,4 +250,34 @@ def get_user_from_token(f):
         if not user:
             return jsonify({'error': 'Authentication required'}), 401
         return f(user, *args, **kwargs)
-    return decorated_function 
\ No newline at end of file
+    return decorated_function 
+
+def get_user_id_from_token(f):
+    """Decorator to get the user id from token and pass it to function"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = get_current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Authentication required'}), 401
+        return f(user_id, *args, **kwargs)
+    return decorated_function
+
+def is_admin(user):
+    """Whether ``user`` has been granted admin rights (``flask set-admin``)
+    
+    Keyed on a column the API cannot write, rather than on anything a user
+    can change about their own or another account, such as the username.
+    """
+    return user is not None and user.is_admin
+
+def admin_required(f):
+    """Decorator to require an admin user"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'Authentication required'}), 401
+        if not is_admin(user):
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,197 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+from app.etags import not_modified
+
+class MemoryBackend:
+    """In-process LRU cache with a per-entry TTL
+    
+    Generation counters are kept apart from cached entries so that LRU
+    eviction can never reset them.
+    """
+    
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_counter(self, key):
+        return self._counters.get(key, 0)
+    
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+class RedisBackend:
+    """Cache backend for any client with the redis-py get/set/incr interface"""
+    
+    def __init__(self, client, prefix='taskapi:'):
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+    
+    def get_counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+    
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+class ResponseCache:
+    """Per-user cache of read responses with write-through invalidation
+    
+    Entries are keyed by user, a per-user generation number and the request
+    path and arguments. Bumping the generation invalidates every entry of a
+    user at once without having to find them.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app, backend=None):
+        """Configure the cache backend for an app"""
+        if backend is None:
+            backend = self._make_backend(app.config)
+        if backend is None:
+            app.extensions.pop('response_cache', None)
+            return
+        app.extensions['response_cache'] = {
+            'backend': backend,
+            'ttl': app.config['RESPONSE_CACHE_TTL'],
+            'stats': {'hits': 0, 'misses': 0, 'invalidations': 0},
+            'lock': threading.Lock(),
+        }
+    
+    def cached(self, f):
+        """Decorator serving a per-user view from the cache
+    
+        The view must take the authenticated user id as its first argument.
+        Only 200 responses are stored.
+        """
+        @wraps(f)
+        def decorated_function(user_id, *args, **kwargs):
+            key = self.key(user_id)
+            response = self.lookup(key)
+            if response is not None:
+                return response
+            return self.store(key, f(user_id, *args, **kwargs))
+        return decorated_function
+    
+    def key(self, user_id):
+        """Cache key of the current request, or None if caching is off
+    
+        The key pins the user's generation as it is before the view runs, so
+        a response computed while a write invalidates the user is stored
+        under the old generation and never served.
+        """
+        state = self._state()
+        if state is None:
+            return None
+        generation = state['backend'].get_counter(f'gen:{user_id}')
+        args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'resp:{user_id}:{generation}:{request.path}?{args}'
+    
+    def lookup(self, key):
+        """Cached response for ``key``, or None on a miss
+    
+        A hit whose ETag matches If-None-Match is answered with 304.
+        """
+        state = self._state()
+        if state is None or key is None:
+            return None
+        
+        entry = state['backend'].get(key)
+        if entry is None:
+            self._count(state, 'misses')
+            return None
+        
+        self._count(state, 'hits')
+        status, headers, body = entry
+        response = current_app.response_class(body, status=status, headers=headers)
+        response.headers['X-Cache'] = 'HIT'
+        etag, _ = response.get_etag()
+        if etag and not_modified(etag) is not None:
+            return not_modified(etag)
+        return response
+    
+    def store(self, key, rv):
+        """Turn a view's return value into a response, caching it under ``key`` if it is a 200"""
+        state = self._state()
+        if state is None or key is None:
+            return rv
+        
+        response = current_app.make_response(rv)
+        if response.status_code == 200 and not response.is_streamed:
+            headers = [(k, v) for k, v in response.headers.items() if k != 'Content-Length']
+            state['backend'].set(key, [200, headers, response.get_data(as_text=True)], state['ttl'])
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    
+    def invalidate_user(self, user_id):
+        """Drop every cached response of a user"""
+        state = self._state()
+        if state is None:
+            return
+        state['backend'].incr(f'gen:{user_id}')
+        self._count(state, 'invalidations')
+    
+    def stats(self):
+        """Hit, miss and invalidation counters of the current app"""
+        state = self._state()
+        if state is None:
+            return {'enabled': False}
+        with state['lock']:
+            stats = dict(state['stats'])
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['enabled'] = True
+        return stats
+    
+    def _state(self):
+        return current_app.extensions.get('response_cache')
+    
+    def _count(self, state, name):
+        with state['lock']:
+            state['stats'][name] += 1
+    
+    @staticmethod
+    def _make_backend(config):
+        backend = config['RESPONSE_CACHE_BACKEND']
+        if backend == 'memory':
+            return MemoryBackend(config['RESPONSE_CACHE_MAX_ENTRIES'])
+        if backend == 'redis':
+            import redis  # optional dependency
+            return RedisBackend(redis.Redis.from_url(config['RESPONSE_CACHE_REDIS_URL']))
+        return None
+
+response_cache = ResponseCache()
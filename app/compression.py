@@ -0,0 +1,247 @@
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+from app.etags import encoded_etag
+from app.metrics import Counter, Histogram
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+CPU_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+class GzipStream:
+    """Incremental gzip; ``flush`` ends a deflate block so clients can decode what was sent"""
+    
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data):
+        return self._compressor.compress(data)
+    
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self):
+        return self._compressor.flush()
+
+class BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+    
+    def compress(self, data):
+        return self._compressor.process(data)
+    
+    def flush(self):
+        return self._compressor.flush()
+    
+    def finish(self):
+        return self._compressor.finish()
+
+class ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, data):
+        return self._compressor.compress(data)
+    
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    
+    def finish(self):
+        return self._compressor.flush()
+
+def _gzip(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+# Content codings by name: (compress whole body, streaming compressor class);
+# brotli and zstd are only offered when their packages are installed
+CODECS = {'gzip': (_gzip, GzipStream)}
+if brotli is not None:  # pragma: no cover - optional codec
+    CODECS['br'] = (lambda data, level: brotli.compress(data, quality=level), BrotliStream)
+if zstandard is not None:  # pragma: no cover - optional codec
+    CODECS['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+                      ZstdStream)
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by ``(encoding, etag)``, bounded in bytes
+    
+    The uncompressed length is stored alongside each body and checked on
+    lookup, as a guard against an ETag reused for a different body.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, length):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != length:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, length, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[key] = (length, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+class Compression:
+    """Content-Encoding negotiated from Accept-Encoding for text responses
+    
+    The best codec the client accepts is picked, with ties going to the
+    order of ``COMPRESSION_ALGORITHMS``. Bodies shorter than
+    ``COMPRESSION_MIN_SIZE`` are sent as they are. Streamed responses are
+    compressed chunk by chunk, flushing after each chunk. Compressed bodies
+    of responses with a strong ETag are cached, so a repeated response is
+    compressed once. The CPU time of each compression is recorded in
+    ``http_response_compression_cpu_seconds``.
+    
+    A compressed body's strong ETag gets the encoding appended (see
+    ``app.etags.encoded_etag``), so caches never take one encoding for
+    another. Conditional requests match either form.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register response compression for an app (after the metrics)"""
+        config = app.config
+        if not config['COMPRESSION_ENABLED']:
+            app.extensions.pop('compression', None)
+            return
+        algorithms = [name for name in config['COMPRESSION_ALGORITHMS'] if name in CODECS]
+        if not algorithms:
+            app.extensions.pop('compression', None)
+            return
+    
+        app.extensions['compression'] = {
+            'algorithms': algorithms,
+            'levels': config['COMPRESSION_LEVELS'],
+            'min_size': config['COMPRESSION_MIN_SIZE'],
+            'mimetypes': frozenset(config['COMPRESSION_MIMETYPES']),
+            'cache': (CompressedCache(config['COMPRESSION_CACHE_MAX_BYTES'])
+                      if config['COMPRESSION_CACHE_MAX_BYTES'] else None),
+        }
+        registry = app.extensions.get('metrics')
+        if registry is not None:
+            registry['compression_cpu'] = Histogram(
+                'http_response_compression_cpu_seconds', 'CPU time spent compressing a response body',
+                ('route', 'method', 'encoding'), CPU_BUCKETS)
+            registry['compression_bytes'] = Counter(
+                'http_response_compression_bytes_total',
+                'Response body bytes before (original) and after (compressed) compression',
+                ('encoding', 'size'))
+            registry['compression_cache'] = Counter(
+                'http_response_compression_cache_total', 'Compressed body cache lookups', ('result',))
+        app.after_request(self._after_request)
+    
+    def _after_request(self, response):
+        state = current_app.extensions['compression']
+        if response.status_code == 304:
+            # A 304 carries no body (nor its mimetype) but must repeat the
+            # Vary of the 200 it revalidates, or caches mix up encodings
+            response.vary.add('Accept-Encoding')
+            return response
+        if (response.mimetype not in state['mimetypes'] or response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 206)):
+            return response
+        response.vary.add('Accept-Encoding')
+        if ('Content-Encoding' in response.headers or request.method == 'HEAD'
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+    
+        encoding = request.accept_encodings.best_match(state['algorithms'])
+        if encoding is None:
+            return response
+        level = state['levels'][encoding]
+        registry = current_app.extensions.get('metrics')
+        route = (request.url_rule.rule if request.url_rule else 'unmatched', request.method)
+    
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding, level, registry, route)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < state['min_size']:
+                return response
+            response.set_data(self._compress(state, response, data, encoding, level, registry, route))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+    
+    @staticmethod
+    def _compress(state, response, data, encoding, level, registry, route):
+        etag, weak = response.get_etag()
+        cache = state['cache'] if etag and not weak else None
+        if cache is not None:
+            body = cache.get((encoding, etag), len(data))
+            if registry is not None:
+                registry['compression_cache'].inc(('hit' if body is not None else 'miss',))
+            if body is not None:
+                return body
+    
+        start = time.thread_time()
+        body = CODECS[encoding][0](data, level)
+        if registry is not None:
+            registry['compression_cpu'].observe(route + (encoding,), time.thread_time() - start)
+            registry['compression_bytes'].inc((encoding, 'original'), len(data))
+            registry['compression_bytes'].inc((encoding, 'compressed'), len(body))
+        if cache is not None:
+            cache.set((encoding, etag), len(data), body)
+        return body
+    
+    @staticmethod
+    def _stream(chunks, encoding, level, registry, route):
+        """Compress an iterable of chunks as it is consumed"""
+        compressor = CODECS[encoding][1](level)
+        cpu = 0.0
+        original = compressed = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                start = time.thread_time()
+                out = compressor.compress(chunk) + compressor.flush()
+                cpu += time.thread_time() - start
+                original += len(chunk)
+                compressed += len(out)
+                yield out
+            start = time.thread_time()
+            out = compressor.finish()
+            cpu += time.thread_time() - start
+            compressed += len(out)
+            yield out
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            if registry is not None:
+                registry['compression_cpu'].observe(route + (encoding,), cpu)
+                registry['compression_bytes'].inc((encoding, 'original'), original)
+                registry['compression_bytes'].inc((encoding, 'compressed'), compressed)
+
+compression = Compression()
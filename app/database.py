@@ -0,0 +1,86 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app import db
+
+def is_sqlite(uri):
+    """Whether a database URI points at SQLite"""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def is_sqlite_memory(uri):
+    """Whether a database URI is an in-memory SQLite database"""
+    url = make_url(uri)
+    return (url.get_backend_name() == 'sqlite'
+            and (url.database in (None, '', ':memory:') or 'mode=memory' in str(url)))
+
+# Async drivers used by the ASGI serving mode, by backend
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+def async_url(uri):
+    """The async-driver equivalent of a database URI"""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver known for {backend}')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+def engine_options(config):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the engine settings in a Config
+    
+    Pool sizing only applies to pooled engines; in-memory SQLite runs on a
+    single static connection. Explicit SQLALCHEMY_ENGINE_OPTIONS win.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = {'query_cache_size': config['SQLALCHEMY_QUERY_CACHE_SIZE']}
+    
+    if is_sqlite(uri):
+        options['connect_args'] = {'cached_statements': config['SQLITE_CACHED_STATEMENTS']}
+    if not is_sqlite_memory(uri):
+        options.update(
+            pool_size=config['SQLALCHEMY_POOL_SIZE'],
+            max_overflow=config['SQLALCHEMY_MAX_OVERFLOW'],
+            pool_pre_ping=config['SQLALCHEMY_POOL_PRE_PING'],
+            pool_recycle=config['SQLALCHEMY_POOL_RECYCLE'],
+        )
+    
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+def sqlite_pragmas(config, memory):
+    """PRAGMA statements applied to every new SQLite connection"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+    ]
+    if not memory:
+        pragmas += [
+            f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}",
+            f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+            f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        ]
+    return pragmas
+
+def configure_sqlite(engine, config, memory):
+    """Apply the configured pragmas to every new SQLite connection"""
+    pragmas = sqlite_pragmas(config, memory)
+    
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def init_app(app):
+    """Derive engine options from the config; call before db.init_app"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+def configure_engines(app):
+    """Install SQLite connection hooks; call after db.init_app"""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            configure_sqlite(engine, app.config, is_sqlite_memory(str(engine.url)))
@@ -0,0 +1,69 @@
+import hashlib
+from flask import current_app, request
+
+def _stamp(value):
+    """Render a version stamp (datetime or scalar) for an ETag"""
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def resource_etag(kind, id, updated_at):
+    """Strong ETag of a single row, built from its id and updated_at"""
+    return f'{kind}-{id}-{_stamp(updated_at)}'
+
+def collection_etag(kind, rows, *variant):
+    """Strong ETag of a list, built from each row's id and updated_at
+
+    ``variant`` covers anything else that shapes the body, such as the field
+    projection or the next-page cursor.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in variant:
+        digest.update(f'{part}\0'.encode())
+    for row in rows:
+        digest.update(f'{row.id}:{_stamp(row.updated_at)}\0'.encode())
+    return f'{kind}-{digest.hexdigest()}'
+
+# Separates a strong ETag from the content-coding of a compressed body; no
+# ETag built here contains it
+ENCODING_SEPARATOR = ';'
+
+def encoded_etag(etag, encoding):
+    """Strong ETag of a body compressed with ``encoding``
+    
+    Strong validators must differ between content-codings of the same data
+    (RFC 9110, section 8.8.1).
+    """
+    return f'{etag}{ENCODING_SEPARATOR}{encoding}'
+
+def _matching_tag(etags, etag, include_weak):
+    """The tag in an If-(None-)Match header naming ``etag`` in any encoding, or None"""
+    if etags.star_tag:
+        return etag
+    for tag in etags.as_set(include_weak):
+        if tag == etag or tag.rpartition(ENCODING_SEPARATOR)[0] == etag:
+            return tag
+    return None
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds ``etag``, else None
+    
+    The 304 repeats the tag the client sent, which names the encoding of the
+    body it holds.
+    """
+    if not request.if_none_match:
+        return None
+    tag = _matching_tag(request.if_none_match, etag, include_weak=True)
+    if tag is None:
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(tag)
+    return response
+
+def precondition_failed(etag):
+    """Whether an If-Match header is present and does not match ``etag``"""
+    return (bool(request.if_match)
+            and _matching_tag(request.if_match, etag, include_weak=False) is None)
+
+def with_etag(response, etag):
+    """Attach a strong ETag to a response"""
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,165 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+from flask import current_app
+
+class Subscription:
+    """Bounded queue of events for one connected stream
+    
+    A subscriber that falls ``maxsize`` events behind is marked as
+    overflowed and receives nothing more; its stream tells the client to
+    resync instead of buffering without limit.
+    """
+    
+    def __init__(self, user_id, maxsize, on_close):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+        self._on_close = on_close
+    
+    def put(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+    
+    def get(self, timeout):
+        """Next message, or None if none arrived within ``timeout`` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def close(self):
+        """Stop receiving events"""
+        self._on_close(self)
+
+class MemoryBroker:
+    """Delivers published messages straight to this process's subscribers"""
+    
+    def __init__(self):
+        self._deliver = None
+    
+    def start(self, deliver):
+        self._deliver = deliver
+    
+    def publish(self, message):
+        if self._deliver is not None:
+            self._deliver(message)
+
+class RedisBroker:
+    """Shares messages between worker processes over a pub/sub channel
+    
+    Works with any client with the redis-py ``publish``/``pubsub`` interface.
+    Every process, including the publisher, receives messages from the
+    channel on a background thread started with the first subscriber.
+    """
+    
+    def __init__(self, client, channel='taskapi:events'):
+        self.client = client
+        self.channel = channel
+    
+    def start(self, deliver):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        threading.Thread(target=self._listen, args=(pubsub, deliver), daemon=True).start()
+    
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message))
+    
+    @staticmethod
+    def _listen(pubsub, deliver):
+        for item in pubsub.listen():
+            if item['type'] == 'message':
+                deliver(json.loads(item['data']))
+
+class EventBus:
+    """Per-user pub/sub of task change events
+    
+    Write handlers publish after committing; every open stream of the user
+    gets the event through the broker, possibly from another worker.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app, broker=None):
+        """Configure the broker for an app"""
+        if broker is None:
+            broker = self._make_broker(app.config)
+        if broker is None:
+            app.extensions.pop('event_bus', None)
+            return
+        app.extensions['event_bus'] = {
+            'broker': broker,
+            'subscribers': defaultdict(set),
+            'queue_size': app.config['EVENTS_QUEUE_SIZE'],
+            'lock': threading.Lock(),
+            'started': False,
+        }
+    
+    @property
+    def enabled(self):
+        return self._state() is not None
+    
+    def publish(self, user_id, event, data):
+        """Send an event to every stream of ``user_id``"""
+        state = self._state()
+        if state is not None:
+            state['broker'].publish({'user_id': user_id, 'event': event, 'data': data})
+    
+    def subscribe(self, user_id):
+        """Register a new stream of ``user_id``; close it when done"""
+        state = self._state()
+        subscription = Subscription(
+            user_id, state['queue_size'], lambda sub: self._remove(state, sub)
+        )
+        with state['lock']:
+            if not state['started']:
+                state['broker'].start(lambda message: self._dispatch(state, message))
+                state['started'] = True
+            state['subscribers'][user_id].add(subscription)
+        return subscription
+    
+    def subscriber_count(self):
+        """Streams currently open in this process"""
+        state = self._state()
+        if state is None:
+            return 0
+        with state['lock']:
+            return sum(len(streams) for streams in state['subscribers'].values())
+    
+    def _state(self):
+        return current_app.extensions.get('event_bus')
+    
+    @staticmethod
+    def _remove(state, subscription):
+        with state['lock']:
+            streams = state['subscribers'].get(subscription.user_id)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del state['subscribers'][subscription.user_id]
+    
+    @staticmethod
+    def _dispatch(state, message):
+        with state['lock']:
+            streams = list(state['subscribers'].get(message['user_id'], ()))
+        for subscription in streams:
+            subscription.put(message)
+    
+    @staticmethod
+    def _make_broker(config):
+        broker = config['EVENTS_BROKER']
+        if broker == 'memory':
+            return MemoryBroker()
+        if broker == 'redis':
+            import redis  # optional dependency
+            return RedisBroker(redis.Redis.from_url(config['EVENTS_REDIS_URL']))
+        return None
+
+event_bus = EventBus()
@@ -0,0 +1,191 @@
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from app import db
+from app.cache import response_cache
+
+slow_query_logger = logging.getLogger('app.slow_query')
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+    
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {k: ([*v[0]], v[1], v[2]) for k, v in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{{{labels + "," if labels else ""}{le}}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+    
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, label_values=(), value=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + value
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = dict(self._series)
+        for label_values, value in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            lines.append(f'{self.name}{{{labels}}} {value}' if labels else f'{self.name} {value}')
+        return lines
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values):
+    """Render Prometheus label pairs"""
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+class Metrics:
+    """Per-request SQL and timing instrumentation
+
+    Each request records its route, SQL query count and total DB time, plus
+    any phases timed with ``timed()`` (auth, serialization). Totals are folded
+    into histograms at the end of the request; rendering them is the only
+    work done outside the request path. Queries slower than
+    ``SLOW_QUERY_THRESHOLD_MS`` are logged with their parameters.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register request hooks and SQL listeners for an app"""
+        if not app.config['METRICS_ENABLED']:
+            return
+        route = ('route', 'method')
+        app.extensions['metrics'] = {
+            'requests': Counter('http_requests_total', 'HTTP requests by route and status',
+                                ('route', 'method', 'status')),
+            'duration': Histogram('http_request_duration_seconds', 'Request handling time',
+                                  route, TIME_BUCKETS),
+            'queries': Histogram('http_request_db_queries', 'SQL queries per request',
+                                 route, COUNT_BUCKETS),
+            'db': Histogram('http_request_db_seconds', 'Time spent in SQL per request',
+                            route, TIME_BUCKETS),
+            'phases': Histogram('http_request_phase_seconds',
+                                'Time per request phase (auth, serialization, ...)',
+                                route + ('phase',), TIME_BUCKETS),
+            'slow_queries': Counter('db_slow_queries_total',
+                                    'SQL queries slower than the slow query threshold'),
+        }
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        
+        threshold = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+        slow_queries = app.extensions['metrics']['slow_queries']
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+        
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['query_start'].pop()
+            if has_request_context():
+                state = g.get('_metrics')
+                if state is not None:
+                    state['queries'] += 1
+                    state['db'] += elapsed
+            if elapsed >= threshold:
+                slow_queries.inc()
+                slow_query_logger.warning('Slow query (%.1f ms): %s; parameters=%r',
+                                          elapsed * 1000, statement, parameters)
+        
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    
+    def render(self):
+        """All metrics of the current app in Prometheus text format"""
+        registry = current_app.extensions.get('metrics', {})
+        lines = []
+        for metric in registry.values():
+            lines.extend(metric.render())
+        
+        cache = response_cache.stats()
+        if cache['enabled']:
+            for name in ('hits', 'misses', 'invalidations'):
+                lines.append(f'# TYPE response_cache_{name}_total counter')
+                lines.append(f'response_cache_{name}_total {cache[name]}')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _before_request():
+        g._metrics = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'phases': {}}
+    
+    @staticmethod
+    def _after_request(response):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return response
+        registry = current_app.extensions['metrics']
+        route = (request.url_rule.rule if request.url_rule else 'unmatched', request.method)
+        registry['requests'].inc(route + (response.status_code,))
+        registry['duration'].observe(route, time.perf_counter() - state['start'])
+        registry['queries'].observe(route, state['queries'])
+        registry['db'].observe(route, state['db'])
+        for phase, elapsed in state['phases'].items():
+            registry['phases'].observe(route + (phase,), elapsed)
+        return response
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in a block to the current request's phase timings"""
+    state = g.get('_metrics') if has_request_context() else None
+    if state is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = state['phases']
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+metrics = Metrics()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import hasher
 
 class User(db.Model):
     """User model"""
@@ -8,6 +8,8 @@ class User(db.Model):
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
+    # Granted with `flask set-admin`; not exposed through the API
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -16,11 +18,15 @@ class User(db.Model):
     
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
         """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the configured algorithm or cost"""
+        return hasher.needs_rehash(self.password_hash)
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -35,9 +41,110 @@ class Task(db.Model):
     due_date = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Position in the owner's change sequence, bumped on every write (see app.sync)
+    sync_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Foreign keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    # Task queries are scoped to one user, so these indexes lead with user_id;
+    # updated_at alone serves incremental exports over all users
+    __table_args__ = (
+        db.Index('ix_task_user_status_priority', 'user_id', 'status', 'priority'),
+        db.Index('ix_task_user_due_date', 'user_id', 'due_date'),
+        db.Index('ix_task_user_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_task_updated_at', 'updated_at'),
+        db.Index('ix_task_user_sync_seq_id', 'user_id', 'sync_seq', 'id'),
+        db.Index('ix_task_status_due_date', 'status', 'due_date'),
+    )
+    
+    def __repr__(self):
+        return f'<Task {self.title}>'
+
+class RevokedToken(db.Model):
+    """Revoked token (``jti:<jti>``) or per-user cutoff (``user:<id>``)
+
+    Used by the database token revocation backend (see app.auth), so that
+    every worker process sees the same revocations. ``revoked_at`` is the
+    cutoff in (fractional) Unix seconds; rows past ``expires_at`` can be
+    pruned.
+    """
+    __tablename__ = 'revoked_token'
+    
+    key = db.Column(db.String(64), primary_key=True)
+    revoked_at = db.Column(db.Float, nullable=False)
+    expires_at = db.Column(db.Integer, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.key}>'
+
+class TaskStats(db.Model):
+    """Task counters per user, maintained incrementally on every task write
+
+    Rows with a negative ``user_id`` hold shards of the totals over all
+    users (see app.stats).
+    """
+    __tablename__ = 'task_stats'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    in_progress = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    low = db.Column(db.Integer, nullable=False, default=0)
+    medium = db.Column(db.Integer, nullable=False, default=0)
+    high = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TaskStats {self.user_id}>'
+
+class SyncSequence(db.Model):
+    """Per-user counter ordering task changes for delta sync
+
+    ``last_seq`` is the latest sequence number handed out; ``purged_seq`` is
+    the newest tombstone already pruned, so older sync tokens are stale.
+    """
+    __tablename__ = 'sync_sequence'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    purged_seq = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<SyncSequence {self.user_id}>'
+
+class TaskTombstone(db.Model):
+    """Record of a deleted task, kept so delta sync can report the deletion"""
+    __tablename__ = 'task_tombstone'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    task_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_task_tombstone_deleted_at', 'deleted_at'),
+    )
+    
+    def __repr__(self):
+        return f'<TaskTombstone {self.task_id}>'
+
+class SearchTerm(db.Model):
+    """Posting of the built-in inverted index: one term of one task
+
+    Used for search when FTS5 is not available (see app.search). The
+    primary key serves exact and prefix lookups of a user's terms.
+    """
+    __tablename__ = 'task_search_term'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    term = db.Column(db.String(64), primary_key=True)
+    task_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    weight = db.Column(db.Integer, nullable=False, default=1)
+    
+    __table_args__ = (
+        db.Index('ix_task_search_term_task_id', 'task_id'),
+    )
+    
     def __repr__(self):
-        return f'<Task {self.title}>' 
\ No newline at end of file
+        return f'<SearchTerm {self.term}>'
@@ -0,0 +1,64 @@
+import json
+import base64
+from datetime import datetime
+from flask import request, url_for
+
+def encode_cursor(*values):
+    """Encode keyset values into an opaque, URL-safe cursor"""
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, *types):
+    """Decode a cursor produced by encode_cursor, raising ValueError if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError('Invalid cursor')
+    try:
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def get_limit(default, maximum):
+    """Read the ``limit`` query parameter, raising ValueError if invalid"""
+    limit = request.args.get('limit')
+    if limit is None:
+        return default
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= maximum:
+        raise ValueError(f'limit must be between 1 and {maximum}')
+    return limit
+
+def get_fields(allowed):
+    """Read the ``fields`` projection, raising ValueError on unknown fields"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [f for f in requested if f not in allowed]
+    if unknown or not requested:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def add_next_link(response, cursor):
+    """Attach the next-page cursor to a list response (RFC 8288 Link header)"""
+    if cursor is None:
+        return response
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    url = url_for(request.endpoint, _external=True, **request.view_args, **args)
+    response.headers['Link'] = f'<{url}>; rel="next"'
+    response.headers['X-Next-Cursor'] = cursor
+    return response
@@ -0,0 +1,111 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Werkzeug's default cost for each supported algorithm
+DEFAULT_COSTS = {
+    'scrypt': 32768,   # N
+    'pbkdf2': 600000,  # iterations
+}
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool has no capacity left for a request"""
+
+def hash_method(algorithm, cost=None):
+    """Build the werkzeug method string for an algorithm and cost"""
+    if algorithm not in DEFAULT_COSTS:
+        raise ValueError(f'Unsupported password hash algorithm: {algorithm}')
+    cost = cost or DEFAULT_COSTS[algorithm]
+    if algorithm == 'scrypt':
+        return f'scrypt:{cost}:8:1'
+    return f'pbkdf2:sha256:{cost}'
+
+class PasswordHasher:
+    """Password hashing service backed by a bounded process pool
+
+    KDF work runs in worker processes so request threads only wait on a
+    future instead of holding the CPU (and the GIL) for the whole hash. At
+    most ``PASSWORD_HASH_MAX_PENDING`` hashes may be queued or running;
+    beyond that callers wait up to ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds and
+    then get PasswordHashingBusy. With ``PASSWORD_HASH_WORKERS = 0`` hashing
+    runs inline.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register the hashing state for an app"""
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        app.extensions['password_hasher'] = {
+            'method': hash_method(app.config['PASSWORD_HASH_ALGORITHM'],
+                                  app.config['PASSWORD_HASH_COST']),
+            'workers': workers,
+            'slots': threading.BoundedSemaphore(
+                app.config['PASSWORD_HASH_MAX_PENDING'] or max(workers, 1) * 4
+            ),
+            'timeout': app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+            'pool': None,
+            'lock': threading.Lock(),
+        }
+    
+    def hash(self, password):
+        """Hash a password with the configured algorithm and cost"""
+        state = self._state()
+        if state is None:
+            return generate_password_hash(password)
+        return self._run(state, generate_password_hash, password, state['method'])
+    
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash"""
+        if not pwhash:
+            return False
+        state = self._state()
+        if state is None:
+            return check_password_hash(pwhash, password)
+        return self._run(state, check_password_hash, pwhash, password)
+    
+    def needs_rehash(self, pwhash):
+        """Whether a stored hash uses a different algorithm or cost than configured"""
+        state = self._state()
+        if state is None or not pwhash:
+            return False
+        return pwhash.split('$', 1)[0] != state['method']
+    
+    def shutdown(self):
+        """Stop the worker pool of the current app, if one was started"""
+        state = self._state()
+        if state and state['pool'] is not None:
+            state['pool'].shutdown()
+            state['pool'] = None
+    
+    def _state(self):
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('password_hasher')
+    
+    def _run(self, state, func, *args):
+        if not state['workers']:
+            return func(*args)
+        if not state['slots'].acquire(timeout=state['timeout']):
+            raise PasswordHashingBusy()
+        try:
+            return self._pool(state).submit(func, *args).result()
+        finally:
+            state['slots'].release()
+    
+    def _pool(self, state):
+        # Started lazily so forking servers do not inherit a running pool
+        if state['pool'] is None:
+            with state['lock']:
+                if state['pool'] is None:
+                    state['pool'] = ProcessPoolExecutor(
+                        max_workers=state['workers'],
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return state['pool']
+
+hasher = PasswordHasher()
@@ -0,0 +1,286 @@
+import gc
+import os
+import sys
+import time
+import errno
+import random
+import signal
+import socket
+import logging
+import threading
+import subprocess
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+from app import db
+
+logger = logging.getLogger('app.prefork')
+
+# Set by a master that re-executes itself to reload: the listening socket and
+# the workers of the previous generation, which drain once the new ones boot
+LISTEN_FD_ENV = 'PREFORK_LISTEN_FD'
+RETIRING_ENV = 'PREFORK_RETIRING_WORKERS'
+# Set for the interpreter that checks that the app still loads before a reload
+CHECK_ENV = 'PREFORK_CHECK'
+
+def parse_bind(bind):
+    """Turn ``'host:port'`` (or ``':port'``) into ``(host, port)``"""
+    host, _, port = bind.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f'Invalid bind address: {bind!r}')
+    return host.strip('[]') or '0.0.0.0', int(port)
+
+def process_local_state(config):
+    """Settings under which each worker process would keep its own state
+    
+    With several workers, a per-process response cache serves stale
+    responses after a write on another worker, revocations made on one
+    worker are not seen by the others, event streams miss other workers'
+    events and every worker enforces the full rate limit. Every worker
+    would also run its own deadline scheduler thread and publish its own
+    copy of each overdue event, and ``/api/metrics`` would report the
+    counters of whichever worker answered, which look like resets.
+    """
+    local = []
+    for key in ('RESPONSE_CACHE_BACKEND', 'TOKEN_REVOCATION_BACKEND', 'EVENTS_BROKER'):
+        if config[key] == 'memory':
+            local.append(f'{key}=memory')
+    if config['RATELIMIT_ENABLED'] and config['RATELIMIT_STORAGE'] == 'memory':
+        local.append('RATELIMIT_STORAGE=memory')
+    if config['SCHEDULER_ENABLED'] and config['SCHEDULER_THREAD']:
+        local.append('SCHEDULER_THREAD=True')
+    if config['METRICS_ENABLED']:
+        local.append('METRICS_ENABLED=True')
+    return local
+
+class Worker:
+    """One forked process serving requests from the shared listening socket
+    
+    Requests run on werkzeug's threaded server (bounded by admission control).
+    After ``max_requests`` requests, or on SIGTERM/SIGINT, the worker stops
+    accepting, waits up to ``graceful_timeout`` seconds for requests in
+    flight and exits; the master starts a replacement.
+    """
+    
+    def __init__(self, app, sock, max_requests, graceful_timeout):
+        self.app = app
+        self.socket = sock
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.requests = 0
+        self._active = 0
+        self._idle = threading.Condition()
+        self._server = None
+        self._stopping = False
+    
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self.stop())
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        gc.enable()
+        # Never reuse connections inherited from the master
+        with self.app.app_context():
+            db.engine.dispose(close=False)
+    
+        host, port = self.socket.getsockname()[:2]
+        self._server = make_server(host, port, self.handle, threaded=True, fd=self.socket.fileno())
+        if not self._stopping:
+            self._server.serve_forever()
+        with self._idle:
+            self._idle.wait_for(lambda: not self._active, self.graceful_timeout)
+        self._server.server_close()
+    
+    def handle(self, environ, start_response):
+        """WSGI entry point counting requests in flight and towards recycling"""
+        with self._idle:
+            self._active += 1
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self.stop()
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._finished)
+        except BaseException:
+            self._finished()
+            raise
+    
+    def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        if self._server is not None:
+            # shutdown() waits for serve_forever, which runs on the main thread
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+    
+    def _finished(self):
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+class PreforkServer:
+    """Pre-fork master: loads the app once and forks ``workers`` processes
+    
+    The app (and its warm-up) is loaded before forking, then the database
+    pool is closed and ``gc.freeze()`` moves every object into the permanent
+    generation, so the collector never writes to the shared pages and they
+    stay shared copy-on-write. Workers that exit are replaced.
+    
+    Signals: SIGTERM/SIGINT stop gracefully. SIGHUP reloads: the master
+    checks that the app still loads in a fresh interpreter, re-executes
+    itself with the listening socket, forks new workers from the new code
+    and then lets the old ones drain.
+    
+    Several workers need the state listed by ``process_local_state`` to be
+    shared: without ``workers`` a single worker is started while any of it
+    is in process memory, and asking for more raises ``ValueError``.
+    """
+    
+    def __init__(self, app, bind='0.0.0.0:5001', workers=None, max_requests=0,
+                 max_requests_jitter=0, graceful_timeout=30):
+        local = process_local_state(app.config)
+        if workers is None and local:
+            logger.warning('Starting a single worker: %s keep state per process', ', '.join(local))
+            workers = 1
+        elif workers and workers > 1 and local:
+            raise ValueError(f"{workers} workers need shared state, but {', '.join(local)}; "
+                             'use redis, database or none backends, run-scheduler instead of '
+                             'the scheduler thread and no metrics, or one worker')
+        self.app = app
+        self.address = parse_bind(bind)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.socket = None
+        self._children = {}   # pid -> start time of the current workers
+        self._retiring = set()
+        self._signals = []
+    
+    def run(self):
+        """Serve until stopped; returns the exit status"""
+        if os.environ.get(CHECK_ENV):
+            return 0  # the app loaded, which is all a reload check needs
+        self.socket = self._listen()
+        logger.info('Listening on %s:%s with %d workers (pid %d)',
+                    *self.socket.getsockname()[:2], self.workers, os.getpid())
+    
+        with self.app.app_context():
+            db.engine.dispose()
+        gc.collect()
+        gc.freeze()
+    
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, lambda signum, _: self._signals.append(signum))
+        for _ in range(self.workers):
+            self._spawn()
+        self._retire(self._retiring)
+    
+        while True:
+            self._reap()
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    return self._stop()
+                if signum == signal.SIGHUP:
+                    self._reload()
+            while len(self._children) < self.workers:
+                self._spawn()
+            time.sleep(0.1)
+    
+    def _listen(self):
+        fd = os.environ.pop(LISTEN_FD_ENV, None)
+        retiring = os.environ.pop(RETIRING_ENV, '')
+        self._retiring = {int(pid) for pid in retiring.split(',') if pid}
+        if fd is not None:
+            return socket.socket(fileno=int(fd))
+        family = socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self.address)
+        sock.listen(2048)
+        # Idle workers all wake on a new connection; the ones that lose the
+        # race must get EAGAIN instead of blocking in accept()
+        sock.setblocking(False)
+        return sock
+    
+    def _spawn(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            # Spread recycling so the workers do not all restart at once
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            logger.info('Booted worker %d', pid)
+            return
+        status = 0
+        try:
+            Worker(self.app, self.socket, max_requests, self.graceful_timeout).run()
+        except BaseException:
+            logger.exception('Worker %d failed', os.getpid())
+            status = 1
+        finally:
+            logging.shutdown()
+            os._exit(status)
+    
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            self._retiring.discard(pid)
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code:
+                logger.warning('Worker %d exited with status %d', pid, code)
+                if time.monotonic() - started < 1:
+                    time.sleep(1)  # do not spin on a worker that cannot boot
+            else:
+                logger.info('Worker %d exited', pid)
+    
+    def _retire(self, pids):
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self._retiring.discard(pid)
+    
+    def _stop(self):
+        logger.info('Shutting down')
+        pids = set(self._children) | self._retiring
+        self._retire(pids)
+        deadline = time.monotonic() + self.graceful_timeout
+        while (self._children or self._retiring) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in set(self._children) | self._retiring:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._reap()
+        self.socket.close()
+        return 0
+    
+    def _reload(self):
+        logger.info('Reloading')
+        check = subprocess.run([sys.executable, *sys.orig_argv[1:]],
+                               env={**os.environ, CHECK_ENV: '1'})
+        if check.returncode:
+            logger.error('Not reloading: the app failed to load (status %d)', check.returncode)
+            return
+        os.set_inheritable(self.socket.fileno(), True)
+        os.environ[LISTEN_FD_ENV] = str(self.socket.fileno())
+        os.environ[RETIRING_ENV] = ','.join(map(str, set(self._children) | self._retiring))
+        logging.shutdown()
+        try:
+            os.execv(sys.executable, sys.orig_argv)
+        except OSError as err:
+            # The old workers keep serving under this master
+            logger.error('Reload failed: %s', os.strerror(err.errno or errno.EIO))
+            os.environ.pop(LISTEN_FD_ENV)
+            os.environ.pop(RETIRING_ENV)
@@ -0,0 +1,180 @@
+import math
+import time
+import threading
+from flask import current_app, g, jsonify, request
+from app.auth import get_current_payload
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_limit(limit):
+    """Turn ``'<count>/<period>'`` into ``(interval, burst)``
+    
+    A bucket holds ``count`` tokens and regains one every ``interval``
+    seconds, so up to ``count`` requests may arrive at once.
+    """
+    count, _, period = limit.partition('/')
+    if period not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f'Invalid rate limit: {limit!r}')
+    return PERIODS[period] / int(count), int(count)
+
+class MemoryStore:
+    """In-process token buckets stored as GCRA theoretical arrival times
+    
+    One float per key, read and replaced without a lock: threads racing on
+    the same key can admit a request or two beyond the limit, but never
+    wait on each other. Keys whose bucket is full again are dropped once
+    the store grows past ``max_keys``.
+    """
+    
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._tats = {}
+        self._prune_at = max_keys
+    
+    def acquire(self, key, interval, burst):
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        wait = tat + interval - burst * interval - now
+        if wait > 0:
+            return wait
+        self._tats[key] = tat + interval
+        if len(self._tats) > self._prune_at:
+            self._prune(now)
+        return 0.0
+    
+    def _prune(self, now):
+        for key, tat in list(self._tats.items()):
+            if tat <= now:
+                self._tats.pop(key, None)
+        self._prune_at = max(self.max_keys, 2 * len(self._tats))
+
+# GCRA in one round trip; returns the wait in seconds as a string (Lua
+# numbers are truncated to integers in replies)
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local wait = tat + interval - burst * interval - now
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+return '0'
+"""
+
+class RedisStore:
+    """Token buckets shared between processes, for any redis-py compatible client"""
+    
+    def __init__(self, client, prefix='taskapi:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(GCRA_SCRIPT)
+    
+    def acquire(self, key, interval, burst):
+        return float(self._script(keys=[self.prefix + key], args=[time.time(), interval, burst]))
+
+class RateLimiter:
+    """Per-route token buckets and a global limit on requests in flight
+    
+    ``RATELIMIT_LIMITS`` maps an endpoint (``'api.login'``) or a blueprint
+    (``'api'``) to limits per client IP (``'ip'``) and per authenticated user
+    (``'user'``). A request over a limit gets 429 with ``Retry-After``.
+    Stores implement ``acquire(key, interval, burst)``, returning 0 when a
+    token was taken and otherwise the seconds until one is available.
+    
+    Independently, at most ``MAX_CONCURRENT_REQUESTS`` requests are handled
+    at once per process; by default the database pool size plus overflow,
+    so excess load is shed with 503 instead of queueing on the pool.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app, store=None):
+        """Register the admission checks for an app"""
+        config = app.config
+        limits = {}
+        if config['RATELIMIT_ENABLED']:
+            limits = {
+                target: [(scope, *parse_limit(limit)) for scope, limit in scopes.items()]
+                for target, scopes in config['RATELIMIT_LIMITS'].items()
+            }
+            if store is None:
+                store = self._make_store(config)
+    
+        concurrency = config['MAX_CONCURRENT_REQUESTS']
+        if concurrency is None:
+            options = config['SQLALCHEMY_ENGINE_OPTIONS']
+            if 'pool_size' in options:
+                concurrency = options['pool_size'] + options.get('max_overflow', 0)
+    
+        app.extensions['rate_limiter'] = {
+            'limits': limits,
+            'store': store,
+            'slots': threading.BoundedSemaphore(concurrency) if concurrency else None,
+            'timeout': config['ADMISSION_QUEUE_TIMEOUT'],
+            'exempt': frozenset(config['ADMISSION_EXEMPT_ENDPOINTS']),
+        }
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+    
+    def check(self, state):
+        """Take a token from every bucket of the current request
+    
+        Returns the longest wait if any bucket is empty, else 0.
+        """
+        target = request.endpoint if request.endpoint in state['limits'] else request.blueprint
+        limits = state['limits'].get(target)
+        if not limits:
+            return 0.0
+        wait = 0.0
+        for scope, interval, burst in limits:
+            if scope == 'ip':
+                key = f'ip:{request.remote_addr}'
+            else:
+                payload = get_current_payload()
+                if not payload:
+                    continue
+                key = f"user:{payload['user_id']}"
+            wait = max(wait, state['store'].acquire(f'{target}:{key}', interval, burst))
+        return wait
+    
+    def _before_request(self):
+        state = current_app.extensions['rate_limiter']
+        wait = self.check(state)
+        if wait:
+            return self._reject(429, 'Too many requests', math.ceil(wait))
+    
+        slots = state['slots']
+        if slots is None or request.endpoint in state['exempt']:
+            return None
+        acquired = (slots.acquire(timeout=state['timeout']) if state['timeout']
+                    else slots.acquire(blocking=False))
+        if not acquired:
+            return self._reject(503, 'Server busy, please retry', 1)
+        g._admission_slot = slots
+        return None
+    
+    @staticmethod
+    def _teardown_request(exc):
+        slots = g.pop('_admission_slot', None)
+        if slots is not None:
+            slots.release()
+    
+    @staticmethod
+    def _reject(status, message, retry_after):
+        response = jsonify({'error': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    
+    @staticmethod
+    def _make_store(config):
+        if config['RATELIMIT_STORAGE'] == 'redis':
+            import redis  # optional dependency
+            return RedisStore(redis.Redis.from_url(config['RATELIMIT_REDIS_URL']))
+        return MemoryStore()
+
+limiter = RateLimiter()
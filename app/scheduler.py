@@ -0,0 +1,324 @@
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, select, and_
+from app import db
+from app.cache import response_cache
+from app.events import event_bus
+from app.models import Task, TaskTombstone, User
+from app.startup import warmup
+
+logger = logging.getLogger('app.scheduler')
+
+OPEN_STATUSES = ('pending', 'in_progress')
+# Rows committed with an updated_at slightly behind the watermark are still
+# picked up by the next poll; re-applying a row is harmless
+POLL_OVERLAP = timedelta(seconds=5)
+
+class Deadlines:
+    """Min-heap of upcoming task deadlines plus the set of overdue tasks
+    
+    Only open tasks due before ``loaded_until`` are held; later deadlines are
+    loaded one window at a time with an indexed range query as the clock
+    approaches them. Changes are applied with ``upsert``/``remove``;
+    superseded heap entries are skipped when they surface instead of being
+    searched for. ``advance`` moves every deadline that has passed into the
+    overdue set and returns the tasks that just became overdue.
+    """
+    
+    def __init__(self, window):
+        self.window = window
+        self.loaded_until = None
+        self.watermark = None
+        self._heap = []
+        self._pending = {}   # task id -> (due_date, user_id) of its live heap entry
+        self._overdue = defaultdict(dict)  # user id -> {task id: due_date}
+        self._owners = {}    # overdue task id -> user id
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self):
+        return self.loaded_until is not None
+    
+    def load(self, connection, now):
+        """Initial load: every open task that is overdue or due within a window"""
+        self.watermark = now - POLL_OVERLAP
+        rows = connection.execute(
+            select(Task.id, Task.user_id, Task.due_date)
+            .where(Task.status.in_(OPEN_STATUSES), Task.due_date < now + self.window)
+        ).all()
+        with self._lock:
+            for task_id, user_id, due_date in rows:
+                if due_date <= now:
+                    self._mark_overdue(task_id, user_id, due_date)
+                else:
+                    self._push(task_id, user_id, due_date)
+            self.loaded_until = now + self.window
+    
+    def extend(self, connection, now):
+        """Load the next windows once the clock is half a window from the end"""
+        while now + self.window / 2 >= self.loaded_until:
+            start, end = self.loaded_until, self.loaded_until + self.window
+            rows = connection.execute(
+                select(Task.id, Task.user_id, Task.due_date)
+                .where(Task.status.in_(OPEN_STATUSES),
+                       Task.due_date >= start, Task.due_date < end)
+            ).all()
+            with self._lock:
+                for task_id, user_id, due_date in rows:
+                    self._push(task_id, user_id, due_date)
+                self.loaded_until = end
+    
+    def poll(self, connection, now):
+        """Apply task writes and deletions made by other processes since the last poll
+    
+        Reads the ``updated_at`` and tombstone ``deleted_at`` indexes from the
+        watermark on, so each poll only touches recently written rows.
+        """
+        since = self.watermark
+        self.watermark = now - POLL_OVERLAP
+        changed = connection.execute(
+            select(Task.id, Task.user_id, Task.due_date, Task.status)
+            .where(Task.updated_at >= since)
+        ).all()
+        deleted = connection.execute(
+            select(TaskTombstone.task_id).where(TaskTombstone.deleted_at >= since)
+        ).scalars().all()
+        became_overdue = []
+        for task_id, user_id, due_date, status in changed:
+            became_overdue += self.upsert(task_id, user_id, due_date, status, now)
+        for task_id in deleted:
+            self.remove(task_id)
+        return became_overdue
+    
+    def upsert(self, task_id, user_id, due_date, status, now):
+        """Track a task's current deadline; returns it if that made it overdue"""
+        with self._lock:
+            was_overdue = self._owners.get(task_id) is not None and \
+                self._overdue[self._owners[task_id]].get(task_id) == due_date
+            self._discard(task_id)
+            if status not in OPEN_STATUSES or due_date is None:
+                return []
+            if due_date <= now:
+                self._mark_overdue(task_id, user_id, due_date)
+                return [] if was_overdue else [(task_id, user_id, due_date)]
+            if due_date < self.loaded_until:
+                self._push(task_id, user_id, due_date)
+            return []
+    
+    def remove(self, task_id):
+        """Stop tracking a task"""
+        with self._lock:
+            self._discard(task_id)
+    
+    def remove_user(self, user_id):
+        """Stop tracking every task of a deleted user"""
+        with self._lock:
+            for task_id in self._overdue.pop(user_id, {}):
+                self._owners.pop(task_id, None)
+            for task_id in [t for t, (_, owner) in self._pending.items() if owner == user_id]:
+                del self._pending[task_id]
+    
+    def advance(self, now):
+        """Move every deadline up to ``now`` into the overdue set
+    
+        Returns ``(task_id, user_id, due_date)`` of the tasks that became overdue.
+        """
+        became_overdue = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_date, task_id = heapq.heappop(self._heap)
+                entry = self._pending.get(task_id)
+                if entry is None or entry[0] != due_date:
+                    continue  # superseded by a later write
+                del self._pending[task_id]
+                self._mark_overdue(task_id, entry[1], due_date)
+                became_overdue.append((task_id, entry[1], due_date))
+        return became_overdue
+    
+    def overdue_ids(self, user_id):
+        with self._lock:
+            return list(self._overdue.get(user_id, ()))
+    
+    def _push(self, task_id, user_id, due_date):
+        self._pending[task_id] = (due_date, user_id)
+        heapq.heappush(self._heap, (due_date, task_id))
+    
+    def _mark_overdue(self, task_id, user_id, due_date):
+        self._overdue[user_id][task_id] = due_date
+        self._owners[task_id] = user_id
+    
+    def _discard(self, task_id):
+        self._pending.pop(task_id, None)
+        user_id = self._owners.pop(task_id, None)
+        if user_id is not None:
+            tasks = self._overdue[user_id]
+            tasks.pop(task_id, None)
+            if not tasks:
+                del self._overdue[user_id]
+
+class Scheduler:
+    """Due-date tracking and ``task.overdue`` events
+    
+    Each app keeps a ``Deadlines`` structure, loaded on first use. Task
+    writes committed in this process update it right away; a background
+    thread (``SCHEDULER_THREAD``) or the ``flask run-scheduler`` worker
+    also polls for writes from other processes and loads upcoming windows.
+    Only a process running one of those publishes ``task.overdue`` events;
+    the others keep their overdue sets current for reads without
+    publishing, so each task is announced once.
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Set up deadline tracking for an app"""
+        if not app.config['SCHEDULER_ENABLED']:
+            app.extensions.pop('scheduler', None)
+            return
+        app.extensions['scheduler'] = {
+            'deadlines': Deadlines(timedelta(minutes=app.config['SCHEDULER_WINDOW_MINUTES'])),
+            'lock': threading.Lock(),
+            'thread': None,
+            'publisher': app.config['SCHEDULER_THREAD'],
+        }
+        if app.config['SCHEDULER_THREAD']:
+            app.before_request(self._start_thread)
+        for name, listener in (('after_flush', after_flush), ('after_commit', after_commit),
+                               ('after_soft_rollback', after_soft_rollback)):
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+    
+    def overdue_ids(self, user_id, now):
+        """Ids of the user's overdue tasks, or None when tracking is disabled
+    
+        Polls for writes made by other processes first, so the set is current
+        whether or not this process runs the scheduler thread.
+        """
+        deadlines = self._deadlines()
+        if deadlines is None:
+            return None
+        state = current_app.extensions['scheduler']
+        self.tick(db.session.connection(), now, publish=state['publisher'])
+        return deadlines.overdue_ids(user_id)
+    
+    def tick(self, connection, now, poll=True, publish=True):
+        """Load, poll and advance the deadlines, publishing overdue events if ``publish``"""
+        deadlines = self._deadlines()
+        state = current_app.extensions['scheduler']
+        became_overdue = []
+        with state['lock']:
+            if not deadlines.loaded:
+                deadlines.load(connection, now)
+            elif poll:
+                became_overdue += deadlines.poll(connection, now)
+            deadlines.extend(connection, now)
+        became_overdue += deadlines.advance(now)
+        self._notify(became_overdue, publish)
+    
+    def run(self, interval, stop=None):
+        """Tick every ``interval`` seconds until ``stop`` is set (needs an app context)
+    
+        Makes this process the one that publishes overdue events.
+        """
+        current_app.extensions['scheduler']['publisher'] = True
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                with db.engine.connect() as connection:
+                    self.tick(connection, datetime.utcnow())
+            except Exception:
+                logger.exception('Deadline scheduler tick failed')
+            stop.wait(interval)
+    
+    def apply(self, changes, now):
+        """Apply the task writes of a committed transaction"""
+        deadlines = self._deadlines()
+        if deadlines is None or not deadlines.loaded:
+            return  # the initial load will read them
+        became_overdue = []
+        for change in changes:
+            if change[0] == 'task':
+                became_overdue += deadlines.upsert(*change[1:], now)
+            elif change[0] == 'removed':
+                deadlines.remove(change[1])
+            else:
+                deadlines.remove_user(change[1])
+        self._notify(became_overdue, current_app.extensions['scheduler']['publisher'])
+    
+    def _notify(self, became_overdue, publish):
+        for task_id, user_id, due_date in became_overdue:
+            response_cache.invalidate_user(user_id)
+            if publish:
+                event_bus.publish(user_id, 'task.overdue',
+                                  {'id': task_id, 'due_date': due_date.isoformat()})
+    
+    def _deadlines(self):
+        state = current_app.extensions.get('scheduler')
+        return state['deadlines'] if state else None
+    
+    def _start_thread(self):
+        state = current_app.extensions['scheduler']
+        if state['thread'] is not None:
+            return
+        with state['lock']:
+            if state['thread'] is None:
+                app = current_app._get_current_object()
+                interval = app.config['SCHEDULER_INTERVAL_SECONDS']
+    
+                def run():
+                    with app.app_context():
+                        self.run(interval)
+                state['thread'] = threading.Thread(target=run, name='deadline-scheduler', daemon=True)
+                state['thread'].start()
+
+scheduler = Scheduler()
+
+@warmup
+def warm_deadlines():
+    """Initial deadline load, so the first requests do not wait on it"""
+    scheduler.overdue_ids(0, datetime.utcnow())
+
+def after_flush(session, flush_context):
+    """Record the deadline changes of a flush until the transaction commits"""
+    changes = session.info.setdefault('deadline_changes', [])
+    for task in session.new:
+        if isinstance(task, Task):
+            changes.append(('task', task.id, task.user_id, task.due_date, task.status))
+    for task in session.dirty:
+        if isinstance(task, Task):
+            state = db.inspect(task)
+            if state.attrs.due_date.history.has_changes() or \
+                    state.attrs.status.history.has_changes():
+                changes.append(('task', task.id, task.user_id, task.due_date, task.status))
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            changes.append(('removed', obj.id))
+        elif isinstance(obj, User):
+            changes.append(('user', obj.id))
+
+def after_commit(session):
+    changes = session.info.pop('deadline_changes', None)
+    if changes:
+        scheduler.apply(changes, datetime.utcnow())
+
+def after_soft_rollback(session, previous_transaction):
+    session.info.pop('deadline_changes', None)
+
+def overdue_filter(user_id):
+    """Condition selecting the user's open tasks past their due date
+    
+    Candidates come from the scheduler's overdue set when it is enabled;
+    the date and status are still checked against the rows.
+    """
+    now = datetime.utcnow()
+    condition = and_(Task.due_date < now, Task.status.in_(OPEN_STATUSES))
+    ids = scheduler.overdue_ids(user_id, now)
+    if ids is not None:
+        condition = and_(Task.id.in_(ids), condition)
+    return condition
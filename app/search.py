@@ -0,0 +1,188 @@
+import re
+import unicodedata
+import weakref
+from sqlalchemy import (event, select, insert, delete, union_all, literal, func, distinct,
+                        literal_column, table, column, text)
+from flask import current_app
+from app import db
+from app.models import Task, SearchTerm
+
+# Weight of a title match relative to a description match
+TITLE_WEIGHT = 2
+MAX_TERM_LENGTH = 64
+
+FTS_TABLE = table('task_fts', column('rowid'), column('user_id'), column('title'),
+                  column('description'))
+
+# Engines on which FTS5 is known to be available (and task_fts to exist)
+_fts_engines = weakref.WeakKeyDictionary()
+
+def normalize(value):
+    """Case-fold and strip diacritics, as FTS5's unicode61 tokenizer does"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(value):
+    """Words of a text, normalized for indexing"""
+    return [word[:MAX_TERM_LENGTH] for word in re.findall(r'[^\W_]+', normalize(value))]
+
+def parse_query(q):
+    """Search terms of a query as ``(term, is_prefix)`` pairs
+    
+    Every term must match; a trailing ``*`` matches any word starting with
+    the term.
+    """
+    return [
+        (word[:MAX_TERM_LENGTH], star == '*')
+        for word, star in re.findall(r'([^\W_]+)(\*?)', normalize(q))
+    ]
+
+def _uses_fts(connection):
+    """Whether tasks on this connection are indexed with FTS5
+    
+    ``SEARCH_BACKEND`` is ``fts5``, ``table`` or ``auto`` (FTS5 on SQLite
+    builds that have it). The virtual table is created on first use.
+    """
+    backend = current_app.config['SEARCH_BACKEND']
+    if backend == 'table' or connection.dialect.name != 'sqlite':
+        return False
+    engine = connection.engine
+    if engine not in _fts_engines:
+        available = backend == 'fts5' or bool(connection.exec_driver_sql(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).scalar())
+        if available:
+            connection.exec_driver_sql(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(user_id, title, description)'
+            )
+        _fts_engines[engine] = available
+    return _fts_engines[engine]
+
+def _fts_rows(tasks):
+    return [{'rowid': task.id, 'user_id': str(task.user_id), 'title': task.title,
+             'description': task.description or ''} for task in tasks]
+
+def _term_rows(tasks):
+    rows = []
+    for task in tasks:
+        weights = {}
+        for term in tokenize(task.title):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(task.description):
+            weights[term] = weights.get(term, 0) + 1
+        rows.extend({'user_id': task.user_id, 'task_id': task.id, 'term': term, 'weight': weight}
+                    for term, weight in weights.items())
+    return rows
+
+def index_tasks(connection, added, removed):
+    """Add tasks to and remove task ids from the search index"""
+    if _uses_fts(connection):
+        if removed:
+            connection.execute(delete(FTS_TABLE).where(FTS_TABLE.c.rowid.in_(removed)))
+        if added:
+            connection.execute(insert(FTS_TABLE), _fts_rows(added))
+    else:
+        if removed:
+            connection.execute(delete(SearchTerm).where(SearchTerm.task_id.in_(removed)))
+        rows = _term_rows(added)
+        if rows:
+            connection.execute(insert(SearchTerm), rows)
+
+def after_flush(session, flush_context):
+    """Reindex the tasks written by a flush, batched per flush
+    
+    Runs after the flush so new tasks have ids; an update is reindexed only
+    if its title or description changed.
+    """
+    added, removed = [], []
+    for task in session.new:
+        if isinstance(task, Task):
+            added.append(task)
+    for task in session.dirty:
+        if isinstance(task, Task):
+            state = db.inspect(task)
+            if state.attrs.title.history.has_changes() or \
+                    state.attrs.description.history.has_changes():
+                removed.append(task.id)
+                added.append(task)
+    for task in session.deleted:
+        if isinstance(task, Task):
+            removed.append(task.id)
+    if added or removed:
+        index_tasks(session.connection(), added, removed)
+
+def init_app(app):
+    """Keep the search index in sync on every flush"""
+    if not event.contains(db.session, 'after_flush', after_flush):
+        event.listen(db.session, 'after_flush', after_flush)
+
+def search_query(columns, user_id, q):
+    """Select ``columns`` of the user's tasks matching ``q``, best first
+    
+    FTS5 ranks with bm25 over title and description. The table index ranks
+    by summed term weights (title matches count double). Both look up each
+    term's posting list through an index, so cost follows the number of
+    matches, not the number of tasks. Returns None if ``q`` has no terms.
+    """
+    terms = parse_query(q)
+    if not terms:
+        return None
+    
+    if _uses_fts(db.session.connection()):
+        # Quote every term so user input cannot inject FTS5 query syntax
+        match = ' AND '.join(f'"{term}"' + (' *' if prefix else '') for term, prefix in terms)
+        match = f'user_id : "{user_id}" AND ({match})'
+        rank = func.bm25(literal_column('task_fts'), 0.0, float(TITLE_WEIGHT), 1.0)
+        return (
+            select(*columns)
+            .select_from(FTS_TABLE.join(Task.__table__, Task.id == FTS_TABLE.c.rowid))
+            .where(literal_column('task_fts').op('MATCH')(match), Task.user_id == user_id)
+            .order_by(rank, Task.id)
+        )
+    
+    postings = []
+    for position, (term, prefix) in enumerate(terms):
+        if prefix:
+            condition = (SearchTerm.term >= term) & (SearchTerm.term < term + '\U0010ffff')
+        else:
+            condition = SearchTerm.term == term
+        postings.append(
+            select(SearchTerm.task_id, SearchTerm.weight, literal(position).label('position'))
+            .where(SearchTerm.user_id == user_id, condition)
+        )
+    postings = union_all(*postings).subquery()
+    matches = (
+        select(postings.c.task_id, func.sum(postings.c.weight).label('score'))
+        .group_by(postings.c.task_id)
+        .having(func.count(distinct(postings.c.position)) == len(terms))
+        .subquery()
+    )
+    return (
+        select(*columns)
+        .join(matches, Task.id == matches.c.task_id)
+        .order_by(matches.c.score.desc(), Task.id)
+    )
+
+def rebuild_index():
+    """Rebuild the search index from the task table (repair tool)"""
+    connection = db.session.connection()
+    if _uses_fts(connection):
+        connection.execute(delete(FTS_TABLE))
+        connection.execute(text(
+            'INSERT INTO task_fts (rowid, user_id, title, description) '
+            "SELECT id, CAST(user_id AS TEXT), title, COALESCE(description, '') FROM task"
+        ))
+    else:
+        connection.execute(delete(SearchTerm))
+        batch_size = current_app.config['TASKS_EXPORT_BATCH_SIZE']
+        result = db.session.execute(
+            select(Task.id, Task.user_id, Task.title, Task.description)
+            .execution_options(yield_per=batch_size)
+        )
+        for tasks in result.partitions():
+            rows = _term_rows(tasks)
+            if rows:
+                connection.execute(insert(SearchTerm), rows)
+    count = db.session.scalar(select(func.count(Task.id)))
+    db.session.commit()
+    return count
@@ -0,0 +1,162 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, func
+from app.models import User, Task, SyncSequence
+from app.passwords import hasher
+
+TITLE_VERBS = ('Write', 'Review', 'Fix', 'Plan', 'Test', 'Deploy', 'Refactor', 'Document',
+               'Design', 'Update', 'Migrate', 'Investigate')
+TITLE_NOUNS = ('report', 'login flow', 'invoice export', 'release notes', 'dashboard',
+               'onboarding email', 'search page', 'API client', 'backup job', 'budget',
+               'roadmap', 'database index', 'team offsite', 'customer feedback')
+DESCRIPTIONS = (
+    'Follow up with the team before the end of the week.',
+    'Blocked on review; ping the owner if nothing moves.',
+    'See the linked ticket for the full list of requirements.',
+    'Low effort, but needs to happen before the next release.',
+    'Split into smaller pieces if this takes more than a day.',
+)
+
+def parse_weights(spec):
+    """Turn ``'a=5,b=3'`` into ``{'a': 5.0, 'b': 3.0}``, raising ValueError if invalid"""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        try:
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f'Invalid weight in {spec!r}')
+    if not weights or min(weights.values()) < 0 or not sum(weights.values()):
+        raise ValueError(f'Invalid weights: {spec!r}')
+    return weights
+
+def task_counts(rng, users, mean, distribution):
+    """Tasks per user drawn from ``fixed``, ``uniform``, ``exponential`` or ``pareto``
+    
+    Every distribution has the given mean; ``pareto`` gives a few users most
+    of the tasks, as in real workloads.
+    """
+    if distribution == 'fixed':
+        return [round(mean)] * users
+    if distribution == 'uniform':
+        return [rng.randint(0, round(2 * mean)) for _ in range(users)]
+    if distribution == 'exponential':
+        return [int(rng.expovariate(1 / mean)) if mean else 0 for _ in range(users)]
+    if distribution == 'pareto':
+        # Pareto(1.5) with a minimum of 1 has a mean of 3
+        return [int(mean / 3 * rng.paretovariate(1.5)) for _ in range(users)]
+    raise ValueError(f'Unknown distribution: {distribution}')
+
+@contextmanager
+def bulk_load(connection, tables):
+    """Drop the secondary indexes of ``tables`` for a load and relax SQLite durability
+    
+    Indexes are rebuilt in one sorted pass at the end instead of being
+    updated row by row. With ``synchronous = OFF`` a crash mid-load can lose
+    the loaded rows, never corrupt existing ones. If the load fails, its
+    open transaction is rolled back first, so the indexes are still rebuilt
+    (a failed transaction would refuse the DDL on some databases).
+    """
+    indexes = [index for table in tables for index in table.indexes]
+    sqlite = connection.dialect.name == 'sqlite'
+    if sqlite:
+        synchronous = connection.exec_driver_sql('PRAGMA synchronous').scalar()
+        cache_size = connection.exec_driver_sql('PRAGMA cache_size').scalar()
+        connection.exec_driver_sql('PRAGMA synchronous = OFF')
+        connection.exec_driver_sql('PRAGMA cache_size = -262144')
+    for index in indexes:
+        index.drop(connection)
+    connection.commit()
+    try:
+        yield
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        for index in indexes:
+            index.create(connection)
+        connection.commit()
+        if sqlite:
+            connection.exec_driver_sql(f'PRAGMA synchronous = {synchronous}')
+            connection.exec_driver_sql(f'PRAGMA cache_size = {cache_size}')
+
+def generate(connection, users, tasks_per_user=20.0, distribution='pareto',
+             statuses=None, priorities=None, due_days=(-30, 90), no_due_ratio=0.2,
+             seed=42, epoch=None, chunk_size=10000, password='password123', progress=None):
+    """Insert ``users`` synthetic users and their tasks; returns ``(users, tasks)``
+    
+    The data depends only on the arguments, so a seed reproduces a dataset.
+    User ids continue after the current maximum. Tasks get delta-sync
+    sequence numbers; run the stats and search rebuilds afterwards.
+    ``progress(table, done, total)`` is called before the first chunk of
+    each table and after every chunk.
+    """
+    rng = random.Random(seed)
+    statuses = statuses or {'pending': 5, 'in_progress': 2, 'completed': 3}
+    priorities = priorities or {'low': 3, 'medium': 5, 'high': 2}
+    epoch = epoch or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_id = (connection.scalar(select(func.max(User.id))) or 0) + 1
+    counts = task_counts(rng, users, tasks_per_user, distribution)
+    pwhash = hasher.hash(password)
+    
+    def write(table, rows, total):
+        done = 0
+        chunk = []
+        if progress:
+            progress(table.name, done, total)
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                connection.execute(insert(table), chunk)
+                connection.commit()
+                done += len(chunk)
+                chunk = []
+                if progress:
+                    progress(table.name, done, total)
+        if chunk:
+            connection.execute(insert(table), chunk)
+            connection.commit()
+            done += len(chunk)
+        if progress:
+            progress(table.name, done, total)
+    
+    def user_rows():
+        for user_id in range(first_id, first_id + users):
+            joined = epoch - timedelta(seconds=rng.randrange(365 * 86400))
+            yield {'id': user_id, 'username': f'user{user_id}', 'email': f'user{user_id}@example.com',
+                   'password_hash': pwhash, 'created_at': joined, 'updated_at': joined}
+    
+    def task_rows():
+        status_names, status_weights = list(statuses), list(statuses.values())
+        priority_names, priority_weights = list(priorities), list(priorities.values())
+        titles = [f'{verb} {noun}' for verb in TITLE_VERBS for noun in TITLE_NOUNS]
+        for user_id, count in zip(range(first_id, first_id + users), counts):
+            # Draw each column for all of a user's tasks at once
+            user_statuses = rng.choices(status_names, status_weights, k=count)
+            user_priorities = rng.choices(priority_names, priority_weights, k=count)
+            user_titles = rng.choices(titles, k=count)
+            for seq in range(1, count + 1):
+                created = epoch - timedelta(seconds=rng.randrange(365 * 86400))
+                due = (None if rng.random() < no_due_ratio
+                       else epoch + timedelta(days=rng.randint(*due_days), hours=rng.randrange(24)))
+                yield {
+                    'title': f'{user_titles[seq - 1]} #{seq}',
+                    'description': rng.choice(DESCRIPTIONS) if rng.random() < 0.7 else None,
+                    'status': user_statuses[seq - 1],
+                    'priority': user_priorities[seq - 1],
+                    'due_date': due,
+                    'created_at': created,
+                    'updated_at': created,
+                    'user_id': user_id,
+                    'sync_seq': seq,
+                }
+    
+    with bulk_load(connection, [User.__table__, Task.__table__]):
+        write(User.__table__, user_rows(), users)
+        write(Task.__table__, task_rows(), sum(counts))
+        write(SyncSequence.__table__, (
+            {'user_id': user_id, 'last_seq': count, 'purged_seq': 0}
+            for user_id, count in zip(range(first_id, first_id + users), counts) if count
+        ), sum(1 for count in counts if count))
+    return users, sum(counts)
@@ -0,0 +1,119 @@
+import json
+import re
+from functools import lru_cache
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# JSON syntax is ASCII, so any byte from DEL up belongs to a string value that
+# the stdlib encoder would have escaped under ``ensure_ascii``
+_NEEDS_ESCAPE = re.compile(rb'[\x7f-\xff]')
+_NON_ASCII = re.compile('[^\x00-\x7e]')
+
+def _iso(value):
+    return value.isoformat()
+
+# Field types whose dump of a non-null value is reproduced by a plain converter
+_CONVERTERS = {
+    fields.DateTime: _iso,
+    fields.Integer: int,
+    fields.String: str,
+}
+
+def _converter(field):
+    """Converter reproducing ``field``'s dump of a non-null value"""
+    if isinstance(field, fields.DateTime) and field.format not in (None, 'iso'):
+        raise TypeError(f'Unsupported DateTime format: {field.format!r}')
+    for field_class in type(field).__mro__:
+        if field_class in _CONVERTERS:
+            return _CONVERTERS[field_class]
+    raise TypeError(f'No fast serializer for {type(field).__name__}')
+
+class RowSerializer:
+    """Dump column-tuple rows the way a marshmallow schema dumps objects
+
+    The schema's fields are resolved once into ``(key, converter)`` pairs, so
+    dumping a row is a single dict comprehension over its values instead of
+    a pass through marshmallow's field machinery per value.
+    """
+    
+    def __init__(self, schema):
+        self.keys = tuple(schema.dump_fields)
+        self.attributes = tuple(
+            field.attribute or name for name, field in schema.dump_fields.items()
+        )
+        self._fields = tuple(
+            (name, _converter(field)) for name, field in schema.dump_fields.items()
+        )
+    
+    def columns(self, model, *extra):
+        """Columns to select: the dumped attributes first, then ``extra``
+
+        Extra columns (e.g. keyset or version columns) are appended only if
+        not already selected, so dumped values stay at the front of each row.
+        """
+        names = dict.fromkeys(self.attributes + extra)
+        return [getattr(model, name) for name in names]
+    
+    def dump(self, rows):
+        """Dump rows selected with :meth:`columns` to a list of dicts"""
+        fields_ = self._fields
+        return [
+            {key: None if value is None else convert(value)
+             for (key, convert), value in zip(fields_, row)}
+            for row in rows
+        ]
+
+@lru_cache(maxsize=64)
+def row_serializer(schema_class, only=None):
+    """Serializer for ``schema_class`` restricted to ``only`` (cached)"""
+    return RowSerializer(schema_class(only=only))
+
+def dumps(data):
+    """Encode ``data`` as compact UTF-8 JSON bytes with sorted keys"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+def _escape_non_ascii(body):
+    """Escape non-ASCII characters exactly like ``json.dumps(ensure_ascii=True)``"""
+    text = body.decode()
+    return _NON_ASCII.sub(lambda match: json.dumps(match.group())[1:-1], text).encode()
+
+def _use_orjson(provider):
+    """Whether orjson can reproduce the app's JSON provider output"""
+    if orjson is None or not isinstance(provider, DefaultJSONProvider):
+        return False
+    compact = provider.compact
+    return compact or (compact is None and not current_app.debug)
+
+def json_response(data):
+    """Encode ``data`` like ``jsonify`` does, with orjson when installed
+
+    The output is byte-identical to the app's JSON provider: sorted keys,
+    compact separators, trailing newline and ASCII escapes when
+    ``ensure_ascii`` is set. Falls back to the provider in debug mode (which
+    pretty-prints) or for values orjson rejects.
+    """
+    provider = current_app.json
+    if not _use_orjson(provider):
+        return provider.response(data)
+    
+    option = orjson.OPT_APPEND_NEWLINE
+    if provider.sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    try:
+        body = orjson.dumps(data, option=option)
+    except TypeError:
+        return provider.response(data)
+    if provider.ensure_ascii and _NEEDS_ESCAPE.search(body):
+        body = _escape_non_ascii(body)
+    return current_app.response_class(body, mimetype=provider.mimetype)
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import logging
+import subprocess
+from collections import Counter
+import click
+from sqlalchemy.orm import configure_mappers
+from app import db
+
+logger = logging.getLogger('app.startup')
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_warmups = []
+
+def warmup(f):
+    """Register ``f`` to run (in an app context) when a serving process warms up"""
+    _warmups.append(f)
+    return f
+
+class LazyGroup(click.Group):
+    """CLI group whose commands are imported on first use
+    
+    ``load`` returns the real group; it is only called when a subcommand is
+    looked up or listed, so serving processes never import it.
+    """
+    
+    def __init__(self, name, load, **kwargs):
+        super().__init__(name, **kwargs)
+        self._load = load
+        self._group = None
+    
+    def group(self):
+        if self._group is None:
+            self._group = self._load()
+        return self._group
+    
+    def list_commands(self, ctx):
+        return self.group().list_commands(ctx)
+    
+    def get_command(self, ctx, name):
+        return self.group().get_command(ctx, name)
+
+def init_app(app):
+    """Register tooling-only extensions lazily
+    
+    Flask-Migrate (and with it Alembic and Mako) is imported only when a
+    ``flask db`` command runs.
+    """
+    def load_migrate():
+        from flask_migrate import Migrate
+        Migrate(app, db)
+        return app.cli.commands['db']
+    
+    app.cli.add_command(LazyGroup('db', load_migrate, help='Perform database migrations.'))
+
+def warm_up(app):
+    """Run the one-time work of the first request ahead of it; returns the seconds taken
+    
+    Called by the serving entry points (``serve.py``, ``asgi.py``), not by
+    ``create_app``, so scripts and CLI commands never query the database
+    just by creating the app. Configures the ORM mappers, then runs every registered warm-up hook,
+    which execute the hot queries for a nonexistent user so their compiled
+    SQL is cached on the engine and the pool holds an open connection.
+    A failing hook (e.g. before the tables exist) is logged and skipped.
+    """
+    start = time.perf_counter()
+    with app.app_context():
+        configure_mappers()
+        for hook in _warmups:
+            try:
+                hook()
+            except Exception as err:
+                logger.warning('Warm-up step %s failed: %s', hook.__name__, err)
+                db.session.rollback()
+    elapsed = time.perf_counter() - start
+    logger.info('Warmed up in %.1f ms', elapsed * 1000)
+    return elapsed
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` output into ``(module, self_us, cumulative_us)`` tuples"""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+def profile_imports(code='from app import create_app; create_app()', env=None, cwd=PROJECT_DIR):
+    """Import costs of running ``code`` in a fresh interpreter, most expensive first"""
+    env = {**os.environ, **(env or {})}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, env=env, cwd=cwd)
+    if result.returncode:
+        raise RuntimeError(f'Profiled startup failed:\n{result.stderr[-2000:]}')
+    return sorted(parse_importtime(result.stderr), key=lambda item: item[1], reverse=True)
+
+def by_package(imports):
+    """Total self time of ``imports`` per top-level package, most expensive first"""
+    totals = Counter()
+    for module, self_us, _ in imports:
+        totals[module.partition('.')[0]] += self_us
+    return totals.most_common()
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, update, insert, delete, select, func, case
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app import db
+from app.models import Task, TaskStats, User
+
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+COUNTERS = ('total',) + STATUSES + PRIORITIES
+
+# Pass to get_stats for the totals over all users
+ALL_USERS = 0
+# The totals are split over this many rows (user_id -1 to -TOTALS_SHARDS),
+# so writers for different users rarely wait on the same row
+TOTALS_SHARDS = 16
+
+def totals_row(user_id):
+    """Key of the TaskStats row holding a user's share of the totals"""
+    return -1 - user_id % TOTALS_SHARDS
+
+def _contribution(status, priority):
+    """Counter increments contributed by one task in the given state"""
+    counters = {'total': 1}
+    if status in STATUSES:
+        counters[status] = 1
+    if priority in PRIORITIES:
+        counters[priority] = 1
+    return counters
+
+def _committed_value(task, attr):
+    """Value of an attribute as last loaded from the database"""
+    history = db.inspect(task).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(task, attr)
+
+def _collect_deltas(session):
+    """Per-user counter deltas of the Task changes pending in a session"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    
+    def add(user_id, status, priority, sign):
+        for counter, value in _contribution(status, priority).items():
+            deltas[user_id][counter] += sign * value
+            deltas[totals_row(user_id)][counter] += sign * value
+    
+    for task in session.new:
+        if isinstance(task, Task):
+            add(task.user_id, task.status or 'pending', task.priority or 'medium', 1)
+    for task in session.deleted:
+        if isinstance(task, Task):
+            add(task.user_id, _committed_value(task, 'status'),
+                _committed_value(task, 'priority'), -1)
+    for task in session.dirty:
+        if isinstance(task, Task) and session.is_modified(task):
+            old = (_committed_value(task, 'status'), _committed_value(task, 'priority'))
+            if old != (task.status, task.priority):
+                add(task.user_id, *old, -1)
+                add(task.user_id, task.status, task.priority, 1)
+    
+    return {
+        user_id: {c: v for c, v in counters.items() if v}
+        for user_id, counters in deltas.items()
+        if any(counters.values())
+    }
+
+def apply_deltas(connection, deltas):
+    """Add counter deltas to the stats rows, creating missing rows
+    
+    Each row is written with one upsert, so two transactions creating the
+    same row cannot both insert it. Rows are written in key order, so
+    concurrent transactions lock them in the same order. Dialects without
+    an upsert fall back to an UPDATE, then an INSERT when no row matched.
+    """
+    table = TaskStats.__table__
+    dialect = connection.dialect.name
+    for user_id, counters in sorted(deltas.items()):
+        values = {name: counters.get(name, 0) for name in COUNTERS}
+        increments = {name: table.c[name] + value for name, value in counters.items()}
+        if dialect in ('sqlite', 'postgresql'):
+            dml = sqlite if dialect == 'sqlite' else postgresql
+            connection.execute(
+                dml.insert(table).values(user_id=user_id, **values)
+                .on_conflict_do_update(index_elements=[table.c.user_id], set_=increments)
+            )
+        elif dialect in ('mysql', 'mariadb'):
+            connection.execute(
+                mysql.insert(table).values(user_id=user_id, **values)
+                .on_duplicate_key_update(increments)
+            )
+        elif not connection.execute(
+                update(table).where(table.c.user_id == user_id).values(increments)).rowcount:
+            connection.execute(insert(table).values(user_id=user_id, **values))
+
+def before_flush(session, flush_context, instances):
+    """Fold pending Task writes into the stats table in the same transaction
+
+    Deleting a user cascades to their tasks, which are subtracted from the
+    totals like any other delete; the user's own row is then dropped.
+    """
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+    
+    deleted_users = [user.id for user in session.deleted if isinstance(user, User)]
+    if deleted_users:
+        session.connection().execute(
+            delete(TaskStats).where(TaskStats.user_id.in_(deleted_users))
+        )
+
+def init_app(app):
+    """Start maintaining task statistics on every flush"""
+    if not event.contains(db.session, 'before_flush', before_flush):
+        event.listen(db.session, 'before_flush', before_flush)
+
+def get_stats(user_id):
+    """Counters for one user (or ALL_USERS) as an API payload
+    
+    The totals are the sum of the TOTALS_SHARDS shard rows, a primary-key
+    range read however many users and tasks exist.
+    """
+    if user_id == ALL_USERS:
+        row = db.session.execute(
+            select(*(func.coalesce(func.sum(getattr(TaskStats, name)), 0) for name in COUNTERS))
+            .where(TaskStats.user_id < 0)
+        ).one()
+        counts = dict(zip(COUNTERS, row))
+    else:
+        stats = db.session.get(TaskStats, user_id)
+        counts = {name: getattr(stats, name) if stats else 0 for name in COUNTERS}
+    return {
+        'total': counts['total'],
+        'by_status': {name: counts[name] for name in STATUSES},
+        'by_priority': {name: counts[name] for name in PRIORITIES},
+    }
+
+def count_overdue(user_id):
+    """Open tasks of a user past their due date
+
+    Overdue depends on the clock, so it cannot be kept as a counter; this is
+    a range scan on the (user_id, due_date) index that only touches tasks
+    already past due.
+    """
+    return db.session.scalar(
+        select(func.count(Task.id))
+        .where(Task.user_id == user_id,
+               Task.due_date < datetime.utcnow(),
+               Task.status != 'completed')
+    )
+
+def rebuild_stats():
+    """Recompute every stats row from the task table (repair tool)"""
+    columns = [func.count(Task.id)]
+    columns += [func.sum(case((Task.status == s, 1), else_=0)) for s in STATUSES]
+    columns += [func.sum(case((Task.priority == p, 1), else_=0)) for p in PRIORITIES]
+    rows = db.session.execute(select(Task.user_id, *columns).group_by(Task.user_id)).all()
+    
+    db.session.execute(delete(TaskStats))
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for user_id, *values in rows:
+        counters = dict(zip(COUNTERS, (value or 0 for value in values)))
+        db.session.add(TaskStats(user_id=user_id, **counters))
+        for name, value in counters.items():
+            totals[totals_row(user_id)][name] += value
+    for row, counters in totals.items():
+        db.session.add(TaskStats(user_id=row, **counters))
+    db.session.commit()
+    return len(rows)
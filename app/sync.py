@@ -0,0 +1,108 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import event, update, insert, delete, select, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app import db
+from app.models import Task, TaskTombstone, SyncSequence, User
+
+def reserve(connection, user_id, count):
+    """Hand out ``count`` sequence numbers of a user, returning the last one
+    
+    The counter row is created or incremented by one upsert, so a user's
+    first two writes cannot both insert it. The upsert locks the row until
+    commit, so a user's writes take sequence numbers in commit order and a
+    client never skips a change committed after it synced. Without INSERT
+    ... RETURNING (MySQL), the row is read back; the lock keeps that read
+    our own. Dialects without an upsert fall back to an UPDATE, then an
+    INSERT when no row matched.
+    """
+    table = SyncSequence.__table__
+    dialect = connection.dialect.name
+    increment = {'last_seq': table.c.last_seq + count}
+    if dialect in ('sqlite', 'postgresql'):
+        dml = sqlite if dialect == 'sqlite' else postgresql
+        upsert = (dml.insert(table).values(user_id=user_id, last_seq=count)
+                  .on_conflict_do_update(index_elements=[table.c.user_id], set_=increment))
+        if connection.dialect.insert_returning:
+            return connection.execute(upsert.returning(table.c.last_seq)).scalar()
+        connection.execute(upsert)
+    elif dialect in ('mysql', 'mariadb'):
+        connection.execute(mysql.insert(table).values(user_id=user_id, last_seq=count)
+                           .on_duplicate_key_update(increment))
+    elif not connection.execute(
+            update(table).where(table.c.user_id == user_id).values(increment)).rowcount:
+        connection.execute(insert(table).values(user_id=user_id, last_seq=count))
+        return count
+    return connection.scalar(select(table.c.last_seq).where(table.c.user_id == user_id))
+
+def before_flush(session, flush_context, instances):
+    """Stamp written tasks with sequence numbers and record tombstones
+    
+    Deleting a user cascades to their tasks; no tombstones are kept for
+    those, and the user's sequence and tombstone rows are dropped.
+    """
+    deleted_users = {user.id for user in session.deleted if isinstance(user, User)}
+    changed = defaultdict(list)
+    removed = defaultdict(list)
+    for task in session.new:
+        if isinstance(task, Task):
+            changed[task.user_id].append(task)
+    for task in session.dirty:
+        if isinstance(task, Task) and session.is_modified(task):
+            changed[task.user_id].append(task)
+    for task in session.deleted:
+        if isinstance(task, Task) and task.user_id not in deleted_users:
+            removed[task.user_id].append(task)
+    if not (changed or removed or deleted_users):
+        return
+    
+    connection = session.connection()
+    now = datetime.utcnow()
+    for user_id in changed.keys() | removed.keys():
+        tasks, gone = changed[user_id], removed[user_id]
+        seq = reserve(connection, user_id, len(tasks) + len(gone)) - len(tasks) - len(gone)
+        for task in tasks:
+            seq += 1
+            task.sync_seq = seq
+        if gone:
+            connection.execute(insert(TaskTombstone), [
+                {'user_id': user_id, 'seq': seq + offset, 'task_id': task.id, 'deleted_at': now}
+                for offset, task in enumerate(gone, 1)
+            ])
+    
+    if deleted_users:
+        connection.execute(delete(TaskTombstone).where(TaskTombstone.user_id.in_(deleted_users)))
+        connection.execute(delete(SyncSequence).where(SyncSequence.user_id.in_(deleted_users)))
+
+def init_app(app):
+    """Start sequencing task writes on every flush"""
+    if not event.contains(db.session, 'before_flush', before_flush):
+        event.listen(db.session, 'before_flush', before_flush)
+
+def purged_seq(user_id):
+    """Newest pruned tombstone of a user; older sync tokens are stale"""
+    return db.session.scalar(
+        select(SyncSequence.purged_seq).where(SyncSequence.user_id == user_id)
+    ) or 0
+
+def prune_tombstones(retention_days):
+    """Delete tombstones older than ``retention_days``
+    
+    Each user's ``purged_seq`` is raised to their newest pruned tombstone so
+    clients holding an older token are told to resync in full.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    pruned = db.session.execute(
+        select(TaskTombstone.user_id, func.max(TaskTombstone.seq))
+        .where(TaskTombstone.deleted_at < cutoff)
+        .group_by(TaskTombstone.user_id)
+    ).all()
+    for user_id, seq in pruned:
+        db.session.execute(
+            update(SyncSequence)
+            .where(SyncSequence.user_id == user_id, SyncSequence.purged_seq < seq)
+            .values(purged_seq=seq)
+        )
+    result = db.session.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,10 @@
+from app.asgi import create_asgi_app
+from app.startup import warm_up
+
+app = create_asgi_app()
+if app.flask_app.config['WARMUP_ON_START']:
+    warm_up(app.flask_app)
+
+if __name__ == '__main__':
+    import uvicorn  # optional dependency
+    uvicorn.run('asgi:app', host='0.0.0.0', port=5000)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+API load test and micro-benchmark suite
+Seeds a database with many users and tasks, then drives login, list, filter,
+create, update and delete through the Flask test client and/or a real WSGI
+server on localhost. Reports p50/p95/p99 latency, requests/sec and SQL
+queries per request, and can write the results as JSON for comparison
+across commits.
+
+Usage:
+    python -m benchmarks.api_bench --users 200 --tasks 20000 --output bench.json
+    python -m benchmarks.api_bench --baseline bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event, insert
+from werkzeug.serving import make_server
+from app import create_app, db
+from app.auth import generate_tokens
+from app.models import User, Task
+from app.passwords import hasher
+from app.stats import rebuild_stats
+from config import Config
+
+SCENARIOS = ('login', 'list', 'filter', 'create', 'update', 'delete')
+PASSWORD = 'password123'
+CHUNK = 5000
+
+def make_config(database_uri, cache):
+    """Build the configuration class used for a benchmark run"""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        RESPONSE_CACHE_BACKEND = 'memory' if cache else 'none'
+        RATELIMIT_ENABLED = False
+    return BenchmarkConfig
+
+def seed(users, tasks, rng):
+    """Insert users and tasks with chunked Core inserts; returns user ids"""
+    pwhash = hasher.hash(PASSWORD)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {'username': f'bench{i}', 'email': f'bench{i}@example.com',
+         'password_hash': pwhash, 'created_at': now, 'updated_at': now}
+        for i in range(users)
+    ])
+    user_ids = [u.id for u in User.query.with_entities(User.id)]
+    
+    rows = []
+    for i in range(tasks):
+        created = now - timedelta(seconds=tasks - i)
+        rows.append({
+            'title': f'Task {i}',
+            'description': 'Benchmark task ' * rng.randint(1, 20),
+            'status': rng.choice(('pending', 'in_progress', 'completed')),
+            'priority': rng.choice(('low', 'medium', 'high')),
+            'due_date': now + timedelta(days=rng.randint(-30, 60)),
+            'created_at': created,
+            'updated_at': created,
+            'user_id': user_ids[i % len(user_ids)],
+        })
+        if len(rows) == CHUNK:
+            db.session.execute(insert(Task), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Task), rows)
+    db.session.commit()
+    rebuild_stats()
+    return user_ids
+
+class TestClientDriver:
+    """Send requests through the Flask test client (no network, no server)"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def request(self, method, path, headers=None, body=None):
+        with self.app.test_client() as client:
+            response = client.open(path, method=method, headers=headers, json=body)
+            return response.status_code, response.get_json(silent=True)
+
+class HTTPDriver:
+    """Send requests over keep-alive HTTP connections to a local server"""
+    
+    def __init__(self, port):
+        self.port = port
+        self.local = threading.local()
+    
+    def request(self, method, path, headers=None, body=None):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        try:
+            parsed = json.loads(data) if data else None
+        except ValueError:
+            parsed = None
+        return response.status, parsed
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+def run_scenario(driver, requests, concurrency, counter):
+    """Run a list of (method, path, headers, body) and summarize it"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    
+    def send(spec):
+        nonlocal errors
+        start = time.perf_counter()
+        status, _ = driver.request(*spec)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed * 1000)
+            if status >= 400:
+                errors += 1
+    
+    queries_before = counter['queries']
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(send, requests))
+    else:
+        for spec in requests:
+            send(spec)
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        'requests': len(requests),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'requests_per_sec': round(len(requests) / elapsed, 1) if elapsed else 0.0,
+        'queries_per_request': round((counter['queries'] - queries_before) / len(requests), 2)
+        if requests else 0.0,
+    }
+
+def run_suite(driver, app, user_ids, args, counter):
+    """Drive every scenario and return their summaries"""
+    rng = random.Random(args.seed)
+    n = args.requests
+    with app.app_context():
+        tokens = {uid: generate_tokens(uid)[0] for uid in rng.sample(user_ids, min(len(user_ids), 50))}
+    sample_users = list(tokens)
+    
+    def auth(uid):
+        return {'Authorization': f'Bearer {tokens[uid]}'}
+    
+    results = {}
+    logins = [rng.choice(sample_users) for _ in range(min(n, args.login_requests))]
+    results['login'] = run_scenario(driver, [
+        ('POST', '/api/auth/login', None, {'username': f'bench{uid - user_ids[0]}', 'password': PASSWORD})
+        for uid in logins
+    ], args.concurrency, counter)
+    results['list'] = run_scenario(driver, [
+        ('GET', '/api/tasks?limit=50', auth(uid), None)
+        for uid in (rng.choice(sample_users) for _ in range(n))
+    ], args.concurrency, counter)
+    results['filter'] = run_scenario(driver, [
+        ('GET', f"/api/tasks?status={rng.choice(('pending', 'completed'))}&priority=high&limit=50",
+         auth(uid), None)
+        for uid in (rng.choice(sample_users) for _ in range(n))
+    ], args.concurrency, counter)
+    
+    owners = [rng.choice(sample_users) for _ in range(n)]
+    created = []
+    create_lock = threading.Lock()
+    
+    class RecordingDriver:
+        def request(self, *spec):
+            status, body = driver.request(*spec)
+            if status == 201:
+                with create_lock:
+                    created.append((spec[2], body['id']))
+            return status, body
+    
+    results['create'] = run_scenario(RecordingDriver(), [
+        ('POST', '/api/tasks', auth(uid), {'title': 'Bench task', 'priority': 'high'})
+        for uid in owners
+    ], args.concurrency, counter)
+    results['update'] = run_scenario(driver, [
+        ('PUT', f'/api/tasks/{task_id}', headers, {'title': 'Bench task (edited)'})
+        for headers, task_id in created
+    ], args.concurrency, counter)
+    results['delete'] = run_scenario(driver, [
+        ('DELETE', f'/api/tasks/{task_id}', headers, None)
+        for headers, task_id in created
+    ], args.concurrency, counter)
+    return results
+
+def git_commit():
+    """Current commit hash, if run inside a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results):
+    """Print a human-readable summary"""
+    header = f"{'mode':<8}{'scenario':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'q/req':>7}{'err':>5}"
+    print(header)
+    print('-' * len(header))
+    for mode, scenarios in results.items():
+        for name, r in scenarios.items():
+            print(f"{mode:<8}{name:<10}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                  f"{r['requests_per_sec']:>9.0f}{r['queries_per_request']:>7.2f}{r['errors']:>5}")
+
+def print_comparison(results, baseline):
+    """Print p50 and throughput changes against a previous results file"""
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for mode, scenarios in results.items():
+        for name, r in scenarios.items():
+            old = baseline['results'].get(mode, {}).get(name)
+            if not old or not old['p50_ms'] or not old['requests_per_sec']:
+                continue
+            p50 = (r['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            rps = (r['requests_per_sec'] - old['requests_per_sec']) / old['requests_per_sec'] * 100
+            print(f"  {mode:<8}{name:<10}p50 {p50:+6.1f}%   req/s {rps:+6.1f}%")
+
+def main(argv=None):
+    """Seed, benchmark and report"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=10000, help='total tasks across all users')
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--login-requests', type=int, default=50,
+                        help='requests for the login scenario (each runs a password hash)')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads (server mode)')
+    parser.add_argument('--mode', choices=('client', 'server', 'both'), default='both')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='compare against a previous JSON results file')
+    args = parser.parse_args(argv)
+    
+    workdir = tempfile.mkdtemp(prefix='taskapi-bench-')
+    database_uri = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    app = create_app(make_config(database_uri, cache=not args.no_cache))
+    
+    counter = {'queries': 0}
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        user_ids = seed(args.users, args.tasks, random.Random(args.seed))
+        print(f'Seeded {args.users} users and {args.tasks} tasks in {time.perf_counter() - start:.1f}s',
+              file=sys.stderr)
+        
+        def count_query(*_):
+            counter['queries'] += 1
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+    
+    results = {}
+    if args.mode in ('client', 'both'):
+        results['client'] = run_suite(TestClientDriver(app), app, user_ids,
+                                      argparse.Namespace(**{**vars(args), 'concurrency': 1}), counter)
+    if args.mode in ('server', 'both'):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            results['server'] = run_suite(HTTPDriver(server.server_port), app, user_ids, args, counter)
+        finally:
+            server.shutdown()
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': args.users,
+            'tasks': args.tasks,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'cache': not args.no_cache,
+        },
+        'results': results,
+    }
+    
+    print_table(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nResults written to {args.output}', file=sys.stderr)
+    return report
+
+if __name__ == '__main__':
+    main()
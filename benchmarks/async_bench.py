@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Sync vs async serving benchmark
+Seeds a SQLite database, then serves it with the threaded WSGI server and
+with the ASGI app under uvicorn (one process each) and holds many concurrent
+keep-alive connections against GET /api/tasks. Reports requests/sec and
+p50/p95/p99 latency for each server.
+
+Usage:
+    python -m benchmarks.async_bench --connections 200 --duration 10
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from benchmarks.api_bench import make_config, seed, percentile
+from app import create_app, db
+from app.auth import generate_tokens
+
+REQUEST_TIMEOUT = 30
+
+def serve(mode, port, database_uri, cache):
+    """Run one server in this process until it is killed"""
+    config = make_config(database_uri, cache)
+    # Measure queueing under load rather than admission control shedding it
+    config.MAX_CONCURRENT_REQUESTS = 0
+    app = create_app(config)
+    if mode == 'sync':
+        import logging
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from app.asgi import AsyncApp
+        uvicorn.run(AsyncApp(app), host='127.0.0.1', port=port, log_level='warning')
+
+async def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns the status code and keep-alive flag"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(lines[0].split()[1]), headers.get('connection') != 'close'
+
+async def connection(port, paths, deadline, latencies, errors):
+    """Send requests on one client until the deadline
+    
+    The connection is kept alive unless the server closes it after a
+    response (the threaded WSGI server always does); the reconnect then
+    counts towards the next request's latency.
+    """
+    writer = None
+    try:
+        while time.monotonic() < deadline:
+            path, token = random.choice(paths)
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+                         f'Authorization: Bearer {token}\r\n\r\n'.encode())
+            status, keep_alive = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+            if not keep_alive:
+                writer.close()
+                writer = None
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        errors.append(0)
+    finally:
+        if writer is not None:
+            writer.close()
+
+async def load(port, paths, connections, duration):
+    await wait_for_port(port)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(connection(port, paths, deadline, latencies, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'errors': len(errors),
+    }
+
+def main(argv=None):
+    """Seed, serve with each server in turn and report"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=10000, help='total tasks across all users')
+    parser.add_argument('--connections', type=int, default=100, help='concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per server')
+    parser.add_argument('--cache', action='store_true', help='enable the response cache')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--serve', choices=('sync', 'async'), help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.serve:
+        return serve(args.serve, args.port, args.database, args.cache)
+    
+    workdir = tempfile.mkdtemp(prefix='taskapi-bench-')
+    database_uri = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    app = create_app(make_config(database_uri, args.cache))
+    with app.app_context():
+        db.create_all()
+        user_ids = seed(args.users, args.tasks, random.Random(args.seed))
+        paths = [(f'/api/tasks?per_page=20&priority={priority}', generate_tokens(user_id)[0])
+                 for user_id in user_ids for priority in ('low', 'medium', 'high')]
+    
+    results = {}
+    for mode in ('sync', 'async'):
+        command = [sys.executable, '-m', 'benchmarks.async_bench', '--serve', mode,
+                   '--port', str(args.port), '--database', database_uri]
+        if args.cache:
+            command.append('--cache')
+        server = subprocess.Popen(command)
+        try:
+            results[mode] = asyncio.run(load(args.port, paths, args.connections, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+    
+    header = f"{'server':<8}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err':>5}"
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['requests']:>10}{r['requests_per_sec']:>9.0f}{r['p50_ms']:>9.2f}"
+              f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>5}")
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Auth overhead benchmark
+Counts SQL queries and JWT decodes per authenticated task request for the
+legacy decode-per-decorator path, the request-scoped auth context and the
+claims-only mode.
+"""
+
+import time
+from unittest import mock
+from sqlalchemy import event
+from app import create_app, db, auth
+from app.models import User
+from config import TestingConfig
+
+REQUESTS = 500
+
+def legacy_get_current_user_id():
+    """The pre-cache lookup: decode the token and load the user every call"""
+    payload = auth._load_payload()
+    user = User.query.get(payload['user_id']) if payload else None
+    return user.id if user else None
+
+def measure(client, headers, requests=REQUESTS):
+    """Return (queries/request, decodes/request, requests/sec) for GET /api/tasks"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        with mock.patch.object(auth, 'verify_token', wraps=auth.verify_token) as verify:
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get('/api/tasks', headers=headers)
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    
+    return len(statements) / requests, verify.call_count / requests, requests / elapsed
+
+def main():
+    """Run the benchmark and print a comparison"""
+    app = create_app(TestingConfig)
+    
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        response = client.post('/api/auth/register', json={
+            'username': 'bench',
+            'email': 'bench@example.com',
+            'password': 'password123'
+        })
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        results = {}
+        with mock.patch.object(auth, 'get_current_user_id', legacy_get_current_user_id):
+            results['legacy'] = measure(client, headers)
+        results['cached'] = measure(client, headers)
+        app.config['JWT_CLAIMS_ONLY'] = True
+        results['claims'] = measure(client, headers)
+    
+    print(f"{'mode':<10}{'queries/req':>14}{'decodes/req':>14}{'req/s':>10}")
+    for name, (queries, decodes, rps) in results.items():
+        print(f"{name:<10}{queries:>14.2f}{decodes:>14.2f}{rps:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Starts fresh interpreters that import the app, call create_app (and the
+startup warm-up, in warm mode) and serve their first requests through the
+test client. Reports the median time to first response (from process
+spawn), its parts and the first requests' latency, and can write the
+results as JSON for comparison across commits or checkouts.
+
+Usage:
+    python -m benchmarks.startup_bench --runs 20 --output startup.json
+    python -m benchmarks.startup_bench --project-dir ../old-checkout --output old.json
+    python -m benchmarks.startup_bench --baseline old.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+# Runs in the child interpreter; only the standard library is imported before
+# the clock starts, and only settings older checkouts also accept are used.
+# Warm-up is run as the serving entry points run it; checkouts from before
+# it existed have nothing to import and start cold in both modes.
+CHILD = """
+import sys, json, time
+started_at = time.time()
+start = time.perf_counter()
+from app import create_app
+from config import Config
+imported = time.perf_counter()
+
+class StartupConfig(Config):
+    SQLALCHEMY_DATABASE_URI = sys.argv[1]
+    WARMUP_ON_START = sys.argv[2] == '1'
+    RESPONSE_CACHE_BACKEND = 'none'
+
+app = create_app(StartupConfig)
+if StartupConfig.WARMUP_ON_START:
+    try:
+        from app.startup import warm_up
+    except ImportError:
+        pass
+    else:
+        warm_up(app)
+created = time.perf_counter()
+client = app.test_client()
+headers = {'Authorization': 'Bearer ' + sys.argv[3]}
+latencies = []
+for path in ('/api/tasks?limit=50', '/api/tasks/' + sys.argv[4], '/api/tasks?limit=20'):
+    request_start = time.perf_counter()
+    assert client.get(path, headers=headers).status_code == 200, path
+    latencies.append((time.perf_counter() - request_start) * 1000)
+    if len(latencies) == 1:
+        first_response_at = time.time()
+print(json.dumps({
+    'started_at': started_at,
+    'first_response_at': first_response_at,
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_list_ms': latencies[0],
+    'first_get_ms': latencies[1],
+    'next_list_ms': latencies[2],
+}))
+"""
+
+METRICS = ('time_to_first_response_ms', 'interpreter_ms', 'import_ms', 'create_app_ms',
+           'first_list_ms', 'first_get_ms', 'next_list_ms')
+MODES = {'cold': '0', 'warm': '1'}
+
+def prepare(workdir, users, tasks_per_user):
+    """Seed a database; returns its URI, an access token and one of the user's task ids"""
+    from app import create_app, db
+    from app.auth import generate_tokens
+    from app.models import Task
+    from app.seed import generate
+    from config import Config
+    
+    class SeedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'startup.db')
+        WARMUP_ON_START = False
+        PASSWORD_HASH_WORKERS = 0
+    
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            generate(connection, users, tasks_per_user, distribution='fixed')
+        task = Task.query.order_by(Task.id).first()
+        token, _ = generate_tokens(task.user_id)
+        db.engine.dispose()
+    return SeedConfig.SQLALCHEMY_DATABASE_URI, token, task.id
+
+def start_once(project_dir, database_uri, warmup, token, task_id):
+    """Start one interpreter and return its timings"""
+    spawned_at = time.time()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, database_uri, warmup, token, str(task_id)],
+        cwd=project_dir, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if result.returncode:
+        raise RuntimeError(f'Child failed:\n{result.stderr[-2000:]}')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['time_to_first_response_ms'] = (timings.pop('first_response_at') - spawned_at) * 1000
+    timings['interpreter_ms'] = (timings.pop('started_at') - spawned_at) * 1000
+    return timings
+
+def summarize(runs):
+    """Median of each metric over the runs"""
+    return {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+
+def git_commit(project_dir):
+    """Commit of the benchmarked checkout, if it is a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_dir,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results):
+    """Print the medians per mode"""
+    print(f"{'metric (median)':<28}" + ''.join(f'{mode:>10}' for mode in results))
+    for metric in METRICS:
+        print(f'{metric:<28}' + ''.join(f'{r[metric]:>10.1f}' for r in results.values()))
+
+def print_comparison(results, baseline):
+    """Print changes against a previous results file"""
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for mode, r in results.items():
+        old = baseline['results'].get(mode)
+        if not old:
+            continue
+        for metric in METRICS:
+            if old.get(metric):
+                change = (r[metric] - old[metric]) / old[metric] * 100
+                print(f'  {mode:<6}{metric:<28}{old[metric]:>9.1f} -> {r[metric]:>7.1f} ms ({change:+6.1f}%)')
+
+def main(argv=None):
+    """Seed, start interpreters and report"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10, help='interpreters started per mode')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks-per-user', type=float, default=50)
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='checkout whose app is started')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='compare against a previous JSON results file')
+    args = parser.parse_args(argv)
+    
+    workdir = tempfile.mkdtemp(prefix='taskapi-startup-')
+    database_uri, token, task_id = prepare(workdir, args.users, args.tasks_per_user)
+    
+    runs = {mode: [] for mode in MODES}
+    for i in range(args.runs):
+        # Alternate the modes so drift in machine load affects both alike
+        for mode, warmup in MODES.items():
+            runs[mode].append(start_once(args.project_dir, database_uri, warmup, token, task_id))
+        print(f'Run {i + 1}/{args.runs} done', file=sys.stderr)
+    results = {mode: summarize(mode_runs) for mode, mode_runs in runs.items()}
+    
+    report = {
+        'meta': {
+            'commit': git_commit(args.project_dir),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'users': args.users,
+            'tasks_per_user': args.tasks_per_user,
+        },
+        'results': results,
+    }
+    
+    print_table(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nResults written to {args.output}', file=sys.stderr)
+    return report
+
+if __name__ == '__main__':
+    main()
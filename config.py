@@ -11,10 +11,141 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Engine and connection pool (pool settings are ignored for in-memory SQLite)
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get('SQLALCHEMY_POOL_SIZE', 10))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', 20))
+    SQLALCHEMY_POOL_PRE_PING = True
+    SQLALCHEMY_POOL_RECYCLE = int(os.environ.get('SQLALCHEMY_POOL_RECYCLE', 1800))
+    SQLALCHEMY_QUERY_CACHE_SIZE = 500
+    
+    # SQLite connection settings: WAL lets writers proceed while readers hold
+    # snapshots; busy_timeout makes concurrent writers queue instead of failing
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_CACHED_STATEMENTS = 256
+    
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Authorize id-only routes from token claims without loading the User row
+    JWT_CLAIMS_ONLY = os.environ.get('JWT_CLAIMS_ONLY', 'False').lower() == 'true'
+    # Revoked tokens (logout, deleted users): 'memory' (per process) or
+    # 'database' (shared by all workers, one query per authenticated request)
+    TOKEN_REVOCATION_BACKEND = os.environ.get('TOKEN_REVOCATION_BACKEND', 'memory')
+    
+    # Password hashing: scrypt (cost = N) or pbkdf2 (cost = iterations).
+    # Hashes run on a pool of worker processes; 0 workers hashes inline.
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    PASSWORD_HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', 0)) or None
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0)) or None
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5
+    
+    # Rate limits per endpoint ('api.login') or blueprint ('api'), by client
+    # IP ('ip') and authenticated user ('user'), as '<count>/<second|minute|
+    # hour|day>'; buckets are kept in 'memory' (per process) or 'redis'
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE = os.environ.get('RATELIMIT_STORAGE', 'memory')
+    RATELIMIT_REDIS_URL = os.environ.get('RATELIMIT_REDIS_URL', 'redis://localhost:6379/0')
+    RATELIMIT_LIMITS = {
+        'api.login': {'ip': '10/minute'},
+        'api.register': {'ip': '5/minute'},
+    }
+    
+    # Admission control: requests handled at once per process (default: the
+    # database pool size plus overflow, 0 = unlimited); extra requests wait
+    # up to ADMISSION_QUEUE_TIMEOUT seconds and then get 503
+    MAX_CONCURRENT_REQUESTS = (int(os.environ['MAX_CONCURRENT_REQUESTS'])
+                               if 'MAX_CONCURRENT_REQUESTS' in os.environ else None)
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 0))
+    ADMISSION_EXEMPT_ENDPOINTS = ('api.health_check', 'api.prometheus_metrics')
+    
+    # Request metrics exposed at /api/metrics; queries slower than the
+    # threshold are logged with their parameters to the app.slow_query logger
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    
+    # Response compression negotiated from Accept-Encoding; brotli ('br')
+    # and zstd are used when their packages are installed, preferred in
+    # this order when the client accepts several. COMPRESSION_CACHE_MAX_BYTES
+    # bounds the cache of compressed bodies of responses with an ETag.
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_ALGORITHMS = ('br', 'zstd', 'gzip')
+    COMPRESSION_LEVELS = {
+        'br': int(os.environ.get('COMPRESSION_LEVEL_BR', 4)),
+        'zstd': int(os.environ.get('COMPRESSION_LEVEL_ZSTD', 3)),
+        'gzip': int(os.environ.get('COMPRESSION_LEVEL_GZIP', 6)),
+    }
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+    COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Pagination
+    TASKS_PER_PAGE = int(os.environ.get('TASKS_PER_PAGE', 100))
+    TASKS_MAX_PER_PAGE = 1000
+    USERS_PER_PAGE = int(os.environ.get('USERS_PER_PAGE', 100))
+    USERS_MAX_PER_PAGE = 1000
+    TASKS_BULK_MAX = int(os.environ.get('TASKS_BULK_MAX', 1000))
+    # Rows fetched per round trip by the streaming export
+    TASKS_EXPORT_BATCH_SIZE = int(os.environ.get('TASKS_EXPORT_BATCH_SIZE', 1000))
+    
+    # Async serving mode (asgi.py): database URI for the async engine; by
+    # default the SQLALCHEMY_DATABASE_URI with its async driver
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URI')
+    # Threads running the routes passed to the Flask app (writes, event
+    # streams); every open event stream holds one
+    ASYNC_WSGI_THREADS = int(os.environ.get('ASYNC_WSGI_THREADS', 64))
+    
+    # Task search: 'fts5' (SQLite FTS5), 'table' (built-in inverted index) or
+    # 'auto' to use FTS5 whenever the SQLite build supports it
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    
+    # Delta sync: tombstones of deleted tasks older than this are pruned by
+    # `flask prune-tombstones`; clients with older sync tokens must resync
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    
+    # Due-date tracking: open tasks due within the next window are kept in a
+    # heap; a background thread in each process (or `flask run-scheduler`
+    # as a separate worker) publishes task.overdue events, and processes
+    # without either track deadlines without publishing
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SCHEDULER_THREAD = os.environ.get('SCHEDULER_THREAD', 'True').lower() == 'true'
+    SCHEDULER_INTERVAL_SECONDS = float(os.environ.get('SCHEDULER_INTERVAL_SECONDS', 5))
+    SCHEDULER_WINDOW_MINUTES = int(os.environ.get('SCHEDULER_WINDOW_MINUTES', 60))
+    
+    # Pre-fork server (serve.py): one worker process per core by default, or
+    # a single worker while any cache, revocation, event or rate-limit state
+    # is kept in process memory, the scheduler thread is on or metrics (kept
+    # per process) are enabled (see app.prefork). Workers are replaced after
+    # SERVER_MAX_REQUESTS requests (0 = never), plus a random jitter so they
+    # do not all restart at once
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5001')
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 0)) or None
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 0))
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 0))
+    SERVER_GRACEFUL_TIMEOUT = float(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))
+    SERVER_ACCESS_LOG = os.environ.get('SERVER_ACCESS_LOG', 'False').lower() == 'true'
+    
+    # Run the hot queries once when serve.py or asgi.py starts (not when
+    # scripts or the flask CLI create the app), so the first request does
+    # not pay for compiling them
+    WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'True').lower() == 'true'
+    
+    # Response cache for task reads: 'memory' (per-process LRU), 'redis' or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_MAX_ENTRIES = 10000
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Task change events (GET /api/tasks/stream): 'memory' (single process),
+    # 'redis' (shared between workers) or 'none' to disable
+    EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'memory')
+    EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -23,8 +154,16 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+    SQLALCHEMY_POOL_SIZE = int(os.environ.get('SQLALCHEMY_POOL_SIZE', 20))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', 40))
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:' 
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PASSWORD_HASH_ALGORITHM = 'pbkdf2'
+    PASSWORD_HASH_COST = 1000
+    PASSWORD_HASH_WORKERS = 0
+    RATELIMIT_ENABLED = False
+    SCHEDULER_THREAD = False 
+    WARMUP_ON_START = False
\ No newline at end of file
@@ -1,3 +1,5 @@
+import time
+import click
 from app import create_app, db
 from app.models import User, Task
 
@@ -12,5 +14,121 @@ def make_shell_context():
         'Task': Task
     }
 
+@app.cli.command('seed')
+@click.option('--users', default=1000, show_default=True, help='Users to create')
+@click.option('--tasks-per-user', default=20.0, show_default=True, help='Mean tasks per user')
+@click.option('--distribution', type=click.Choice(['fixed', 'uniform', 'exponential', 'pareto']),
+              default='pareto', show_default=True, help='Distribution of tasks per user')
+@click.option('--status', 'status_weights', default='pending=5,in_progress=2,completed=3',
+              show_default=True, help='Relative frequency of each status')
+@click.option('--priority', 'priority_weights', default='low=3,medium=5,high=2',
+              show_default=True, help='Relative frequency of each priority')
+@click.option('--due-days', default='-30:90', show_default=True,
+              help='Range of due dates in days from the epoch')
+@click.option('--no-due-ratio', default=0.2, show_default=True, help='Share of tasks without a due date')
+@click.option('--seed', 'seed_value', default=42, show_default=True, help='Random seed')
+@click.option('--epoch', type=click.DateTime(), help='Reference date (default: today)')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per INSERT batch')
+def seed_command(users, tasks_per_user, distribution, status_weights, priority_weights, due_days,
+                 no_due_ratio, seed_value, epoch, chunk_size):
+    """Load deterministic synthetic users and tasks in bulk"""
+    from app.seed import generate, parse_weights
+    from app.search import rebuild_index
+    from app.stats import STATUSES, PRIORITIES, rebuild_stats
+    
+    try:
+        statuses = parse_weights(status_weights)
+        priorities = parse_weights(priority_weights)
+        low, _, high = due_days.rpartition(':')
+        due_range = (int(low), int(high))
+    except ValueError as err:
+        raise click.BadParameter(str(err))
+    unknown = (statuses.keys() - set(STATUSES)) | (priorities.keys() - set(PRIORITIES))
+    if unknown:
+        raise click.BadParameter(f"Unknown status or priority: {', '.join(sorted(unknown))}")
+    
+    started = {}
+    
+    def progress(table, done, total):
+        start = started.setdefault(table, time.perf_counter())
+        if not done:
+            return
+        rate = done / (time.perf_counter() - start)
+        click.echo(f'{table}: {done:,}/{total:,} rows ({rate:,.0f} rows/s)', err=True)
+    
+    db.create_all()
+    start = time.perf_counter()
+    with db.engine.connect() as connection:
+        created_users, created_tasks = generate(
+            connection, users, tasks_per_user, distribution, statuses, priorities, due_range,
+            no_due_ratio, seed_value, epoch, chunk_size, progress=progress
+        )
+    loaded = time.perf_counter() - start
+    click.echo(f'Loaded {created_users:,} users and {created_tasks:,} tasks in {loaded:.1f}s '
+               f'({(created_users + created_tasks) / loaded:,.0f} rows/s)')
+    
+    start = time.perf_counter()
+    rebuild_stats()
+    rebuild_index()
+    click.echo(f'Rebuilt statistics and search index in {time.perf_counter() - start:.1f}s')
+
+@app.cli.command('run-scheduler')
+def run_scheduler_command():
+    """Publish task.overdue events from this process (set SCHEDULER_THREAD=False on web workers)"""
+    from app.scheduler import scheduler
+    click.echo('Deadline scheduler running; press Ctrl+C to stop')
+    try:
+        scheduler.run(app.config['SCHEDULER_INTERVAL_SECONDS'])
+    except KeyboardInterrupt:
+        pass
+
+@app.cli.command('profile-startup')
+@click.option('--top', default=20, show_default=True, help='Modules to list')
+def profile_startup_command(top):
+    """Report per-module import costs of create_app (from python -X importtime)"""
+    from app.startup import profile_imports, by_package
+    imports = profile_imports()
+    click.echo(f"{'self ms':>9}{'cumul ms':>10}  module")
+    for module, self_us, cumulative_us in imports[:top]:
+        click.echo(f'{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}  {module}')
+    click.echo(f"\n{'self ms':>9}  package")
+    for package, self_us in by_package(imports)[:top]:
+        click.echo(f'{self_us / 1000:>9.1f}  {package}')
+    total = sum(self_us for _, self_us, _ in imports)
+    click.echo(f'\n{len(imports)} modules imported in {total / 1000:.1f} ms')
+
+@app.cli.command('set-admin')
+@click.argument('username')
+@click.option('--revoke', is_flag=True, help='Remove admin rights instead')
+def set_admin_command(username, revoke):
+    """Grant (or revoke) access to the admin endpoints"""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.BadParameter(f'No user named {username!r}', param_hint='USERNAME')
+    user.is_admin = not revoke
+    db.session.commit()
+    click.echo(f"{username} is {'no longer ' if revoke else ''}an admin")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the task_stats table from the task table"""
+    from app.stats import rebuild_stats
+    users = rebuild_stats()
+    click.echo(f'Rebuilt task statistics for {users} users')
+
+@app.cli.command('prune-tombstones')
+def prune_tombstones_command():
+    """Delete delta-sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"""
+    from app.sync import prune_tombstones
+    deleted = prune_tombstones(app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+    click.echo(f'Pruned {deleted} tombstones')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Reindex every task for GET /api/tasks/search"""
+    from app.search import rebuild_index
+    tasks = rebuild_index()
+    click.echo(f'Indexed {tasks} tasks')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
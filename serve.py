@@ -0,0 +1,52 @@
+import gc
+
+# Collections before the fork would touch (and so unshare) the pages of every
+# object the workers inherit; gc is frozen right before forking instead
+gc.disable()
+
+import sys
+import logging
+import argparse
+from app import create_app
+from app.prefork import PreforkServer
+from app.startup import warm_up
+
+def main(argv=None):
+    """Run the app on the pre-fork server; command-line options override the config"""
+    parser = argparse.ArgumentParser(description='Pre-fork production server')
+    parser.add_argument('--bind', help='host:port to listen on (SERVER_BIND)')
+    parser.add_argument('--workers', type=int, help='worker processes (SERVER_WORKERS, default: one per core with shared state)')
+    parser.add_argument('--max-requests', type=int, help='recycle a worker after this many requests')
+    parser.add_argument('--max-requests-jitter', type=int, help='random extra requests before recycling')
+    parser.add_argument('--graceful-timeout', type=float, help='seconds to finish requests on shutdown')
+    parser.add_argument('--access-log', action='store_true', default=None, help='log every request')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s')
+    app = create_app()
+    config = app.config
+    
+    def option(name, key):
+        value = getattr(args, name)
+        return config[key] if value is None else value
+    
+    if not option('access_log', 'SERVER_ACCESS_LOG'):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    try:
+        server = PreforkServer(
+            app,
+            bind=option('bind', 'SERVER_BIND'),
+            workers=option('workers', 'SERVER_WORKERS'),
+            max_requests=option('max_requests', 'SERVER_MAX_REQUESTS'),
+            max_requests_jitter=option('max_requests_jitter', 'SERVER_MAX_REQUESTS_JITTER'),
+            graceful_timeout=option('graceful_timeout', 'SERVER_GRACEFUL_TIMEOUT'),
+        )
+    except ValueError as err:
+        parser.error(str(err))
+    if config['WARMUP_ON_START']:
+        # In the master, so every forked worker starts warm
+        warm_up(app)
+    return server.run()
+
+if __name__ == '__main__':
+    sys.exit(main())
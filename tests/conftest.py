@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from config import TestingConfig
+
+@pytest.fixture
+def app():
+    """Create application for testing"""
+    app = create_app(TestingConfig)
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Create test client"""
+    return app.test_client()
+
+@pytest.fixture
+def register(client):
+    """Return a helper that registers a user and returns auth headers"""
+    def _register(username='testuser', password='password123'):
+        response = client.post('/api/auth/register', json={
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': password
+        })
+        assert response.status_code == 201
+        token = response.get_json()['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    return _register
+
+@pytest.fixture
+def auth_headers(register):
+    """Authorization headers for a freshly registered user"""
+    return register()
+
+@pytest.fixture
+def queries(app):
+    """Record every SQL statement executed while the test runs"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+# Opcodes that skip a row inside a scan loop, i.e. a WHERE filter
+FILTER_OPCODES = {'Eq', 'Ne', 'Lt', 'Le', 'Gt', 'Ge', 'If', 'IfNot', 'IsNull', 'NotNull'}
+
+def limited_scan(conn, statement, parameters):
+    """Whether the statement's scan loop filters no rows and ends on its LIMIT"""
+    program = [row[1] for row in conn.exec_driver_sql(f'EXPLAIN {statement}', parameters)]
+    if 'Rewind' not in program or 'Next' not in program:
+        return False
+    loop = program[program.index('Rewind') + 1:program.index('Next')]
+    return 'DecrJumpZero' in loop and not FILTER_OPCODES & set(loop)
+
+@pytest.fixture
+def query_plans(app):
+    """Fail the test if any SELECT it issued needs a full table scan on SQLite
+    
+    Statements are captured while the test runs and replayed afterwards with
+    ``EXPLAIN QUERY PLAN``; any unindexed ``SCAN <table>`` step is reported.
+    A plan that is a single scan in the requested order, whose loop filters
+    nothing and is stopped by LIMIT, only reads one page, so it passes.
+    """
+    selects = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            selects.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield selects
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    
+    full_scans = []
+    with db.engine.connect() as conn:
+        tables = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars())
+        for statement, parameters in selects:
+            plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            paged = len(plan) == 1 and limited_scan(conn, statement, parameters)
+            for detail in plan:
+                if not detail.startswith('SCAN ') or detail.split()[1] not in tables:
+                    continue  # not a table (e.g. a subquery result)
+                # A virtual table scan with constraints (e.g. an FTS5 MATCH) is an index lookup
+                indexed = 'USING' in detail or (
+                    'VIRTUAL TABLE INDEX' in detail and not detail.endswith(':')
+                )
+                if not indexed and not paged:
+                    full_scans.append(f'{detail}: {statement}')
+    assert not full_scans, 'Full table scans:\n' + '\n'.join(full_scans)
@@ -0,0 +1,204 @@
+import json
+import time
+import asyncio
+import threading
+from unittest import mock
+import pytest
+from app import db
+from config import TestingConfig
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from app.asgi import create_asgi_app
+
+def http_scope(method, path, headers=None, body=None):
+    """ASGI scope and request body of one HTTP request"""
+    path, _, query = path.partition('?')
+    raw = json.dumps(body).encode() if body is not None else b''
+    headers = dict(headers or {})
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+                   + [(b'content-length', str(len(raw)).encode())],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 12345),
+    }
+    return scope, raw
+
+def receiver(raw):
+    """ASGI receive callable delivering ``raw`` and then waiting forever"""
+    messages = [{'type': 'http.request', 'body': raw, 'more_body': False}]
+    
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+    return receive
+
+async def call(app, method, path, headers=None, body=None):
+    """Send one HTTP request through an ASGI app; returns (status, headers, body)"""
+    scope, raw = http_scope(method, path, headers, body)
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app(scope, receiver(raw), send)
+    start = sent[0]
+    return (start['status'], {k.decode(): v.decode() for k, v in start['headers']},
+            b''.join(m.get('body', b'') for m in sent[1:]))
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    class AsgiTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+        EVENTS_HEARTBEAT_SECONDS = 0.1
+    
+    asgi_app = create_asgi_app(AsgiTestingConfig)
+    with asgi_app.flask_app.app_context():
+        db.create_all()
+    yield asgi_app
+    asyncio.run(asgi_app.engine.dispose())
+    asgi_app.executor.shutdown()
+
+@pytest.fixture
+def sync_client(asgi_app):
+    return asgi_app.flask_app.test_client()
+
+@pytest.fixture
+def headers(sync_client):
+    response = sync_client.post('/api/auth/register', json={
+        'username': 'asyncuser', 'email': 'asyncuser@example.com', 'password': 'password123'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def test_task_list_matches_sync_app(asgi_app, sync_client, headers):
+    for i in range(3):
+        sync_client.post('/api/tasks', json={'title': f'Task {i}', 'priority': 'high'}, headers=headers)
+    
+    for path in ('/api/tasks', '/api/tasks?priority=high&per_page=2',
+                 '/api/tasks?status=nope'):
+        expected = sync_client.get(path, headers=headers)
+        status, response_headers, body = asyncio.run(call(asgi_app, 'GET', path, headers))
+        assert status == expected.status_code
+        assert body == expected.data
+        assert response_headers.get('etag') == expected.headers.get('ETag')
+
+def test_task_detail_and_conditional_get(asgi_app, sync_client, headers):
+    task_id = sync_client.post('/api/tasks', json={'title': 'Detail'}, headers=headers).get_json()['id']
+    
+    status, response_headers, body = asyncio.run(call(asgi_app, 'GET', f'/api/tasks/{task_id}', headers))
+    assert status == 200
+    assert json.loads(body)['title'] == 'Detail'
+    
+    status, _, body = asyncio.run(call(
+        asgi_app, 'GET', f'/api/tasks/{task_id}', {**headers, 'If-None-Match': response_headers['etag']}
+    ))
+    assert status == 304
+    assert body == b''
+    
+    status, _, _ = asyncio.run(call(asgi_app, 'GET', f'/api/tasks/{task_id + 1}', headers))
+    assert status == 404
+
+def test_requires_authentication(asgi_app):
+    status, _, body = asyncio.run(call(asgi_app, 'GET', '/api/tasks'))
+    assert status == 401
+    assert json.loads(body) == {'error': 'Authentication required'}
+
+def test_login(asgi_app, headers):
+    credentials = {'username': 'asyncuser', 'password': 'password123'}
+    status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/auth/login', body=credentials))
+    assert status == 200
+    assert json.loads(body)['user']['username'] == 'asyncuser'
+    
+    status, _, _ = asyncio.run(call(asgi_app, 'POST', '/api/auth/login',
+                                    body={**credentials, 'password': 'wrong'}))
+    assert status == 401
+
+def test_writes_go_through_wsgi(asgi_app, sync_client, headers):
+    status, _, body = asyncio.run(call(asgi_app, 'POST', '/api/tasks', headers, {'title': 'Via WSGI'}))
+    assert status == 201
+    
+    # The ORM listeners ran, so stats and the list agree
+    stats = sync_client.get('/api/tasks/stats', headers=headers).get_json()
+    assert stats['total'] == 1
+    status, _, body = asyncio.run(call(asgi_app, 'GET', '/api/tasks', headers))
+    assert [task['title'] for task in json.loads(body)] == ['Via WSGI']
+
+def test_writes_while_a_stream_is_open(asgi_app, headers):
+    async def scenario():
+        scope, raw = http_scope('GET', '/api/tasks/stream', headers)
+        chunks = asyncio.Queue()
+        disconnected = False
+        
+        async def send(message):
+            if disconnected:
+                raise OSError('client disconnected')
+            if message.get('body'):
+                await chunks.put(message['body'])
+        
+        stream = asyncio.create_task(asgi_app(scope, receiver(raw), send))
+        assert (await asyncio.wait_for(chunks.get(), 5)).startswith(b'retry:')
+        
+        status, _, _ = await asyncio.wait_for(
+            call(asgi_app, 'POST', '/api/tasks', headers, {'title': 'While streaming'}), 5)
+        assert status == 201
+        while True:
+            chunk = await asyncio.wait_for(chunks.get(), 5)
+            if chunk.startswith(b'event: task.created'):
+                break
+        
+        disconnected = True
+        with pytest.raises(OSError):
+            await asyncio.wait_for(stream, 5)
+    
+    asyncio.run(scenario())
+
+def test_blocking_backend_does_not_stall_the_loop(asgi_app, sync_client, headers):
+    task_id = sync_client.post('/api/tasks', json={'title': 'T'}, headers=headers).get_json()['id']
+    backend = asgi_app.flask_app.extensions['response_cache']['backend']
+    original_get, release = backend.get, threading.Event()
+    
+    def slow_get(key):
+        # The list lookup waits on the backend, like a slow redis round trip
+        if key.endswith('/api/tasks?'):
+            release.wait(3)
+        return original_get(key)
+    
+    async def scenario():
+        start = time.monotonic()
+        slow = asyncio.create_task(call(asgi_app, 'GET', '/api/tasks', headers))
+        await asyncio.sleep(0.1)
+        status, _, _ = await call(asgi_app, 'GET', f'/api/tasks/{task_id}', headers)
+        elapsed = time.monotonic() - start
+        release.set()
+        return status, elapsed, (await slow)[0]
+    
+    with mock.patch.object(backend, 'get', slow_get):
+        status, elapsed, slow_status = asyncio.run(scenario())
+    assert status == slow_status == 200
+    assert elapsed < 1
+
+def test_concurrent_requests(asgi_app, sync_client, headers):
+    sync_client.post('/api/tasks', json={'title': 'Shared'}, headers=headers)
+    
+    async def burst():
+        return await asyncio.gather(*(call(asgi_app, 'GET', '/api/tasks', headers) for _ in range(20)))
+    
+    results = asyncio.run(burst())
+    assert {status for status, _, _ in results} == {200}
+    assert len({body for _, _, body in results}) == 1
+
+def test_memory_database_uses_wsgi_only():
+    asgi_app = create_asgi_app(TestingConfig)
+    assert asgi_app.engine is None
+    with asgi_app.flask_app.app_context():
+        db.create_all()
+        status, _, _ = asyncio.run(call(asgi_app, 'GET', '/api/tasks'))
+        db.session.remove()
+        db.drop_all()
+    assert status == 401
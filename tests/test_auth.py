@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+from unittest import mock
+from app import auth, create_app, db
+from config import TestingConfig
+
+def test_task_request_decodes_token_once(client, auth_headers):
+    """Stacked auth decorators share one decoded token per request"""
+    with mock.patch.object(auth, 'verify_token', wraps=auth.verify_token) as verify:
+        response = client.get('/api/tasks', headers=auth_headers)
+    assert response.status_code == 200
+    assert verify.call_count == 1
+
+def test_task_request_loads_user_once(client, auth_headers, queries):
+    """Stacked auth decorators share one User lookup per request"""
+    response = client.get('/api/tasks', headers=auth_headers)
+    assert response.status_code == 200
+    user_queries = [q for q in queries if 'FROM user' in q]
+    assert len(user_queries) == 1
+
+def test_auth_context_is_reset_between_requests(client, auth_headers):
+    """A cached user does not leak into the next, unauthenticated request"""
+    assert client.get('/api/tasks', headers=auth_headers).status_code == 200
+    assert client.get('/api/tasks').status_code == 401
+
+def test_claims_only_mode_skips_user_lookup(app, client, auth_headers, queries):
+    """In claims-only mode task routes authorize without a User query"""
+    app.config['JWT_CLAIMS_ONLY'] = True
+    response = client.get('/api/tasks', headers=auth_headers)
+    assert response.status_code == 200
+    assert not [q for q in queries if 'FROM user' in q]
+
+def test_logout_revokes_access_token(app, client, auth_headers):
+    """A logged-out token is rejected in both auth modes"""
+    assert client.post('/api/auth/logout', headers=auth_headers).status_code == 200
+    assert client.get('/api/tasks', headers=auth_headers).status_code == 401
+    app.config['JWT_CLAIMS_ONLY'] = True
+    assert client.get('/api/tasks', headers=auth_headers).status_code == 401
+
+def test_deleted_user_tokens_are_revoked(app, client, register):
+    """Deleting a user revokes tokens that claims-only mode would still accept"""
+    app.config['JWT_CLAIMS_ONLY'] = True
+    admin_headers = register('admin')
+    victim_headers = register('victim')
+    victim_id = client.get('/api/auth/me', headers=victim_headers).get_json()['id']
+    
+    assert client.delete(f'/api/users/{victim_id}', headers=admin_headers).status_code == 204
+    assert client.get('/api/tasks', headers=victim_headers).status_code == 401
+    assert client.get('/api/tasks', headers=admin_headers).status_code == 200
+
+def test_reused_user_id_is_not_revoked(app, client, register):
+    """A new user given a deleted user's id right away is not caught by the cutoff"""
+    app.config['JWT_CLAIMS_ONLY'] = True
+    admin_headers = register('admin')
+    gone_headers = register('gone')
+    gone_id = client.get('/api/auth/me', headers=gone_headers).get_json()['id']
+    assert client.delete(f'/api/users/{gone_id}', headers=admin_headers).status_code == 204
+    
+    new_headers = register('newcomer')
+    assert client.get('/api/auth/me', headers=new_headers).get_json()['id'] == gone_id
+    assert client.get('/api/tasks', headers=new_headers).status_code == 200
+    assert client.get('/api/tasks', headers=gone_headers).status_code == 401
+
+def test_user_cutoffs_are_sub_second_and_expire(app, monkeypatch):
+    """Cutoffs spare tokens issued later in the same second and are dropped after the token lifetime"""
+    clock = [1000.25]
+    monkeypatch.setattr(auth, 'time', SimpleNamespace(time=lambda: clock[0]))
+    ttl = int(app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+    memory = auth.TokenRevocationCache(ttl)
+    for revocations in (memory, auth.DatabaseRevocations(ttl)):
+        revocations.revoke_user(1)
+        assert revocations.is_revoked({'user_id': 1, 'iat': 1000.1, 'jti': 'old'})
+        assert not revocations.is_revoked({'user_id': 1, 'iat': 1000.5, 'jti': 'new'})
+    
+    clock[0] += ttl + 1
+    memory.revoke_user(2)
+    assert list(memory._users) == [2]
+
+def test_database_revocations_are_shared(tmp_path):
+    """Revocations in the database reach every app using it, like other workers"""
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'shared.db'}"
+        TOKEN_REVOCATION_BACKEND = 'database'
+    
+    first, second = create_app(SharedConfig), create_app(SharedConfig)
+    with first.app_context():
+        db.create_all()
+    tokens = first.test_client().post('/api/auth/register', json={
+        'username': 'shared', 'email': 'shared@example.com', 'password': 'password123'
+    }).get_json()
+    headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+    assert second.test_client().get('/api/tasks', headers=headers).status_code == 200
+    
+    assert first.test_client().post('/api/auth/logout', headers=headers).status_code == 200
+    assert second.test_client().get('/api/tasks', headers=headers).status_code == 401
+    for app in (first, second):
+        with app.app_context():
+            db.engine.dispose()
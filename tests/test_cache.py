@@ -0,0 +1,81 @@
+from unittest import mock
+import pytest
+from app import db
+from app.api.tasks import task_response
+from app.cache import response_cache, RedisBackend
+from app.models import Task
+
+class FakeRedis:
+    """Local stand-in for the subset of redis-py used by RedisBackend"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache_backend(request, app):
+    """Run a test against both cache backends"""
+    if request.param == 'redis':
+        response_cache.init_app(app, backend=RedisBackend(FakeRedis()))
+    return request.param
+
+def test_task_list_is_served_from_cache(client, auth_headers, cache_backend):
+    """A repeated read is a hit; a write invalidates the user's entries"""
+    first = client.get('/api/tasks?status=pending', headers=auth_headers)
+    second = client.get('/api/tasks?status=pending', headers=auth_headers)
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json() == []
+    
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'New'})
+    third = client.get('/api/tasks?status=pending', headers=auth_headers)
+    assert third.headers['X-Cache'] == 'MISS'
+    assert [task['title'] for task in third.get_json()] == ['New']
+    
+    stats = client.get('/api/cache/stats', headers=auth_headers).get_json()
+    assert (stats['hits'], stats['misses'], stats['invalidations']) == (1, 2, 1)
+
+def test_cache_is_per_user(client, register):
+    """One user's cached list is never served to another"""
+    alice, bob = register('alice'), register('bob')
+    client.post('/api/tasks', headers=alice, json={'title': 'Alice task'})
+    client.get('/api/tasks', headers=alice)
+    response = client.get('/api/tasks', headers=bob)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json() == []
+
+def test_status_patch_invalidates_single_task(client, auth_headers):
+    """Reads of a single task see status changes immediately"""
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'}).get_json()['id']
+    client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    client.patch(f'/api/tasks/{task_id}/status', headers=auth_headers, json={'status': 'completed'})
+    response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['status'] == 'completed'
+
+def test_read_overlapping_a_write_is_not_cached(client, auth_headers, cache_backend):
+    """A body computed before an invalidation is never served after it"""
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'Old'}).get_json()['id']
+    
+    def render_then_concurrent_write(task):
+        response = task_response(task)
+        Task.query.filter_by(id=task_id).update({'title': 'New'})
+        db.session.commit()
+        response_cache.invalidate_user(task.user_id)
+        return response
+    
+    with mock.patch('app.api.tasks.task_response', render_then_concurrent_write):
+        overlapped = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert overlapped.get_json()['title'] == 'Old'
+    response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['title'] == 'New'
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+def create_tasks(client, headers, count=20):
+    for i in range(count):
+        response = client.post('/api/tasks', headers=headers, json={
+            'title': f'Task {i}', 'description': 'Long description. ' * 50
+        })
+        assert response.status_code == 201
+
+def test_large_list_is_gzipped(client, auth_headers):
+    create_tasks(client, auth_headers)
+    plain = client.get('/api/tasks', headers=auth_headers)
+    assert 'Content-Encoding' not in plain.headers
+    
+    response = client.get('/api/tasks', headers={**auth_headers, **GZIP})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) < len(plain.data) / 5
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+    # Each content-coding has its own strong ETag
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + ';gzip"'
+    
+    # Conditional requests match either form; a 304 repeats the tag sent
+    for etag in (response.headers['ETag'], plain.headers['ETag']):
+        revalidated = client.get('/api/tasks', headers={**auth_headers, **GZIP, 'If-None-Match': etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == etag
+        assert 'Accept-Encoding' in revalidated.headers['Vary']
+
+def test_if_match_accepts_encoded_etag(client, auth_headers):
+    created = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'})
+    task_id, etag = created.get_json()['id'], created.headers['ETag']
+    encoded = etag[:-1] + ';br"'
+    response = client.put(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-Match': encoded},
+                          json={'title': 'Renamed'})
+    assert response.status_code == 200
+    response = client.put(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-Match': encoded},
+                          json={'title': 'Stale'})
+    assert response.status_code == 412
+
+def test_small_and_refused_responses_are_not_compressed(client, auth_headers):
+    assert 'Content-Encoding' not in client.get('/api/health', headers=GZIP).headers
+    create_tasks(client, auth_headers)
+    for accept in ('identity', 'gzip;q=0', 'br'):
+        response = client.get('/api/tasks', headers={**auth_headers, 'Accept-Encoding': accept})
+        assert 'Content-Encoding' not in response.headers
+
+def test_streamed_export_is_compressed(client, auth_headers):
+    create_tasks(client, auth_headers)
+    plain = client.get('/api/tasks/export', headers=auth_headers)
+    response = client.get('/api/tasks/export', headers={**auth_headers, **GZIP})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == plain.data
+
+def test_compressed_bodies_are_cached_and_measured(client, auth_headers):
+    create_tasks(client, auth_headers)
+    first = client.get('/api/tasks', headers={**auth_headers, **GZIP})
+    second = client.get('/api/tasks', headers={**auth_headers, **GZIP})
+    assert second.data == first.data
+    
+    text = client.get('/api/metrics').get_data(as_text=True)
+    assert 'http_response_compression_cache_total{result="hit"} 1' in text
+    assert 'http_response_compression_cache_total{result="miss"} 1' in text
+    assert 'http_response_compression_cpu_seconds_count{route="/api/tasks",method="GET",encoding="gzip"} 1' in text
+    assert 'http_response_compression_bytes_total{encoding="gzip",size="original"}' in text
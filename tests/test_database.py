@@ -0,0 +1,101 @@
+import threading
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.database import engine_options
+from config import Config, TestingConfig
+
+def make_file_config(path, journal='WAL', busy_timeout=5000):
+    """Testing configuration backed by a SQLite file"""
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLITE_JOURNAL_MODE = journal
+        SQLITE_BUSY_TIMEOUT_MS = busy_timeout
+    return FileConfig
+
+def register(client, username):
+    """Register a user and return auth headers"""
+    token = client.post('/api/auth/register', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'password123'
+    }).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+def test_engine_options_per_database():
+    """Pool sizing applies to pooled engines only"""
+    memory = engine_options({**vars(Config), 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    assert 'pool_size' not in memory
+    assert memory['connect_args'] == {'cached_statements': Config.SQLITE_CACHED_STATEMENTS}
+    
+    postgres = engine_options({**vars(Config), 'SQLALCHEMY_DATABASE_URI': 'postgresql://db/tasks'})
+    assert postgres['pool_size'] == Config.SQLALCHEMY_POOL_SIZE
+    assert postgres['pool_pre_ping'] is True
+    assert 'connect_args' not in postgres
+
+def test_sqlite_pragmas_applied(tmp_path):
+    """File databases run in WAL mode with a busy timeout; SQLite's other defaults stay"""
+    app = create_app(make_file_config(tmp_path / 'pragmas.db'))
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+            assert conn.exec_driver_sql('PRAGMA foreign_keys').scalar() == 0
+
+@pytest.mark.parametrize('journal', ['DELETE', 'WAL'])
+def test_writer_during_open_read_transaction(tmp_path, journal):
+    """A long reader locks writers out in rollback-journal mode, not in WAL"""
+    app = create_app(make_file_config(tmp_path / 'reader.db', journal, busy_timeout=100))
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    headers = register(client, 'writer')
+    client.post('/api/tasks/bulk', headers=headers,
+                json={'tasks': [{'title': f'Existing {i}'} for i in range(50)]})
+    
+    with app.app_context(), db.engine.connect() as reader:
+        # A partially consumed cursor keeps its read lock / snapshot open
+        rows = reader.exec_driver_sql('SELECT * FROM task')
+        rows.fetchone()
+        if journal == 'WAL':
+            response = client.post('/api/tasks', headers=headers, json={'title': 'New'})
+            assert response.status_code == 201
+        else:
+            with pytest.raises(OperationalError, match='database is locked'):
+                client.post('/api/tasks', headers=headers, json={'title': 'New'})
+        rows.close()
+
+def test_parallel_writers_do_not_hit_locked_database(tmp_path):
+    """Concurrent writers and readers on a SQLite file all succeed"""
+    app = create_app(make_file_config(tmp_path / 'concurrency.db'))
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    headers = [register(client, f'writer{i}') for i in range(8)]
+    
+    failures = []
+    start = threading.Barrier(len(headers))
+    
+    def writer(auth):
+        client = app.test_client()
+        start.wait()
+        for i in range(15):
+            response = client.post('/api/tasks', headers=auth, json={'title': f'Task {i}'})
+            if response.status_code != 201:
+                failures.append(response.status_code)
+                continue
+            task_id = response.get_json()['id']
+            response = client.put(f'/api/tasks/{task_id}', headers=auth, json={'status': 'completed'})
+            if response.status_code != 200:
+                failures.append(response.status_code)
+            client.get('/api/tasks', headers=auth)
+    
+    threads = [threading.Thread(target=writer, args=(auth,)) for auth in headers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert failures == []
+    with app.app_context():
+        assert db.session.execute(db.text('SELECT count(*) FROM task')).scalar() == 8 * 15
+        db.session.remove()
@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest import mock
+from sqlalchemy import update
+from app import db
+from app.etags import precondition_failed
+from app.models import Task
+
+def test_task_conditional_get(client, auth_headers):
+    """A matching If-None-Match gets 304; a change produces a new ETag"""
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'}).get_json()['id']
+    response = client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    etag = response.headers['ETag']
+    
+    cached = client.get(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    
+    client.patch(f'/api/tasks/{task_id}/status', headers=auth_headers, json={'status': 'completed'})
+    changed = client.get(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_task_list_conditional_get(client, auth_headers):
+    """Polling an unchanged task list returns 304, also from the cache"""
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'T'})
+    etag = client.get('/api/tasks', headers=auth_headers).headers['ETag']
+    for _ in range(2):
+        response = client.get('/api/tasks', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+    
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'U'})
+    response = client.get('/api/tasks', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+
+def test_update_task_if_match(client, auth_headers):
+    """PUT with a stale If-Match is rejected with 412"""
+    created = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'})
+    task_id, etag = created.get_json()['id'], created.headers['ETag']
+    
+    first = client.put(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-Match': etag},
+                       json={'title': 'First'})
+    assert first.status_code == 200
+    second = client.put(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-Match': etag},
+                        json={'title': 'Second'})
+    assert second.status_code == 412
+
+def test_update_task_if_match_is_atomic(client, auth_headers):
+    """A write landing after the If-Match check still makes the PUT fail with 412"""
+    created = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'})
+    task_id, etag = created.get_json()['id'], created.headers['ETag']
+    
+    def check_then_concurrent_write(current):
+        failed = precondition_failed(current)
+        db.session.execute(update(Task.__table__).where(Task.id == task_id)
+                           .values(updated_at=datetime.utcnow()))
+        return failed
+    
+    with mock.patch('app.api.tasks.precondition_failed', check_then_concurrent_write):
+        response = client.put(f'/api/tasks/{task_id}', headers={**auth_headers, 'If-Match': etag},
+                              json={'title': 'Lost'})
+    assert response.status_code == 412
+    assert client.get(f'/api/tasks/{task_id}', headers=auth_headers).get_json()['title'] == 'T'
+
+def test_user_resources_conditional_get(client, auth_headers):
+    """User list and user detail honor If-None-Match"""
+    for url in ('/api/users', '/api/users/1'):
+        etag = client.get(url, headers=auth_headers).headers['ETag']
+        response = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304, url
@@ -0,0 +1,136 @@
+import json
+import queue
+import pytest
+from app import create_app, db
+from app.events import event_bus, RedisBroker
+from config import TestingConfig
+
+class FakePubSubRedis:
+    """Local stand-in for the subset of redis-py pub/sub used by RedisBroker
+
+    Clients created from the same instance share channels, like separate
+    worker processes connected to one Redis server.
+    """
+    
+    def __init__(self):
+        self.listeners = []
+    
+    def publish(self, channel, message):
+        for listener in self.listeners:
+            listener.put({'type': 'message', 'channel': channel, 'data': message.encode()})
+    
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.messages = queue.Queue()
+    
+    def subscribe(self, channel):
+        self.server.listeners.append(self.messages)
+    
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+@pytest.fixture(params=['memory', 'redis'])
+def broker(request, app):
+    """Run a test against both brokers"""
+    if request.param == 'redis':
+        event_bus.init_app(app, broker=RedisBroker(FakePubSubRedis()))
+    return request.param
+
+def open_stream(client, headers):
+    """Open an event stream and return (response, chunk iterator)"""
+    response = client.get('/api/tasks/stream', headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    return response, chunks
+
+def read_event(chunks):
+    """Next event, skipping heartbeats"""
+    for chunk in chunks:
+        if not chunk.startswith(b':'):
+            fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+            return fields['event'], json.loads(fields['data'])
+
+def test_stream_receives_task_events(app, client, auth_headers, broker):
+    """Create, status change, update and delete are pushed in order"""
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.05
+    response, chunks = open_stream(client, auth_headers)
+    
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'}).get_json()['id']
+    client.patch(f'/api/tasks/{task_id}/status', headers=auth_headers, json={'status': 'completed'})
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'title': 'Renamed'})
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    
+    event, data = read_event(chunks)
+    assert event == 'task.created' and data['title'] == 'T'
+    event, data = read_event(chunks)
+    assert event == 'task.status_changed' and data['status'] == 'completed'
+    event, data = read_event(chunks)
+    assert event == 'task.updated' and data['title'] == 'Renamed'
+    assert read_event(chunks) == ('task.deleted', {'id': task_id})
+    
+    response.close()
+    assert event_bus.subscriber_count() == 0
+
+def test_stream_is_per_user(app, client, register, broker):
+    """Events only reach streams of the task's owner"""
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.01
+    alice, bob = register('alice'), register('bob')
+    response, chunks = open_stream(client, bob)
+    client.post('/api/tasks', headers=alice, json={'title': 'Private'})
+    client.post('/api/tasks', headers=bob, json={'title': 'Mine'})
+    event, data = read_event(chunks)
+    assert (event, data['title']) == ('task.created', 'Mine')
+    response.close()
+
+def test_workers_share_events_through_redis(app, client, auth_headers):
+    """A write handled by one worker reaches a stream held by another"""
+    server = FakePubSubRedis()
+    event_bus.init_app(app, broker=RedisBroker(server))
+    other = create_app(TestingConfig)
+    event_bus.init_app(other, broker=RedisBroker(server))
+    with other.app_context():
+        db.create_all()
+    
+    # Same secret and the same first user id in both databases
+    response, chunks = open_stream(client, auth_headers)
+    other_client = other.test_client()
+    other_client.post('/api/auth/register', json={
+        'username': 'testuser', 'email': 'testuser@example.com', 'password': 'password123'
+    })
+    other_client.post('/api/tasks', headers=auth_headers, json={'title': 'Elsewhere'})
+    
+    event, data = read_event(chunks)
+    assert (event, data['title']) == ('task.created', 'Elsewhere')
+    response.close()
+
+def test_heartbeat(app, client, auth_headers):
+    """An idle stream sends keep-alive comments"""
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.01
+    response, chunks = open_stream(client, auth_headers)
+    assert next(chunks) == b': keep-alive\n\n'
+    response.close()
+
+def test_slow_subscriber_is_told_to_resync(app, client, auth_headers):
+    """A full queue ends the stream with a resync event instead of growing"""
+    app.config['EVENTS_QUEUE_SIZE'] = 2
+    event_bus.init_app(app)
+    response, chunks = open_stream(client, auth_headers)
+    client.post('/api/tasks/bulk', headers=auth_headers,
+                json={'tasks': [{'title': f'Task {i}'} for i in range(5)]})
+    
+    assert read_event(chunks) == ('resync', {})
+    assert list(chunks) == []
+    assert event_bus.subscriber_count() == 0
+
+def test_stream_disabled(app, client, auth_headers):
+    """With no broker the endpoint is not available"""
+    app.config['EVENTS_BROKER'] = 'none'
+    event_bus.init_app(app)
+    assert client.get('/api/tasks/stream', headers=auth_headers).status_code == 404
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from app import db
+from app.models import Task, User
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+def test_export_ndjson_streams_all_tasks(app, client, auth_headers, queries):
+    """Every task is exported in batches from a single query, as a stream"""
+    app.config['TASKS_EXPORT_BATCH_SIZE'] = 3
+    client.post('/api/tasks/bulk', headers=auth_headers,
+                json={'tasks': [{'title': f'Task {i}'} for i in range(10)]})
+    listed = client.get('/api/tasks', headers=auth_headers).get_json()
+    
+    queries.clear()
+    response = client.get('/api/tasks/export', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert read_ndjson(response) == listed
+    assert len([q for q in queries if 'FROM task' in q]) == 1
+    
+    # One chunk per batch of 3 rows
+    response = client.get('/api/tasks/export', headers=auth_headers, buffered=False)
+    assert [chunk.count(b'\n') for chunk in response.response] == [3, 3, 3, 1]
+    response.close()
+
+def test_export_csv(client, auth_headers):
+    """CSV export has a header row and one line per task"""
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'Comma, "quoted"'})
+    response = client.get('/api/tasks/export?format=csv', headers=auth_headers)
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'Comma, "quoted"'
+    assert rows[0]['description'] == ''
+    assert list(rows[0]) == ['id', 'title', 'description', 'status', 'priority',
+                             'due_date', 'created_at', 'updated_at', 'user_id']
+
+def test_export_filters_and_updated_since(client, auth_headers, query_plans):
+    """Status/priority filters apply, and updated_since selects recent changes"""
+    created = client.post('/api/tasks/bulk', headers=auth_headers, json={'tasks': [
+        {'title': 'A', 'priority': 'high'},
+        {'title': 'B', 'priority': 'low'},
+        {'title': 'C', 'priority': 'high'},
+    ]}).get_json()['results']
+    
+    high = read_ndjson(client.get('/api/tasks/export?priority=high', headers=auth_headers))
+    assert [task['title'] for task in high] == ['A', 'C']
+    
+    old = datetime.utcnow() - timedelta(days=1)
+    Task.query.filter(Task.title != 'B').update({'updated_at': old})
+    db.session.commit()
+    since = (old + timedelta(hours=1)).isoformat()
+    changed = read_ndjson(client.get(f'/api/tasks/export?updated_since={since}', headers=auth_headers))
+    assert [task['id'] for task in changed] == [created[1]['task']['id']]
+
+def test_export_invalid_parameters(client, auth_headers):
+    """Unknown formats, scopes and timestamps are rejected"""
+    for query in ('format=xml', 'scope=team', 'updated_since=yesterday'):
+        response = client.get(f'/api/tasks/export?{query}', headers=auth_headers)
+        assert response.status_code == 400
+
+def test_export_all_users_requires_admin(app, client, register):
+    """scope=all exports every user's tasks, for admins only"""
+    user = register('user')
+    admin = register('root')
+    User.query.filter_by(username='root').update({'is_admin': True})
+    db.session.commit()
+    client.post('/api/tasks', headers=user, json={'title': 'Mine'})
+    client.post('/api/tasks', headers=admin, json={'title': 'Admin'})
+    
+    assert client.get('/api/tasks/export?scope=all', headers=user).status_code == 403
+    own = read_ndjson(client.get('/api/tasks/export', headers=user))
+    assert [task['title'] for task in own] == ['Mine']
+    
+    everything = read_ndjson(client.get('/api/tasks/export?scope=all', headers=admin))
+    assert [task['title'] for task in everything] == ['Mine', 'Admin']
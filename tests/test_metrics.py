@@ -0,0 +1,31 @@
+import logging
+from app import create_app, db
+from config import TestingConfig
+
+class SlowQueryConfig(TestingConfig):
+    """Log every query as slow"""
+    SLOW_QUERY_THRESHOLD_MS = 0
+
+def test_metrics_endpoint_reports_per_route_histograms(client, auth_headers):
+    """Requests are aggregated per route with query counts and phase timings"""
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'T'})
+    client.get('/api/tasks', headers=auth_headers)
+    
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{route="/api/tasks",method="GET",status="200"} 1' in body
+    assert 'http_request_db_queries_count{route="/api/tasks",method="GET"} 1' in body
+    assert 'http_request_phase_seconds_count{route="/api/tasks",method="GET",phase="auth"} 1' in body
+    assert 'http_request_phase_seconds_count{route="/api/tasks",method="GET",phase="serialize"} 1' in body
+    assert 'response_cache_misses_total 1' in body
+
+def test_slow_queries_are_logged_with_parameters(caplog):
+    """Queries over the threshold go to the slow query log"""
+    app = create_app(SlowQueryConfig)
+    with app.app_context(), caplog.at_level(logging.WARNING, logger='app.slow_query'):
+        db.create_all()
+        db.session.execute(db.text('SELECT :marker'), {'marker': 'slow-marker'})
+        db.drop_all()
+    assert any('slow-marker' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,42 @@
+from app import db
+from app.models import User
+from app.passwords import hasher
+
+def test_login_rehashes_outdated_hash(app, client, register):
+    """A successful login upgrades a hash made with an older cost"""
+    register('alice')
+    app.config['PASSWORD_HASH_COST'] = 2000
+    hasher.init_app(app)
+    
+    response = client.post('/api/auth/login', json={'username': 'alice', 'password': 'password123'})
+    assert response.status_code == 200
+    user = db.session.scalar(db.select(User).filter_by(username='alice'))
+    assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+    assert not user.password_needs_rehash()
+
+def test_hashing_runs_on_worker_pool(app):
+    """Hashes computed in worker processes verify like inline ones"""
+    app.config['PASSWORD_HASH_WORKERS'] = 1
+    hasher.init_app(app)
+    try:
+        pwhash = hasher.hash('secret')
+        assert pwhash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(pwhash, 'secret')
+        assert not hasher.verify(pwhash, 'wrong')
+    finally:
+        hasher.shutdown()
+
+def test_saturated_pool_returns_503(app, client, register):
+    """Login sheds load with 503 instead of queueing without bound"""
+    register('bob')
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1,
+                      PASSWORD_HASH_QUEUE_TIMEOUT=0)
+    hasher.init_app(app)
+    slots = app.extensions['password_hasher']['slots']
+    slots.acquire()
+    try:
+        response = client.post('/api/auth/login', json={'username': 'bob', 'password': 'password123'})
+    finally:
+        slots.release()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
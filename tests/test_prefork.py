@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import subprocess
+import urllib.request
+import pytest
+from werkzeug.test import Client
+from app import create_app, db
+from app.prefork import PreforkServer, Worker, parse_bind
+from app.startup import PROJECT_DIR
+from config import TestingConfig
+
+# Backends every worker shares; the test database stands in for redis
+SHARED_STATE = {'RESPONSE_CACHE_BACKEND': 'none', 'TOKEN_REVOCATION_BACKEND': 'database',
+                'EVENTS_BROKER': 'none', 'RATELIMIT_ENABLED': False, 'SCHEDULER_THREAD': False,
+                'METRICS_ENABLED': False}
+
+def test_parse_bind():
+    assert parse_bind('127.0.0.1:8000') == ('127.0.0.1', 8000)
+    assert parse_bind(':8000') == ('0.0.0.0', 8000)
+    assert parse_bind('[::1]:8000') == ('::1', 8000)
+    with pytest.raises(ValueError):
+        parse_bind('localhost')
+
+def test_worker_stops_after_max_requests(app):
+    worker = Worker(app, None, max_requests=2, graceful_timeout=1)
+    client = Client(worker.handle)
+    assert client.get('/api/health', buffered=True).status_code == 200
+    assert not worker._stopping
+    assert client.get('/api/health', buffered=True).status_code == 200
+    assert worker._stopping
+    assert worker.requests == 2
+    assert worker._active == 0
+
+def test_workers_need_shared_state(app):
+    assert PreforkServer(app).workers == 1
+    with pytest.raises(ValueError, match='TOKEN_REVOCATION_BACKEND=memory'):
+        PreforkServer(app, workers=2)
+    app.config.update(SHARED_STATE)
+    assert PreforkServer(app, workers=2).workers == 2
+    assert PreforkServer(app).workers == (os.cpu_count() or 1)
+    for key, value in (('SCHEDULER_THREAD', True), ('METRICS_ENABLED', True)):
+        app.config[key] = value
+        with pytest.raises(ValueError, match=f'{key}=True'):
+            PreforkServer(app, workers=2)
+        app.config[key] = SHARED_STATE[key]
+
+def get(port, path='/api/health', headers=None):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as err:
+        return err.code
+
+def post(port, path, body=None, headers=None):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', method='POST',
+                                     data=json.dumps(body or {}).encode(),
+                                     headers={'Content-Type': 'application/json', **(headers or {})})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+def wait_until_serving(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return get(port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def test_serve_recycles_reloads_and_stops(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    database_url = f"sqlite:///{tmp_path / 'serve.db'}"
+    
+    class ServeConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+    
+    app = create_app(ServeConfig)
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+    env = {**os.environ, **{key: str(value) for key, value in SHARED_STATE.items()},
+           'DATABASE_URL': database_url, 'WARMUP_ON_START': 'False',
+           'PASSWORD_HASH_ALGORITHM': 'pbkdf2', 'PASSWORD_HASH_COST': '1000',
+           'PASSWORD_HASH_WORKERS': '0'}
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}', '--workers', '2',
+         '--max-requests', '3', '--graceful-timeout', '5'],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        assert wait_until_serving(port) == 200
+        # More requests than both workers together may serve before recycling
+        assert [get(port) for _ in range(12)] == [200] * 12
+        server.send_signal(signal.SIGHUP)
+        assert [get(port) for _ in range(12)] == [200] * 12
+        
+        # A logout on one worker is seen by every worker
+        tokens = post(port, '/api/auth/register', {
+            'username': 'served', 'email': 'served@example.com', 'password': 'password123'
+        })
+        headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+        post(port, '/api/auth/logout', headers=headers)
+        assert [get(port, '/api/tasks', headers) for _ in range(8)] == [401] * 8
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=15) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+    log = server.stdout.read()
+    assert 'Reloading' in log
+    assert log.count('Booted worker') >= 6
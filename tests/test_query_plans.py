@@ -0,0 +1,32 @@
+from app.pagination import encode_cursor
+
+def test_task_routes_use_indexes(client, auth_headers, query_plans):
+    """Every query behind the task endpoints is served by an index"""
+    response = client.post('/api/tasks', headers=auth_headers,
+                           json={'title': 'Indexed', 'priority': 'high'})
+    task_id = response.get_json()['id']
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'Second'})
+    
+    client.get('/api/tasks', headers=auth_headers)
+    client.get('/api/tasks?status=pending&priority=high', headers=auth_headers)
+    cursor = client.get('/api/tasks?limit=1', headers=auth_headers).headers.get('X-Next-Cursor')
+    client.get(f'/api/tasks?limit=1&cursor={cursor}', headers=auth_headers)
+    client.get('/api/tasks?fields=id,title', headers=auth_headers)
+    client.get(f'/api/tasks/{task_id}', headers=auth_headers)
+    client.get('/api/tasks/stats', headers=auth_headers)
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'title': 'Renamed'})
+    client.patch(f'/api/tasks/{task_id}/status', headers=auth_headers,
+                 json={'status': 'completed'})
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    
+    assert query_plans
+
+def test_user_directory_uses_indexes(client, auth_headers, query_plans):
+    """Paging and prefix search of the user directory read index ranges"""
+    client.get('/api/users?limit=1', headers=auth_headers)
+    client.get(f'/api/users?limit=1&cursor={encode_cursor(1)}', headers=auth_headers)
+    client.get(f"/api/users?q=test&limit=1&cursor={encode_cursor('test')}", headers=auth_headers)
+    client.get('/api/users?q=test', headers=auth_headers)
+    client.get('/api/users?q=test@&by=email', headers=auth_headers)
+    
+    assert query_plans
@@ -0,0 +1,114 @@
+import pytest
+from app import create_app, db
+from app.ratelimit import MemoryStore, parse_limit
+from config import TestingConfig
+
+def make_app(**settings):
+    config = type('RateLimitConfig', (TestingConfig,), settings)
+    return create_app(config)
+
+@pytest.fixture
+def limited_app():
+    app = make_app(RATELIMIT_ENABLED=True, RATELIMIT_LIMITS={
+        'api.login': {'ip': '2/minute'},
+        'api': {'user': '3/minute'},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (6.0, 10)
+    assert parse_limit('1/second') == (1.0, 1)
+    for limit in ('10', '0/minute', 'ten/minute', '5/fortnight'):
+        with pytest.raises(ValueError):
+            parse_limit(limit)
+
+def test_memory_store_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('app.ratelimit.time.monotonic', lambda: now[0])
+    store = MemoryStore()
+    
+    assert [store.acquire('k', 6.0, 2) for _ in range(2)] == [0.0, 0.0]
+    assert store.acquire('k', 6.0, 2) == pytest.approx(6.0)
+    assert store.acquire('other', 6.0, 2) == 0.0
+    
+    now[0] += 6.0
+    assert store.acquire('k', 6.0, 2) == 0.0
+    assert store.acquire('k', 6.0, 2) > 0
+
+def test_memory_store_prunes_full_buckets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('app.ratelimit.time.monotonic', lambda: now[0])
+    store = MemoryStore(max_keys=10)
+    for i in range(10):
+        store.acquire(f'k{i}', 1.0, 5)
+    now[0] += 2.0
+    store.acquire('new', 1.0, 5)
+    assert list(store._tats) == ['new']
+
+def test_login_limited_per_ip(limited_app):
+    client = limited_app.test_client()
+    credentials = {'username': 'nobody', 'password': 'wrong'}
+    
+    assert [client.post('/api/auth/login', json=credentials).status_code for _ in range(2)] == [401, 401]
+    response = client.post('/api/auth/login', json=credentials)
+    assert response.status_code == 429
+    assert response.get_json() == {'error': 'Too many requests'}
+    assert 1 <= int(response.headers['Retry-After']) <= 30
+    
+    other = client.post('/api/auth/login', json=credentials, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert other.status_code == 401
+
+def test_blueprint_limit_per_user(limited_app):
+    client = limited_app.test_client()
+    headers = {}
+    for name in ('alice', 'bob'):
+        response = client.post('/api/auth/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'password123'
+        })
+        headers[name] = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    
+    statuses = [client.get('/api/tasks', headers=headers['alice']).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    assert client.get('/api/tasks', headers=headers['bob']).status_code == 200
+    # Anonymous requests have no user bucket
+    assert [client.get('/api/tasks').status_code for _ in range(4)] == [401] * 4
+
+def test_disabled_by_config():
+    app = make_app(RATELIMIT_LIMITS={'api.health_check': {'ip': '1/minute'}})
+    client = app.test_client()
+    assert [client.get('/api/health').status_code for _ in range(3)] == [200] * 3
+
+def test_concurrency_limit_sheds_load():
+    app = make_app(MAX_CONCURRENT_REQUESTS=1)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    slots = app.extensions['rate_limiter']['slots']
+    
+    # Slots are released after every request
+    assert [client.get('/api/tasks').status_code for _ in range(3)] == [401] * 3
+    
+    slots.acquire()
+    try:
+        response = client.get('/api/tasks')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert client.get('/api/health').status_code == 200
+    finally:
+        slots.release()
+    assert client.get('/api/tasks').status_code == 401
+
+def test_concurrency_limit_defaults_to_pool_size(tmp_path):
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'pool.db'}",
+                   SQLALCHEMY_POOL_SIZE=4, SQLALCHEMY_MAX_OVERFLOW=2)
+    slots = app.extensions['rate_limiter']['slots']
+    for _ in range(6):
+        assert slots.acquire(blocking=False)
+    assert not slots.acquire(blocking=False)
+    
+    # No pool for in-memory SQLite, so no default limit
+    assert make_app().extensions['rate_limiter']['slots'] is None
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app import create_app, db
+from app.events import event_bus
+from app.models import Task, User
+from app.scheduler import scheduler
+from config import TestingConfig
+
+def make_user(name='alice'):
+    user = User(username=name, email=f'{name}@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def add_task(user_id, due_date, status='pending', title='Task'):
+    task = Task(title=title, user_id=user_id, due_date=due_date, status=status)
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+def tick(now, poll=True):
+    scheduler.tick(db.session.connection(), now, poll)
+
+def drain(subscription):
+    events = []
+    while (message := subscription.get(timeout=0.01)) is not None:
+        events.append((message['event'], message['data']['id']))
+    return events
+
+def test_deadlines_fire_in_order_across_windows(app):
+    now = datetime.utcnow()
+    user_id = make_user()
+    soon = add_task(user_id, now + timedelta(minutes=1))
+    later = add_task(user_id, now + timedelta(minutes=2))
+    far = add_task(user_id, now + timedelta(hours=3))
+    add_task(user_id, now + timedelta(minutes=1), status='completed')
+    add_task(user_id, None)
+    subscription = event_bus.subscribe(user_id)
+    
+    tick(now)
+    deadlines = app.extensions['scheduler']['deadlines']
+    assert sorted(deadlines._pending) == [soon, later]
+    
+    tick(now + timedelta(seconds=90))
+    assert drain(subscription) == [('task.overdue', soon)]
+    tick(now + timedelta(hours=2))
+    assert drain(subscription) == [('task.overdue', later)]
+    tick(now + timedelta(hours=4))
+    assert drain(subscription) == [('task.overdue', far)]
+    assert sorted(deadlines.overdue_ids(user_id)) == [soon, later, far]
+    subscription.close()
+
+def test_write_paths_update_deadlines(app, client, auth_headers):
+    past = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    future = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    
+    def overdue():
+        response = client.get('/api/tasks?overdue=true', headers=auth_headers)
+        return [task['title'] for task in response.get_json()]
+    
+    
+    first = client.post('/api/tasks', headers=auth_headers, json={'title': 'Late', 'due_date': past}).get_json()['id']
+    assert overdue() == ['Late']
+    
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'Upcoming', 'due_date': future})
+    second = client.post('/api/tasks/bulk', headers=auth_headers, json={'tasks': [
+        {'title': 'Also late', 'due_date': past}, {'title': 'Done', 'due_date': past, 'status': 'completed'}
+    ]}).get_json()['results'][0]['task']['id']
+    assert overdue() == ['Late', 'Also late']
+    
+    client.patch(f'/api/tasks/{first}/status', headers=auth_headers, json={'status': 'completed'})
+    assert overdue() == ['Also late']
+    client.put(f'/api/tasks/{second}', headers=auth_headers, json={'due_date': future})
+    assert overdue() == []
+    client.put(f'/api/tasks/{second}', headers=auth_headers, json={'due_date': past})
+    client.delete(f'/api/tasks/{second}', headers=auth_headers)
+    assert overdue() == []
+    deadlines = app.extensions['scheduler']['deadlines']
+    assert second not in deadlines._pending and second not in deadlines._owners
+
+def test_poll_applies_writes_from_other_processes(app):
+    now = datetime.utcnow()
+    user_id = make_user()
+    task_id = add_task(user_id, now + timedelta(days=2))
+    subscription = event_bus.subscribe(user_id)
+    tick(now)
+    
+    # A Core UPDATE bypasses this process's session hooks, like a write
+    # made by another worker
+    db.session.execute(update(Task).where(Task.id == task_id)
+                       .values(due_date=now - timedelta(minutes=5), updated_at=now))
+    db.session.commit()
+    tick(now + timedelta(seconds=1))
+    assert drain(subscription) == [('task.overdue', task_id)]
+    
+    # Reads poll too, so they see such writes without waiting for a tick
+    db.session.execute(update(Task).where(Task.id == task_id)
+                       .values(status='completed', updated_at=now + timedelta(seconds=2)))
+    db.session.commit()
+    assert scheduler.overdue_ids(user_id, now + timedelta(seconds=2)) == []
+    subscription.close()
+
+def test_only_the_scheduler_process_publishes(app, client, auth_headers, monkeypatch):
+    app.extensions.pop('response_cache')  # every read reaches the overdue filter
+    user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['id']
+    subscription = event_bus.subscribe(user_id)
+    now = datetime.utcnow()
+    
+    def post(title, due_date):
+        return client.post('/api/tasks', headers=auth_headers,
+                           json={'title': title, 'due_date': due_date.isoformat()}).get_json()['id']
+    
+    def overdue():
+        response = client.get('/api/tasks?overdue=true', headers=auth_headers)
+        return [task['title'] for task in response.get_json()]
+    
+    def announced():
+        return [event for event in drain(subscription) if event[0] == 'task.overdue']
+    
+    class TwoMinutesLater(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now + timedelta(minutes=2)
+    
+    # A web worker without the thread: commits and reads update the
+    # overdue set, but publish nothing
+    post('Late', now - timedelta(hours=1))
+    post('Soon', now + timedelta(minutes=1))
+    assert overdue() == ['Late']
+    monkeypatch.setattr('app.scheduler.datetime', TwoMinutesLater)
+    assert overdue() == ['Late', 'Soon']
+    assert announced() == []
+    
+    # The scheduler's process publishes each task once, from any path
+    app.extensions['scheduler']['publisher'] = True
+    task_id = post('Also late', now - timedelta(hours=1))
+    assert overdue() == ['Late', 'Soon', 'Also late']
+    tick(now + timedelta(minutes=3))
+    assert announced() == [('task.overdue', task_id)]
+    subscription.close()
+
+def test_overdue_filter_sees_other_instances(tmp_path, monkeypatch):
+    class SharedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'shared.db'}"
+        RESPONSE_CACHE_BACKEND = 'none'
+    
+    # Two apps on one database, neither running the scheduler thread, like
+    # two web workers
+    first, second = create_app(SharedConfig), create_app(SharedConfig)
+    with first.app_context():
+        db.create_all()
+    reader, writer = first.test_client(), second.test_client()
+    token = writer.post('/api/auth/register', json={
+        'username': 'carol', 'email': 'carol@example.com', 'password': 'password123'
+    }).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    def overdue():
+        response = reader.get('/api/tasks?overdue=true', headers=headers)
+        return [task['title'] for task in response.get_json()]
+    
+    assert overdue() == []
+    now = datetime.utcnow()
+    for title, due_date in (('Late', now - timedelta(hours=1)), ('Soon', now + timedelta(minutes=1))):
+        writer.post('/api/tasks', headers=headers, json={'title': title, 'due_date': due_date.isoformat()})
+    assert overdue() == ['Late']
+    
+    class TwoMinutesLater(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now + timedelta(minutes=2)
+    
+    monkeypatch.setattr('app.scheduler.datetime', TwoMinutesLater)
+    assert overdue() == ['Late', 'Soon']
+    for app in (first, second):
+        with app.app_context():
+            db.engine.dispose()
+
+def test_scheduler_queries_use_indexes(app, client, auth_headers, query_plans):
+    client.post('/api/tasks', headers=auth_headers, json={
+        'title': 'Late', 'due_date': (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    })
+    client.get('/api/tasks?overdue=true', headers=auth_headers)
+    now = datetime.utcnow()
+    tick(now + timedelta(minutes=1))
+    tick(now + timedelta(hours=5))
+    assert query_plans
+
+def test_overdue_filter_without_scheduler():
+    class NoSchedulerConfig(TestingConfig):
+        SCHEDULER_ENABLED = False
+    
+    app = create_app(NoSchedulerConfig)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        token = client.post('/api/auth/register', json={
+            'username': 'bob', 'email': 'bob@example.com', 'password': 'password123'
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        for title, days in (('Late', -1), ('Upcoming', 1)):
+            client.post('/api/tasks', headers=headers, json={
+                'title': title, 'due_date': (datetime.utcnow() + timedelta(days=days)).isoformat()
+            })
+        tasks = client.get('/api/tasks?overdue=true', headers=headers).get_json()
+        assert [task['title'] for task in tasks] == ['Late']
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,67 @@
+import pytest
+from app import db
+from app.models import SearchTerm
+from app.search import rebuild_index, parse_query
+
+@pytest.fixture(params=['fts5', 'table'])
+def backend(request, app):
+    """Run a test against FTS5 and the built-in inverted index"""
+    app.config['SEARCH_BACKEND'] = request.param
+    return request.param
+
+def search(client, headers, q, **params):
+    response = client.get('/api/tasks/search', headers=headers, query_string={'q': q, **params})
+    assert response.status_code == 200
+    return [task['title'] for task in response.get_json()]
+
+def test_search_ranks_and_filters(client, auth_headers, backend, query_plans):
+    """All words must match, title hits rank first and filters apply"""
+    client.post('/api/tasks/bulk', headers=auth_headers, json={'tasks': [
+        {'title': 'Write report', 'description': 'Quarterly numbers'},
+        {'title': 'Review budget', 'description': 'Check the report draft'},
+        {'title': 'Report bug', 'priority': 'high'},
+        {'title': 'Lunch'},
+    ]})
+    
+    assert search(client, auth_headers, 'report')[-1] == 'Review budget'
+    assert sorted(search(client, auth_headers, 'report')) == ['Report bug', 'Review budget', 'Write report']
+    assert search(client, auth_headers, 'report draft') == ['Review budget']
+    assert search(client, auth_headers, 'report', priority='high') == ['Report bug']
+    assert search(client, auth_headers, 'repo') == []
+    assert sorted(search(client, auth_headers, 'repo* QUART*')) == ['Write report']
+
+def test_search_is_per_user_and_tracks_writes(client, register, backend):
+    """Updates and deletes are reflected; other users' tasks never match"""
+    alice, bob = register('alice'), register('bob')
+    task_id = client.post('/api/tasks', headers=alice, json={'title': 'Café meeting'}).get_json()['id']
+    client.post('/api/tasks', headers=bob, json={'title': 'Cafe opening'})
+    
+    assert search(client, alice, 'cafe') == ['Café meeting']
+    client.put(f'/api/tasks/{task_id}', headers=alice, json={'title': 'Tea meeting'})
+    assert search(client, alice, 'cafe') == []
+    assert search(client, alice, 'tea') == ['Tea meeting']
+    client.delete(f'/api/tasks/{task_id}', headers=alice)
+    assert search(client, alice, 'meeting') == []
+
+def test_rebuild_index(client, auth_headers, backend):
+    """The index can be rebuilt from the task table"""
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'Restore me'})
+    if backend == 'table':
+        SearchTerm.query.delete()
+    else:
+        db.session.execute(db.text('DELETE FROM task_fts'))
+    db.session.commit()
+    assert search(client, auth_headers, 'restore') == []
+    
+    assert rebuild_index() == 1
+    assert search(client, auth_headers, 'restore') == ['Restore me']
+
+def test_query_syntax_is_not_interpreted(client, auth_headers, backend):
+    """FTS5 operators and quotes in q are treated as plain words"""
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'Near or not'})
+    assert search(client, auth_headers, '"near" OR NOT(') == ['Near or not']
+    response = client.get('/api/tasks/search?q=*', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_parse_query():
+    assert parse_query('Déjà vu* x_y') == [('deja', False), ('vu', True), ('x', False), ('y', False)]
@@ -0,0 +1,77 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import inspect, insert, select, func
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db
+from app.auth import generate_tokens
+from app.models import User, Task
+from app.seed import bulk_load, generate, parse_weights, task_counts
+from config import TestingConfig
+
+EPOCH = datetime(2025, 1, 1)
+
+def load(**options):
+    with db.engine.connect() as connection:
+        return generate(connection, epoch=EPOCH, chunk_size=7, **options)
+
+def task_rows():
+    return db.session.execute(
+        select(Task.user_id, Task.title, Task.status, Task.priority, Task.due_date, Task.sync_seq)
+        .order_by(Task.id)
+    ).all()
+
+def test_same_seed_same_data(app):
+    users, tasks = load(users=5, tasks_per_user=4, seed=7)
+    assert users == 5 and tasks == db.session.scalar(select(func.count(Task.id)))
+    first = task_rows()
+    
+    other = create_app(TestingConfig)
+    with other.app_context():
+        db.create_all()
+        load(users=5, tasks_per_user=4, seed=7)
+        assert task_rows() == first
+        load(users=2, tasks_per_user=4, seed=8)
+        # Appending continues after the existing users
+        assert db.session.scalar(select(func.max(User.id))) == 7
+        db.session.remove()
+        db.drop_all()
+
+def test_distributions_respected(app):
+    load(users=20, tasks_per_user=3, distribution='fixed',
+         statuses={'completed': 1}, priorities={'low': 1, 'high': 0}, no_due_ratio=1.0)
+    rows = task_rows()
+    assert len(rows) == 60
+    assert {(row.status, row.priority, row.due_date) for row in rows} == {('completed', 'low', None)}
+
+def test_indexes_restored(app):
+    before = {index['name'] for index in inspect(db.engine).get_indexes('task')}
+    load(users=3, tasks_per_user=5)
+    assert {index['name'] for index in inspect(db.engine).get_indexes('task')} == before
+
+def test_indexes_restored_after_failed_load(app):
+    before = {index['name'] for index in inspect(db.engine).get_indexes('task')}
+    with pytest.raises(IntegrityError):
+        with db.engine.connect() as connection, bulk_load(connection, [Task.__table__]):
+            connection.execute(insert(Task), {'title': 'Loaded', 'user_id': 1})
+            connection.execute(insert(Task), {'title': None, 'user_id': 1})
+    assert {index['name'] for index in inspect(db.engine).get_indexes('task')} == before
+    assert db.session.scalar(select(func.count(Task.id))) == 0
+
+def test_seeded_tasks_sync(app, client):
+    load(users=2, tasks_per_user=5, distribution='fixed')
+    with app.test_request_context():
+        token = generate_tokens(1)[0]
+    response = client.get('/api/tasks/changes', headers={'Authorization': f'Bearer {token}'})
+    assert len(response.get_json()['changes']) == 5
+
+def test_task_counts_means():
+    import random
+    for distribution in ('uniform', 'exponential', 'pareto'):
+        counts = task_counts(random.Random(1), 20000, 10, distribution)
+        assert 7 <= sum(counts) / len(counts) <= 12, distribution
+
+def test_parse_weights():
+    assert parse_weights('low=3, high=1') == {'low': 3.0, 'high': 1.0}
+    for spec in ('low', 'low=x', 'low=0', 'low=-1,high=2'):
+        with pytest.raises(ValueError):
+            parse_weights(spec)
@@ -0,0 +1,82 @@
+from datetime import datetime
+import pytest
+from flask import jsonify
+from app import db, serializers
+from app.models import Task, User
+from app.api.tasks import TaskSchema
+from app.api.users import UserSchema
+from app.serializers import row_serializer, json_response
+
+# Quotes, escapes, control characters, DEL, non-ASCII and astral-plane text
+TITLES = ['Plain', 'Quote " and \\ backslash', 'Tab\tnew\nline\x01', 'Del \x7f', 'Café ünïcödé', 'Emoji 😀 </script>']
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def backend(request, monkeypatch):
+    """Run a test with orjson and with the stdlib fallback"""
+    if request.param == 'orjson':
+        if serializers.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(serializers, 'orjson', None)
+    return request.param
+
+@pytest.fixture
+def tasks(app, register):
+    """Tasks covering tricky strings, nulls and fractional timestamps"""
+    register('owner')
+    user = User.query.filter_by(username='owner').one()
+    for index, title in enumerate(TITLES):
+        db.session.add(Task(
+            title=title,
+            description=None if index % 2 else f'Description {title}',
+            due_date=datetime(2030, 1, index + 1, 12, 30, 0, index * 1000) if index % 3 else None,
+            user_id=user.id,
+        ))
+    db.session.commit()
+    return Task.query.order_by(Task.id).all()
+
+@pytest.mark.parametrize('only', [None, ('title', 'due_date'), ('id',)])
+def test_task_parity(app, backend, tasks, only):
+    """The row serializer matches TaskSchema + jsonify byte for byte"""
+    serializer = row_serializer(TaskSchema, only)
+    rows = Task.query.with_entities(*serializer.columns(Task, 'id')).order_by(Task.id).all()
+    
+    expected = jsonify(TaskSchema(only=only, many=True).dump(tasks))
+    actual = json_response(serializer.dump(rows))
+    assert actual.get_data() == expected.get_data()
+    assert actual.mimetype == expected.mimetype
+
+def test_user_parity(app, backend, register):
+    """The row serializer matches UserSchema + jsonify byte for byte"""
+    for name in ('alice', 'bob'):
+        register(name)
+    serializer = row_serializer(UserSchema)
+    rows = User.query.with_entities(*serializer.columns(User)).all()
+    
+    expected = jsonify(UserSchema(many=True).dump(User.query.all()))
+    assert json_response(serializer.dump(rows)).get_data() == expected.get_data()
+
+def test_ensure_ascii_disabled(app, backend):
+    """With ensure_ascii off, non-ASCII text is emitted as UTF-8 like jsonify"""
+    app.json.ensure_ascii = False
+    data = [{'title': t} for t in TITLES]
+    assert json_response(data).get_data() == jsonify(data).get_data()
+
+def test_get_tasks_uses_fast_path(client, auth_headers, backend):
+    """The list endpoint's body equals a marshmallow dump of the same page"""
+    for title in TITLES:
+        client.post('/api/tasks', headers=auth_headers, json={'title': title})
+    response = client.get('/api/tasks', headers=auth_headers)
+    
+    expected = jsonify(TaskSchema(many=True).dump(Task.query.order_by(Task.created_at, Task.id)))
+    assert response.data == expected.get_data()
+
+def test_unsupported_field_rejected():
+    """Fields without an exact fast equivalent are refused up front"""
+    from marshmallow import Schema, fields
+    
+    class FloatSchema(Schema):
+        score = fields.Float()
+    
+    with pytest.raises(TypeError):
+        serializers.RowSerializer(FloatSchema())
@@ -0,0 +1,62 @@
+import os
+import sys
+import logging
+import subprocess
+from app import create_app, db, startup
+from app.startup import PROJECT_DIR, parse_importtime, by_package, warm_up
+from config import TestingConfig
+
+class WarmupConfig(TestingConfig):
+    WARMUP_ON_START = True
+
+def test_parse_importtime():
+    output = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       120 |        120 |     sqlalchemy.sql',
+        'import time:        80 |        200 |   sqlalchemy',
+        'import time:        50 |        250 | app',
+        'unrelated line',
+    ])
+    imports = parse_importtime(output)
+    assert imports == [('sqlalchemy.sql', 120, 120), ('sqlalchemy', 80, 200), ('app', 50, 250)]
+    assert by_package(imports) == [('sqlalchemy', 200), ('app', 50)]
+
+def test_serving_does_not_import_migrations():
+    code = ('import sys; from app import create_app; from config import TestingConfig; '
+            'create_app(TestingConfig); print(sorted({"flask_migrate", "alembic"} & set(sys.modules)))')
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+def test_db_command_loads_on_use(app):
+    result = app.test_cli_runner().invoke(args=['db', '--help'])
+    assert result.exit_code == 0
+    assert 'upgrade' in result.output
+    assert 'migrate' in app.extensions
+
+def test_warm_up_caches_hot_queries(app, caplog):
+    with caplog.at_level(logging.WARNING, logger='app.startup'):
+        warm_up(app)
+    assert not caplog.records
+    assert len(db.engine._compiled_cache) >= 3
+
+def test_warm_up_failures_are_logged(caplog):
+    # No tables: every query fails, but warm-up still completes
+    app = create_app(WarmupConfig)
+    with caplog.at_level(logging.WARNING, logger='app.startup'):
+        warm_up(app)
+    assert any('warm_tasks' in record.getMessage() for record in caplog.records)
+
+def test_only_entry_points_warm_up(monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(startup, 'warm_up', calls.append)
+    with caplog.at_level(logging.WARNING, logger='app.startup'):
+        app = create_app(WarmupConfig)
+    assert app.extensions['scheduler']
+    assert calls == [] and not caplog.records
+    
+    # The ASGI entry point does warm up (and logs the failures, with no tables)
+    result = subprocess.run([sys.executable, '-c', 'import asgi'], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True,
+                            env={**os.environ, 'DATABASE_URL': 'sqlite://', 'WARMUP_ON_START': 'True'})
+    assert 'Warm-up step warm_tasks failed' in result.stderr
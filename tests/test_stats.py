@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import TaskStats, User
+from app.stats import rebuild_stats, get_stats, ALL_USERS
+
+def stats_snapshot():
+    """All stats rows as plain tuples, except emptied shards of the totals"""
+    return sorted(
+        (row.user_id, row.total, row.pending, row.in_progress, row.completed,
+         row.low, row.medium, row.high)
+        for row in TaskStats.query.all() if row.user_id >= 0 or row.total
+    )
+
+def test_stats_follow_every_write_path(client, auth_headers):
+    """Counters stay equal to a full recount across single and bulk writes"""
+    past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    task_id = client.post('/api/tasks', headers=auth_headers,
+                          json={'title': 'A', 'priority': 'high', 'due_date': past}).get_json()['id']
+    results = client.post('/api/tasks/bulk', headers=auth_headers, json={'tasks': [
+        {'title': 'B', 'priority': 'low'}, {'title': 'C', 'status': 'in_progress'}
+    ]}).get_json()['results']
+    client.patch(f'/api/tasks/{task_id}/status', headers=auth_headers, json={'status': 'in_progress'})
+    client.put(f'/api/tasks/{task_id}', headers=auth_headers, json={'priority': 'medium'})
+    client.patch('/api/tasks/bulk', headers=auth_headers,
+                 json={'tasks': [{'id': results[0]['task']['id'], 'status': 'completed'}]})
+    client.delete(f"/api/tasks/{results[1]['task']['id']}", headers=auth_headers)
+    
+    response = client.get('/api/tasks/stats', headers=auth_headers)
+    assert response.get_json() == {
+        'total': 2,
+        'by_status': {'pending': 0, 'in_progress': 1, 'completed': 1},
+        'by_priority': {'low': 1, 'medium': 1, 'high': 0},
+        'overdue': 1
+    }
+    
+    incremental = stats_snapshot()
+    rebuild_stats()
+    assert stats_snapshot() == incremental
+
+def test_deleting_user_removes_their_counts(client, register):
+    """User deletion drops the user's row and subtracts it from the totals"""
+    alice, bob = register('alice'), register('bob')
+    client.post('/api/tasks/bulk', headers=alice, json={'tasks': [{'title': 'A'}, {'title': 'B'}]})
+    client.post('/api/tasks', headers=bob, json={'title': 'C'})
+    
+    client.delete('/api/users/1', headers=bob)
+    db.session.expire_all()
+    assert db.session.get(TaskStats, 1) is None
+    assert get_stats(ALL_USERS)['total'] == 1
+    
+    incremental = stats_snapshot()
+    rebuild_stats()
+    assert stats_snapshot() == incremental
+
+def test_totals_are_sharded_upserts(client, register, queries):
+    """Totals spread over shard rows; every counter row is written with one upsert"""
+    headers = [register(f'user{i}') for i in range(4)]
+    for i, user_headers in enumerate(headers):
+        client.post('/api/tasks/bulk', headers=user_headers,
+                    json={'tasks': [{'title': f'T{n}', 'priority': 'high'} for n in range(i + 1)]})
+    assert get_stats(ALL_USERS) == {
+        'total': 10,
+        'by_status': {'pending': 10, 'in_progress': 0, 'completed': 0},
+        'by_priority': {'low': 0, 'medium': 0, 'high': 10},
+    }
+    shards = TaskStats.query.filter(TaskStats.user_id < 0).all()
+    assert len(shards) == 4 and sum(row.total for row in shards) == 10
+    writes = [q for q in queries if 'task_stats' in q and not q.lstrip().startswith('SELECT')]
+    assert writes and all('ON CONFLICT' in q for q in writes)
+
+def test_global_stats_require_admin(app, client, register):
+    """The all-users endpoint is restricted to admins, which users cannot make themselves"""
+    headers = register('root')
+    client.post('/api/tasks', headers=headers, json={'title': 'A'})
+    assert client.get('/api/stats', headers=headers).status_code == 403
+    user_id = client.get('/api/auth/me', headers=headers).get_json()['id']
+    response = client.put(f'/api/users/{user_id}', headers=headers, json={'is_admin': True})
+    assert response.status_code == 400
+    assert client.get('/api/stats', headers=headers).status_code == 403
+    
+    User.query.filter_by(username='root').update({'is_admin': True})
+    db.session.commit()
+    response = client.get('/api/stats', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['by_status']['pending'] == 1
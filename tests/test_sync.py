@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import Task, TaskTombstone, SyncSequence
+from app.sync import prune_tombstones
+
+def changes(client, headers, since=None, **params):
+    if since:
+        params['since'] = since
+    response = client.get('/api/tasks/changes', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_full_then_delta_sync(client, auth_headers, query_plans):
+    """A delta returns only tasks written since the token, plus deletions"""
+    ids = [client.post('/api/tasks', headers=auth_headers, json={'title': t}).get_json()['id']
+           for t in ('A', 'B', 'C')]
+    
+    full = changes(client, auth_headers)
+    assert [task['title'] for task in full['changes']] == ['A', 'B', 'C']
+    assert full['deleted'] == [] and not full['has_more']
+    
+    idle = changes(client, auth_headers, full['next_since'])
+    assert idle == {'changes': [], 'deleted': [], 'next_since': full['next_since'], 'has_more': False}
+    
+    client.patch(f'/api/tasks/{ids[2]}/status', headers=auth_headers, json={'status': 'completed'})
+    client.delete(f'/api/tasks/{ids[0]}', headers=auth_headers)
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'D'})
+    
+    delta = changes(client, auth_headers, full['next_since'])
+    assert [(task['title'], task['status']) for task in delta['changes']] == [('C', 'completed'), ('D', 'pending')]
+    assert delta['deleted'] == [ids[0]]
+    assert changes(client, auth_headers, delta['next_since'])['changes'] == []
+
+def test_sequence_is_one_upsert(client, auth_headers, queries):
+    """The counter row is created and incremented by the same atomic statement"""
+    for title in ('A', 'B', 'C'):
+        client.post('/api/tasks', headers=auth_headers, json={'title': title})
+    assert [task.sync_seq for task in Task.query.order_by(Task.id)] == [1, 2, 3]
+    writes = [q for q in queries if 'sync_sequence' in q and not q.lstrip().startswith('SELECT')]
+    assert len(writes) == 3 and all('ON CONFLICT' in q and 'RETURNING' in q for q in writes)
+
+def test_sequence_without_insert_returning(client, auth_headers, queries, monkeypatch):
+    """Databases without INSERT ... RETURNING (MySQL) read the counter back"""
+    monkeypatch.setattr(db.engine.dialect, 'insert_returning', False)
+    for title in ('A', 'B', 'C'):
+        client.post('/api/tasks', headers=auth_headers, json={'title': title})
+    assert [task.sync_seq for task in Task.query.order_by(Task.id)] == [1, 2, 3]
+    assert not [q for q in queries if 'RETURNING' in q and 'sync_sequence' in q]
+
+def test_paging_interleaves_changes_and_deletions(client, auth_headers):
+    """Pages follow the change sequence across tasks and tombstones"""
+    created = client.post('/api/tasks/bulk', headers=auth_headers, json={
+        'tasks': [{'title': f'Task {i}'} for i in range(4)]
+    }).get_json()['results']
+    ids = [result['task']['id'] for result in created]
+    token = changes(client, auth_headers)['next_since']
+    
+    client.delete('/api/tasks/bulk', headers=auth_headers, json={'ids': ids[:2]})
+    client.put(f'/api/tasks/{ids[3]}', headers=auth_headers, json={'title': 'Renamed'})
+    client.delete(f'/api/tasks/{ids[2]}', headers=auth_headers)
+    
+    first = changes(client, auth_headers, token, limit=2)
+    assert first['deleted'] == ids[:2] and first['changes'] == [] and first['has_more']
+    second = changes(client, auth_headers, first['next_since'], limit=2)
+    assert [task['title'] for task in second['changes']] == ['Renamed']
+    assert second['deleted'] == [ids[2]] and not second['has_more']
+
+def test_changes_are_per_user(client, register):
+    """Sequences and tombstones are scoped to their owner"""
+    alice, bob = register('alice'), register('bob')
+    task_id = client.post('/api/tasks', headers=alice, json={'title': 'Private'}).get_json()['id']
+    token = changes(client, bob)['next_since']
+    client.delete(f'/api/tasks/{task_id}', headers=alice)
+    assert changes(client, bob, token)['deleted'] == []
+    assert changes(client, bob)['changes'] == []
+
+def test_user_delete_drops_sync_rows(app, client, register):
+    """Deleting a user removes their sequence and tombstones"""
+    headers = register('leaving')
+    task_id = client.post('/api/tasks', headers=headers, json={'title': 'T'}).get_json()['id']
+    client.post('/api/tasks', headers=headers, json={'title': 'U'})
+    client.delete(f'/api/tasks/{task_id}', headers=headers)
+    assert TaskTombstone.query.count() == 1
+    
+    user_id = Task.query.first().user_id
+    client.delete(f'/api/users/{user_id}', headers=headers)
+    assert TaskTombstone.query.count() == 0
+    assert SyncSequence.query.count() == 0
+
+def test_pruned_token_requires_full_resync(client, auth_headers):
+    """Tokens older than the pruned tombstones get 410"""
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'T'}).get_json()['id']
+    token = changes(client, auth_headers)['next_since']
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+    
+    TaskTombstone.query.update({'deleted_at': datetime.utcnow() - timedelta(days=31)})
+    db.session.commit()
+    assert prune_tombstones(30) == 1
+    
+    response = client.get('/api/tasks/changes', headers=auth_headers, query_string={'since': token})
+    assert response.status_code == 410
+    assert changes(client, auth_headers)['changes'] == []
+
+def test_invalid_token(client, auth_headers):
+    """Malformed tokens are rejected"""
+    response = client.get('/api/tasks/changes?since=garbage', headers=auth_headers)
+    assert response.status_code == 400
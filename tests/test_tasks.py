@@ -0,0 +1,102 @@
+from sqlalchemy import event
+from app import db
+
+def create_tasks(client, headers, count, **fields):
+    """Create ``count`` tasks and return their ids"""
+    ids = []
+    for i in range(count):
+        response = client.post('/api/tasks', headers=headers,
+                               json={'title': f'Task {i}', **fields})
+        assert response.status_code == 201
+        ids.append(response.get_json()['id'])
+    return ids
+
+def test_get_tasks_keyset_pagination(client, auth_headers):
+    """Pages follow the Link cursor and cover every task exactly once"""
+    ids = create_tasks(client, auth_headers, 5)
+    
+    response = client.get('/api/tasks?limit=2', headers=auth_headers)
+    seen = [task['id'] for task in response.get_json()]
+    while 'X-Next-Cursor' in response.headers:
+        cursor = response.headers['X-Next-Cursor']
+        assert f'cursor={cursor}' in response.headers['Link']
+        response = client.get(f'/api/tasks?limit=2&cursor={cursor}', headers=auth_headers)
+        seen += [task['id'] for task in response.get_json()]
+    
+    assert seen == ids
+
+def test_get_tasks_field_projection(client, auth_headers):
+    """fields= returns only the requested attributes"""
+    create_tasks(client, auth_headers, 2, priority='high')
+    response = client.get('/api/tasks?fields=title,priority', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {'title': 'Task 0', 'priority': 'high'},
+        {'title': 'Task 1', 'priority': 'high'}
+    ]
+
+def test_get_tasks_rejects_bad_paging_arguments(client, auth_headers):
+    """Invalid limit, cursor or fields are reported as 400"""
+    for query in ('limit=0', 'limit=abc', 'cursor=not-a-cursor', 'fields=secret'):
+        response = client.get(f'/api/tasks?{query}', headers=auth_headers)
+        assert response.status_code == 400, query
+
+def test_bulk_create_commits_once(client, auth_headers):
+    """Bulk create writes the whole batch in a single transaction"""
+    commits = []
+    
+    def on_commit(conn):
+        commits.append(conn)
+    
+    event.listen(db.engine, 'commit', on_commit)
+    payload = {'tasks': [{'title': f'Bulk {i}', 'priority': 'low'} for i in range(3)]}
+    response = client.post('/api/tasks/bulk', headers=auth_headers, json=payload)
+    event.remove(db.engine, 'commit', on_commit)
+    
+    assert response.status_code == 201
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [201, 201, 201]
+    assert [r['task']['title'] for r in results] == ['Bulk 0', 'Bulk 1', 'Bulk 2']
+    assert len(commits) == 1
+
+def test_bulk_writes_do_not_reload_tasks(client, auth_headers, queries):
+    """Bulk responses are dumped without one SELECT per task"""
+    payload = {'tasks': [{'title': f'Bulk {i}'} for i in range(5)]}
+    response = client.post('/api/tasks/bulk', headers=auth_headers, json=payload)
+    ids = [r['task']['id'] for r in response.get_json()['results']]
+    response = client.patch('/api/tasks/bulk', headers=auth_headers, json={
+        'tasks': [{'id': task_id, 'status': 'completed'} for task_id in ids]
+    })
+    assert [r['task']['status'] for r in response.get_json()['results']] == ['completed'] * 5
+    task_selects = [q for q in queries if q.lstrip().startswith('SELECT') and 'FROM task ' in q]
+    assert len(task_selects) == 1  # the PATCH loading the batch
+
+def test_bulk_create_rejects_whole_batch(client, auth_headers):
+    """One invalid item fails the batch and nothing is written"""
+    payload = {'tasks': [{'title': 'Good'}, {'priority': 'urgent'}]}
+    response = client.post('/api/tasks/bulk', headers=auth_headers, json=payload)
+    assert response.status_code == 400
+    assert set(response.get_json()['errors']) == {'1'}
+    assert client.get('/api/tasks', headers=auth_headers).get_json() == []
+
+def test_bulk_update_and_delete_report_per_item(client, auth_headers, register):
+    """Items for missing or foreign tasks come back as 404 results"""
+    ids = create_tasks(client, auth_headers, 2)
+    foreign_id = create_tasks(client, register('other'), 1)[0]
+    
+    response = client.patch('/api/tasks/bulk', headers=auth_headers, json={'tasks': [
+        {'id': ids[0], 'status': 'completed'},
+        {'id': ids[1], 'title': 'Renamed'},
+        {'id': foreign_id, 'title': 'Hijacked'}
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['status'] for r in results] == [200, 200, 404]
+    assert results[0]['task']['status'] == 'completed'
+    assert results[1]['task']['title'] == 'Renamed'
+    
+    response = client.delete('/api/tasks/bulk', headers=auth_headers,
+                             json={'ids': [ids[0], foreign_id]})
+    assert [r['status'] for r in response.get_json()['results']] == [204, 404]
+    remaining = client.get('/api/tasks', headers=auth_headers).get_json()
+    assert [task['id'] for task in remaining] == [ids[1]]
@@ -0,0 +1,55 @@
+from sqlalchemy import insert
+from app import db
+from app.models import User
+
+def add_users(*names):
+    db.session.execute(insert(User), [
+        {'username': name, 'email': f'{name}@example.com', 'password_hash': 'x'} for name in names
+    ])
+    db.session.commit()
+
+def fetch_all(client, headers, url):
+    """Follow X-Next-Cursor through every page of a user listing"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert response.status_code == 200
+        pages.append([user['username'] for user in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return pages
+
+def test_users_paginated_by_id(client, auth_headers):
+    add_users('bob', 'carol', 'dave', 'erin')
+    
+    pages = fetch_all(client, auth_headers, '/api/users?limit=2')
+    assert pages == [['testuser', 'bob'], ['carol', 'dave'], ['erin']]
+    
+    response = client.get('/api/users?limit=5', headers=auth_headers)
+    assert 'Link' not in response.headers
+    assert len(response.get_json()) == 5
+
+def test_users_prefix_search(client, auth_headers):
+    add_users('anna', 'annabel', 'ann', 'bob', 'zann')
+    
+    pages = fetch_all(client, auth_headers, '/api/users?q=ann&limit=2')
+    assert pages == [['ann', 'anna'], ['annabel']]
+    
+    response = client.get('/api/users?q=bob@&by=email&fields=id,email', headers=auth_headers)
+    assert response.get_json() == [{'id': 5, 'email': 'bob@example.com'}]
+    
+    assert client.get('/api/users?q=nobody', headers=auth_headers).get_json() == []
+
+def test_users_invalid_parameters(client, auth_headers):
+    for query in ('limit=0', 'limit=5000', 'q=a&by=password_hash', 'cursor=%%%', 'fields=secret'):
+        response = client.get(f'/api/users?{query}', headers=auth_headers)
+        assert response.status_code == 400, query
+
+def test_users_page_etag_changes_with_page(client, auth_headers):
+    add_users('bob')
+    etag = client.get('/api/users', headers=auth_headers).headers['ETag']
+    add_users('carol')
+    response = client.get('/api/users', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag